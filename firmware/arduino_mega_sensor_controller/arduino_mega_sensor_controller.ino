@@ -17,6 +17,8 @@
  * Communication:
  * - USB Serial to Mini PC host (115200 baud)
  * - JSON telemetry format at 20Hz
+ * - TELEM:BIN[,ms] switches to binary COBS/CRC16 frames (see
+ *   mini_pc_master/telemetry_frame.py), TELEM:JSON back
  * ===================================================================
  */
 
@@ -80,6 +82,36 @@ struct TelemetryData {
 
 TelemetryData telemetry;
 
+// Binary telemetry frame (little-endian, as laid out in telemetry_frame.py)
+#define FRAME_TELEMETRY 1
+#define FRAME_VERSION 1
+#define FLAG_IBUS_CONNECTED 0x01
+
+struct __attribute__((packed)) TelemetryFrame {
+  uint8_t type;
+  uint8_t version;
+  uint16_t seq;
+  uint32_t t;
+  int32_t lat;          // 1e-7 degree
+  int32_t lng;
+  uint16_t gpsSpeed;    // 0.01 km/h
+  uint16_t gpsAccuracy; // HDOP
+  uint8_t satellites;
+  uint8_t flags;
+  uint16_t heading;     // 0.01 degree
+  int16_t pitch;
+  int16_t roll;
+  int16_t accel[3];     // 0.001 g
+  uint16_t lidar;
+  uint16_t ultrasonic[5];
+  uint16_t ibus[IBUS_CHANNELS];
+  uint16_t battery;     // 0.01 %
+  uint16_t crc;         // CRC-16/CCITT-FALSE of everything above
+};
+
+bool binaryTelemetry = false;   // JSON after every reset until TELEM:BIN
+uint16_t telemetrySeq = 0;
+
 // ===== TIMING =====
 unsigned long lastTelemetrySend = 0;
 unsigned long lastLidarRead = 0;
@@ -88,11 +120,15 @@ unsigned long lastIbusCheck = 0;
 unsigned long lastStatusBlink = 0;
 
 const unsigned long TELEMETRY_INTERVAL = 50;    // 50ms = 20Hz
+const unsigned long JSON_MIN_INTERVAL = 30;     // ~300 byte line = 26ms at 115200
+const unsigned long BINARY_MIN_INTERVAL = 7;    // 73 byte frame = 6.3ms at 115200
 const unsigned long LIDAR_INTERVAL = 100;       // 100ms = 10Hz
 const unsigned long ULTRASONIC_INTERVAL = 100;  // 100ms = 10Hz
 const unsigned long IBUS_INTERVAL = 10;         // 10ms = 100Hz
 const unsigned long STATUS_BLINK = 500;         // 500ms
 
+unsigned long telemetryInterval = TELEMETRY_INTERVAL;  // TELEM:<mode>,<ms> changes it
+
 // ===== GPS =====
 TinyGPSPlus gps;
 bool gpsLocked = false;
@@ -171,11 +207,15 @@ void loop() {
     lastUltrasonicRead = now;
   }
   
-  // ===== TELEMETRY SEND (20Hz) =====
-  if (now - lastTelemetrySend >= TELEMETRY_INTERVAL) {
+  // ===== TELEMETRY SEND (20Hz, or as set by TELEM:) =====
+  if (now - lastTelemetrySend >= telemetryInterval) {
     readIMU();
     readGPS();
-    sendTelemetry();
+    if (binaryTelemetry) {
+      sendTelemetryFrame();
+    } else {
+      sendTelemetry();
+    }
     lastTelemetrySend = now;
   }
   
@@ -255,6 +295,21 @@ void handleCommand(String cmd) {
     String mode = cmd.substring(3);
     Serial.println("{\"event\":\"rc_mode\",\"enabled\":\"" + mode + "\"}");
   }
+  else if (cmd.startsWith("TELEM:")) {
+    // Format: TELEM:BIN[,interval_ms] or TELEM:JSON[,interval_ms]
+    int commaIdx = cmd.indexOf(',');
+    String mode = commaIdx < 0 ? cmd.substring(6) : cmd.substring(6, commaIdx);
+    unsigned long interval = commaIdx < 0 ? TELEMETRY_INTERVAL : cmd.substring(commaIdx + 1).toInt();
+    if (mode == "BIN" || mode == "JSON") {
+      binaryTelemetry = (mode == "BIN");
+      unsigned long minInterval = binaryTelemetry ? BINARY_MIN_INTERVAL : JSON_MIN_INTERVAL;
+      telemetryInterval = constrain(interval, minInterval, 1000UL);
+    }
+    // Acknowledged as a JSON line either way; the next telemetry uses the new mode
+    Serial.println("{\"event\":\"telemetry_mode\",\"mode\":\"" +
+                   String(binaryTelemetry ? "bin" : "json") +
+                   "\",\"interval\":" + String(telemetryInterval) + "}");
+  }
 }
 
 void sendStatus() {
@@ -512,3 +567,77 @@ void sendTelemetry() {
   
   Serial.println("}");
 }
+
+// ===== BINARY TELEMETRY OUTPUT =====
+uint16_t crc16Ccitt(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  while (len--) {
+    crc ^= (uint16_t)(*data++) << 8;
+    for (uint8_t i = 0; i < 8; i++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+// COBS: replaces every zero byte so 0x00 can delimit frames.
+// dst needs len + len/254 + 1 bytes; returns the encoded length.
+size_t cobsEncode(const uint8_t *src, size_t len, uint8_t *dst) {
+  size_t codeIdx = 0;
+  size_t out = 1;
+  uint8_t code = 1;
+  for (size_t i = 0; i < len; i++) {
+    if (src[i] == 0) {
+      dst[codeIdx] = code;
+      codeIdx = out++;
+      code = 1;
+    } else {
+      dst[out++] = src[i];
+      if (++code == 0xFF) {
+        dst[codeIdx] = code;
+        codeIdx = out++;
+        code = 1;
+      }
+    }
+  }
+  dst[codeIdx] = code;
+  return out;
+}
+
+void sendTelemetryFrame() {
+  TelemetryFrame frame;
+  frame.type = FRAME_TELEMETRY;
+  frame.version = FRAME_VERSION;
+  frame.seq = telemetrySeq++;
+  frame.t = millis();
+
+  frame.lat = (int32_t)(telemetry.gpsLat * 1e7);
+  frame.lng = (int32_t)(telemetry.gpsLng * 1e7);
+  frame.gpsSpeed = (uint16_t)(telemetry.gpsSpeed * 100 + 0.5);
+  frame.gpsAccuracy = telemetry.gpsAccuracy;
+  frame.satellites = gps.satellites.value();
+  frame.flags = telemetry.ibusConnected ? FLAG_IBUS_CONNECTED : 0;
+
+  frame.heading = (uint16_t)(telemetry.heading * 100 + 0.5) % 36000;
+  frame.pitch = (int16_t)lround(telemetry.pitch * 100);
+  frame.roll = (int16_t)lround(telemetry.roll * 100);
+  frame.accel[0] = (int16_t)lround(telemetry.accelX * 1000);
+  frame.accel[1] = (int16_t)lround(telemetry.accelY * 1000);
+  frame.accel[2] = (int16_t)lround(telemetry.accelZ * 1000);
+
+  frame.lidar = telemetry.lidarDistance;
+  for (int i = 0; i < 5; i++) {
+    frame.ultrasonic[i] = telemetry.ultrasonic[i];
+  }
+  for (int i = 0; i < IBUS_CHANNELS; i++) {
+    frame.ibus[i] = telemetry.ibusChannels[i];
+  }
+  frame.battery = (uint16_t)(telemetry.battery * 100 + 0.5);
+  frame.crc = crc16Ccitt((const uint8_t *)&frame, sizeof(frame) - sizeof(frame.crc));
+
+  uint8_t encoded[sizeof(TelemetryFrame) + 2];
+  size_t n = cobsEncode((const uint8_t *)&frame, sizeof(frame), encoded);
+  Serial.write((uint8_t)0);
+  Serial.write(encoded, n);
+  Serial.write((uint8_t)0);
+}
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Arduino Telemetry Reader
+================================================================================
+Splits the Arduino Mega's serial stream into lines and routes JSON lines
+by their first key to a handler per message type:
+
+    {"t":...}       20 Hz telemetry (sendTelemetry)
+    {"event":...}   boot/ready/stopped/pong/rc_mode/error
+    {"status":...}  STATUS command reply
+    {"ibus":...}    IBUS command reply
+
+The key is read straight from the raw bytes, so lines with no handler
+are counted and dropped without being decoded. Every read drains all
+complete lines in one pass (one copy and one split), so a burst of
+event and status lines is handled in a single wakeup rather than one
+line per poll.
+
+Telemetry can also arrive as binary frames (telemetry_frame: 0x00,
+COBS payload, 0x00) once the Mega has been sent TELEM:BIN. Frames and
+text lines are told apart by the zero byte, so a buffer without one
+takes the text-only path above; frames are decoded to the same dict as
+the JSON line and go to the "t" handler.
+
+Runs either in a thread blocked in read() until bytes arrive
+(run_blocking) or from a serial_reactor.SerialReactor, which calls
+on_readable() when bytes have arrived.
+
+Frame delay is how much later than the fastest frame of the last 30-60 s
+each telemetry line arrived, from the Mega's millis() stamp `t`:
+the serial transfer time itself cancels out, so what remains is
+queueing on either side of the cable.
+================================================================================
+"""
+
+import json
+import time
+from typing import Callable, Dict, Optional
+
+from metrics import Histogram, exponential_buckets
+from serial_ring_buffer import SerialRingBuffer
+from telemetry_frame import FrameError, decode_telemetry, seq_gap
+
+# Bytes (or lines) waiting: 1 .. 8192
+BACKLOG_BUCKETS = exponential_buckets(1, 2.0, 14)
+
+# Frame-delay baseline: minimum (host time - Mega time) over the last 30-60 s
+BASELINE_WINDOW = 30.0
+
+
+class ArduinoReader:
+    """Line/frame splitting and first-key routing for one Arduino serial port"""
+
+    def __init__(self, port, handlers: Dict[str, Callable[[dict], None]],
+                 on_text: Optional[Callable[[str], None]] = None,
+                 on_lost: Optional[Callable[[], None]] = None):
+        self.serial = port
+        self.routes = {key.encode(): handler for key, handler in handlers.items()}
+        self.on_text = on_text or (lambda line: print(f"[ARDUINO] {line}"))
+        self.on_lost = on_lost  # Reactor mode: called after a port error detached the reader
+        self.rx = SerialRingBuffer(4096)
+        self.running = False
+        self._reactor = None
+        self._watched_fd: Optional[int] = None
+
+        self.bytes_read = 0
+        self.reads = 0
+        self.empty_wakeups = 0
+        self.lines = 0
+        self.decode_errors = 0
+        self.handler_errors = 0
+        self.frames = 0
+        self.frame_errors = 0
+        self.frames_lost = 0
+        self.routed: Dict[str, int] = {key: 0 for key in handlers}
+        self.dropped: Dict[str, int] = {}
+        self.handler_time = Histogram()
+        self.frame_delay = Histogram()
+        self.backlog_bytes = Histogram(BACKLOG_BUCKETS)  # Left in the OS buffer after a read
+        self.lines_per_read = Histogram(BACKLOG_BUCKETS)
+        self._baseline = [float('inf'), float('inf')]  # Previous, current window minimum
+        self._window_start = 0.0
+        self._last_t = -1
+        self._last_seq: Optional[int] = None
+
+    def read_available(self, block: bool = False) -> int:
+        """
+        Read what the port has buffered and dispatch every complete line
+        and frame.
+        With `block`, wait (up to the port timeout) for the first byte.
+        """
+        port = self.serial
+        if not port or not port.is_open:
+            return 0
+        waiting = port.in_waiting
+        if not waiting:
+            if not block:
+                return 0
+            waiting = 1
+        n = self.rx.fill_from(port, waiting)
+        if not n:
+            return 0
+        received = time.time()
+        self.reads += 1
+        self.bytes_read += n
+        self.backlog_bytes.observe(port.in_waiting)
+        if self.rx.find(b'\x00') == -1:
+            self._dispatch_lines(received)
+        else:
+            self._dispatch_mixed(received)
+        return n
+
+    def _dispatch_lines(self, received: float):
+        lines = self.rx.pop_lines()
+        self.lines += len(lines)
+        self.lines_per_read.observe(len(lines))
+        for raw_line in lines:
+            self._route_line(raw_line.strip(), received)
+
+    def _dispatch_mixed(self, received: float):
+        """
+        Binary frames and text lines in one copy and one split on 0x00.
+        Split parts alternate between gaps (text lines, or nothing between
+        back-to-back frames) and frames; a part that doesn't decode as a
+        frame is taken as a gap, which realigns the parity if the reader
+        joined the stream mid-frame.
+        """
+        rx = self.rx
+        parts = bytes(rx.peek(len(rx))).split(b'\x00')
+        tail = parts.pop()  # Not followed by a zero yet
+        in_frame = False
+        items = 0
+        for part in parts:
+            if in_frame and part and self._route_frame(part, received):
+                items += 1
+                in_frame = False
+                continue
+            items += self._route_text(part, received)[0]
+            in_frame = True  # The zero after a gap opens a frame
+        if in_frame:
+            keep = len(tail) + 1
+        else:
+            routed, keep = self._route_text(tail, received)
+            items += routed
+        if keep >= rx.capacity:
+            rx.clear()  # One unterminated frame or line filled the buffer
+        else:
+            rx.consume(len(rx) - keep)
+        self.lines_per_read.observe(items)
+
+    def _route_text(self, gap: bytes, received: float):
+        """Route the complete lines in `gap`; returns (lines, unterminated bytes)"""
+        if not gap:
+            return 0, 0
+        lines = gap.split(b'\n')
+        rest = lines.pop()
+        self.lines += len(lines)
+        for line in lines:
+            self._route_line(line.strip(), received)
+        return len(lines), len(rest)
+
+    def _route_frame(self, encoded: bytes, received: float) -> bool:
+        try:
+            data = decode_telemetry(encoded)
+        except FrameError:
+            self.frame_errors += 1
+            return False
+        self.frames += 1
+        if data['t'] < self._last_t:
+            self._last_seq = None  # Mega rebooted
+        self.frames_lost += seq_gap(self._last_seq, data['seq'])
+        self._last_seq = data['seq']
+        self._call(b't', data, received)
+        return True
+
+    def _route_line(self, line: bytes, received: float):
+        if line[:2] == b'{"':
+            end = line.find(b'"', 2)
+            key = line[2:end]
+            if key not in self.routes:
+                name = key.decode('utf-8', errors='replace')
+                self.dropped[name] = self.dropped.get(name, 0) + 1
+                return
+            try:
+                data = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                self.decode_errors += 1
+                return
+            self._call(key, data, received)
+        elif line:
+            self.on_text(line.decode('utf-8', errors='ignore'))
+
+    def _call(self, key: bytes, data: dict, received: float):
+        handler = self.routes.get(key)
+        if handler is None:
+            return
+        if key == b't':
+            self._observe_frame(received, data.get('t'))
+        start = time.perf_counter()
+        try:
+            handler(data)
+        except Exception as e:
+            self.handler_errors += 1
+            print(f"[ERROR] Arduino {key.decode()} handler: {e}")
+        self.handler_time.observe(time.perf_counter() - start)
+        name = key.decode()
+        self.routed[name] = self.routed.get(name, 0) + 1
+
+    def _observe_frame(self, received: float, t_ms):
+        if not isinstance(t_ms, (int, float)):
+            return
+        if t_ms < self._last_t:
+            self._baseline = [float('inf'), float('inf')]  # Mega rebooted
+        self._last_t = t_ms
+        offset = received - t_ms / 1000.0
+        if received - self._window_start > BASELINE_WINDOW:
+            self._baseline = [self._baseline[1], float('inf')]
+            self._window_start = received
+        if offset < self._baseline[1]:
+            self._baseline[1] = offset
+        self.frame_delay.observe(offset - min(self._baseline))
+
+    def run_blocking(self):
+        """Thread body: sleep in read() until bytes arrive, then drain"""
+        self.running = True
+        while self.running:
+            try:
+                if not self.serial or not self.serial.is_open:
+                    time.sleep(0.1)
+                    continue
+                self.read_available(block=True)
+            except Exception as e:
+                print(f"[ERROR] Telemetry read: {e}")
+                time.sleep(1)
+
+    def attach(self, reactor):
+        """Read from `reactor` callbacks instead of a thread"""
+        self._reactor = reactor
+        self.running = True
+        if self.serial and self.serial.is_open:
+            self._watched_fd = self.serial.fileno()
+            reactor.add_reader(self._watched_fd, self.on_readable, 'arduino')
+
+    def detach(self):
+        self.running = False
+        if self._reactor is not None and self._watched_fd is not None:
+            self._reactor.remove_reader(self._watched_fd)
+            self._watched_fd = None
+
+    def on_readable(self):
+        try:
+            if not self.read_available():
+                # Spurious wakeup, bytes already taken, or a full ring: not
+                # a disconnect (that raises from in_waiting / readinto)
+                self.empty_wakeups += 1
+        except Exception as e:
+            print(f"[ERROR] Telemetry read: {e}")
+            self.detach()
+            if self.on_lost:
+                self.on_lost()
+
+    def stats(self) -> dict:
+        return {
+            'mode': 'reactor' if self._reactor is not None else 'thread',
+            'bytes_read': self.bytes_read,
+            'reads': self.reads,
+            'empty_wakeups': self.empty_wakeups,
+            'lines': self.lines,
+            'routed': dict(self.routed),
+            'dropped': dict(self.dropped),
+            'frames': self.frames,
+            'frame_errors': self.frame_errors,
+            'frames_lost': self.frames_lost,
+            'decode_errors': self.decode_errors,
+            'handler_errors': self.handler_errors,
+            'frame_delay_ms': self.frame_delay.to_dict(scale=1e3),
+            'handler_ms': self.handler_time.to_dict(scale=1e3),
+            'backlog_bytes': self.backlog_bytes.to_dict(digits=0),
+            'lines_per_read': self.lines_per_read.to_dict(digits=0),
+            'buffered_bytes': len(self.rx),
+        }
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Flight recorder cost: record() on the telemetry thread, writer throughput
+(frames/s into the memory-mapped segments) and /api/logs-style range
+query latency over a store of `--hours` of 20 Hz telemetry, for a few
+window sizes and field selections.
+
+    python3 benchmarks/bench_flight_recorder.py [--hours 6] [--dir /tmp/...]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from flight_recorder import FlightRecorder, ROW_BYTES
+
+HZ = 20.0
+
+
+def telemetry(i: int) -> dict:
+    return {
+        't': 50 * i,
+        'gps': {'lat': 37.774929 + i * 1e-7, 'lng': -122.419416, 'spd': 3.4, 'acc': 120, 'sat': 9},
+        'imu': {'hdg': (i * 0.7) % 360, 'pitch': 0.5, 'roll': -0.3, 'ax': 0.01, 'ay': 0.02, 'az': 0.98},
+        'lidar': 250, 'ultra': [120, 130, 140, 150, 160],
+        'ibus': {'con': True, 'ch': [1500] * 10},
+        'bat': 84.2 - i * 1e-5,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hours', type=float, default=6.0)
+    parser.add_argument('--dir', default=None, help="Store location (default: a temp dir)")
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    root = args.dir or tempfile.mkdtemp(prefix='flight_')
+    frames = int(args.hours * 3600 * HZ)
+    t0 = 1.8e9
+    sample = [telemetry(i) for i in range(1000)]
+    recorder = FlightRecorder(root)
+
+    # record() is what the telemetry handler pays; flush() runs once a
+    # second on the writer thread
+    t_record = t_write = 0.0
+    batch = int(HZ)
+    for first in range(0, frames, batch):
+        start = time.perf_counter()
+        for i in range(first, min(first + batch, frames)):
+            recorder.record(sample[i % 1000], t0 + i / HZ)
+        t_record += time.perf_counter() - start
+        start = time.perf_counter()
+        recorder.flush()
+        t_write += time.perf_counter() - start
+    t_record /= frames
+    stats = recorder.stats()
+    print(f"{frames} frames ({args.hours:g} h at {HZ:g} Hz), {ROW_BYTES} bytes/row,"
+          f" {stats['segments']} segments, {stats['bytes'] / 1e6:.0f} MB on disk")
+    print(f"  record()  {1e6 * t_record:5.2f} us/frame on the caller")
+    print(f"  writer    {frames / t_write:8.0f} frames/s  ({1e6 * t_write / frames:5.2f} us/frame)")
+
+    span = frames / HZ
+    rng = np.random.default_rng(0)
+    for window, fields in ((10, ['heading']), (600, ['heading', 'battery']),
+                           (3600, ['heading', 'pitch', 'roll', 'battery']), (span, None)):
+        starts = t0 + rng.uniform(0, max(span - window, 0), 20)
+        times = []
+        for s in starts:
+            q0 = time.perf_counter()
+            result = recorder.query(s, s + window, fields)
+            FlightRecorder.to_lists(result['fields'])
+            times.append(time.perf_counter() - q0)
+        label = ','.join(fields) if fields else 'all fields'
+        print(f"  query {window:7.0f} s  {label:28s} rows {result['count']:7d}"
+              f" step {result['step']:4d}  median {1e3 * np.median(times):6.2f} ms")
+
+    recorder.close()
+    if args.dir is None:
+        shutil.rmtree(root, ignore_errors=True)
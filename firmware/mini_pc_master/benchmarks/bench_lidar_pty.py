@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+LIDAR load test over a pseudo-terminal: run YDLidarDriver (real connect()
+handshake, real serial reads) against lidar_simulator.VirtualLidar at and
+above 230400 baud and report delivered scans/sec, points per scan, decode
+CPU and end-to-end latency from the last packet of a revolution leaving the
+device to the scan callback.
+
+    python3 benchmarks/bench_lidar_pty.py [--seconds 5] [--corrupt 0.01]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from lidar_simulator import VirtualLidar
+from ydlidar_driver import DECODER_PER_SAMPLE, DECODER_VECTORIZED, YDLidarDriver
+
+# (baudrate, scan Hz, points per revolution)
+PROFILES = [
+    (230400, 6.0, 660),      # T-mini Plus: ~4k points/s
+    (460800, 10.0, 1000),
+    (921600, 10.0, 2500),
+    (2000000, 12.0, 5000),
+]
+
+
+def run(baudrate: int, hz: float, points: int, decoder: str,
+        seconds: float, corrupt: float, drop: float):
+    sim = VirtualLidar(scan_hz=hz, points_per_rev=points, baudrate=baudrate,
+                       corrupt_rate=corrupt, drop_rate=drop, seed=0)
+    port = sim.open()
+    driver = YDLidarDriver(port, baudrate, decoder=decoder)
+    latencies = []
+    sizes = []
+
+    def on_scan(scan):
+        latency = sim.scan_latency(time.time())
+        if latency is not None:
+            latencies.append(latency)
+        sizes.append(len(scan))
+
+    driver.set_scan_callback(on_scan)
+    with contextlib.redirect_stdout(io.StringIO()):
+        driver.connect()
+        time.sleep(1.0)  # Drain the backlog queued during the connect() handshake
+        latencies.clear()
+        sizes.clear()
+        revs = sim.revolutions
+        scans = driver.stats.scans
+        overflow = sim.overflow_bytes
+        cpu = time.process_time()
+        time.sleep(seconds)
+        cpu = time.process_time() - cpu
+        revs = sim.revolutions - revs
+        scans = driver.stats.scans - scans
+        overflow = sim.overflow_bytes - overflow
+        driver.disconnect()
+        driver._read_thread.join()
+    sim.close()
+
+    lat = np.array(latencies or [np.nan]) * 1000
+    print(f"  {baudrate:>7} baud {hz:4.1f} Hz {points:5d} pts  {decoder:<11}"
+          f"  sent {revs / seconds:5.1f} rev/s  got {scans / seconds:5.1f} scans/s"
+          f"  {np.mean(sizes) if sizes else 0:7.0f} pts/scan"
+          f"  cpu {100 * cpu / seconds:5.1f}%"
+          f"  latency p50 {np.percentile(lat, 50):6.1f} ms  p99 {np.percentile(lat, 99):6.1f} ms"
+          f"  overflow {overflow} B")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--corrupt', type=float, default=0.0)
+    parser.add_argument('--drop', type=float, default=0.0)
+    args = parser.parse_args()
+
+    for baudrate, hz, points in PROFILES:
+        for decoder in (DECODER_PER_SAMPLE, DECODER_VECTORIZED):
+            run(baudrate, hz, points, decoder, args.seconds, args.corrupt, args.drop)
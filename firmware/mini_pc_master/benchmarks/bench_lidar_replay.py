@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+LIDAR replay throughput: feed a raw capture through YDLidarDriver as fast
+as possible and report scans/sec and MB/sec for each decoder.
+
+    python3 benchmarks/bench_lidar_replay.py [capture.ydlcap]
+
+Without a capture file, a synthetic one is generated.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from common import synthetic_stream
+from lidar_capture import CaptureReplay, CaptureWriter
+from ydlidar_driver import DECODER_PER_SAMPLE, DECODER_VECTORIZED, YDLidarDriver
+
+
+def write_synthetic_capture(path: str, revolutions: int = 600):
+    data = synthetic_stream(revolutions=revolutions)
+    writer = CaptureWriter(path)
+    chunk = 256
+    for i in range(0, len(data), chunk):
+        writer.write(data[i:i + chunk], 1000.0 + i / 23040.0)
+    writer.close()
+
+
+def replay(path: str, decoder: str):
+    source = CaptureReplay(path, realtime=False, timeout=0.05)
+    driver = YDLidarDriver(decoder=decoder)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        driver.connect_source(source)
+        while not source.exhausted:
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        driver.running = False
+        driver._read_thread.join()
+    total = source.total_bytes
+    source.release()
+    return driver.stats.scans, total, elapsed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        capture = sys.argv[1]
+    else:
+        capture = os.path.join(tempfile.mkdtemp(), 'synthetic.ydlcap')
+        write_synthetic_capture(capture)
+
+    for decoder in (DECODER_PER_SAMPLE, DECODER_VECTORIZED):
+        scans, total, elapsed = replay(capture, decoder)
+        print(f"{decoder:<11} {scans:6d} scans in {elapsed:6.3f}s  "
+              f"{scans / elapsed:8.1f} scans/s  {total / elapsed / 1e6:6.2f} MB/s")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+LIDAR wire format benchmark: JSON (get_scan_dict + json.dumps) vs binary
+frames from lidar_wire_format, for payload size and encode time.
+
+    python3 benchmarks/bench_lidar_wire_format.py
+"""
+
+import json
+
+import numpy as np
+
+from common import timed
+from lidar_wire_format import decode_frame, encode_scan
+from ydlidar_driver import LidarScan, YDLidarDriver
+
+
+def make_scan(points: int, seed: int = 0) -> LidarScan:
+    rng = np.random.default_rng(seed)
+    return LidarScan(
+        timestamp=1767350732.191,
+        angles=np.sort(rng.uniform(0, 360, points)).astype(np.float32),
+        distances=rng.integers(150, 8000, points).astype(np.uint16),
+        intensities=rng.integers(40, 255, points).astype(np.uint8),
+        scan_frequency=6.5,
+        seq=42
+    )
+
+
+def encode_json(driver: YDLidarDriver) -> bytes:
+    return json.dumps(driver.get_scan_dict()).encode()
+
+
+def encode_binary(driver: YDLidarDriver) -> bytes:
+    scan = driver.get_latest_scan()
+    return encode_scan(scan, seq=scan.seq)
+
+
+if __name__ == '__main__':
+    print(f"{'points':>7} {'json bytes':>11} {'bin bytes':>10} {'ratio':>6}"
+          f" {'json us':>9} {'bin us':>8} {'speedup':>8}")
+    for points in (360, 500, 1000, 2000):
+        driver = YDLidarDriver()
+        driver.connected = True
+        driver.last_complete_scan = make_scan(points)
+
+        t_json, json_data = timed(lambda: [encode_json(driver) for _ in range(100)])
+        t_bin, bin_data = timed(lambda: [encode_binary(driver) for _ in range(100)])
+        json_data, bin_data = json_data[0], bin_data[0]
+
+        decoded = decode_frame(bin_data)
+        reference = json.loads(json_data)
+        assert decoded['count'] == reference['count']
+        assert all(abs(p['angle'] - q['angle']) <= 0.051 and p['distance'] == q['distance']
+                   for p, q in zip(decoded['points'], reference['points']))
+
+        print(f"{points:>7} {len(json_data):>11} {len(bin_data):>10} {len(json_data) / len(bin_data):>6.1f}"
+              f" {t_json * 1e4:>9.1f} {t_bin * 1e4:>8.1f} {t_json / t_bin:>8.1f}x")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Obstacle clustering + tracking cost per scan on one core, for synthetic
+room scans with two fixed pillars and one 25 cm object walking back and
+forth 1.2 m to the rover's right at 1 m/s. Also prints the walker's
+tracked speed, which should come out near vx 0, vy 1 m/s (rover frame).
+
+    python3 benchmarks/bench_obstacle_tracker.py [--scans 300] [--points 660]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from lidar_simulator import Scene
+from obstacle_tracker import ObstacleTracker
+from ydlidar_driver import LidarScan
+
+SCAN_HZ = 6.0
+WALKER_SPEED = 1.0  # m/s along the rover's forward axis
+
+
+def walker_at(i: int):
+    """Scene (x, y, radius) in mm, x between -2.5 m and +2.5 m at y = 1.2 m"""
+    travel = (WALKER_SPEED * 1000 * i / SCAN_HZ) % 10000
+    x = travel - 2500 if travel < 5000 else 7500 - travel
+    return (x, 1200, 125)
+
+
+def make_scans(count: int, points: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    angles = (np.arange(points) * (360.0 / points)).astype(np.float32)
+    scans, truth = [], []
+    for i in range(count):
+        walker = walker_at(i)
+        scene = Scene.room(width_mm=8000, depth_mm=6000, offset_mm=(0, 0),
+                           pillars=((2000, -1500, 250), (-2200, -1000, 150), walker))
+        distances, intensities = scene.sample(angles)
+        noisy = np.where(distances > 0, distances + rng.normal(0, 10, points), 0)
+        scans.append(LidarScan(
+            timestamp=1000.0 + i / SCAN_HZ,
+            angles=angles,
+            distances=np.clip(noisy, 0, 11999).astype(np.uint16),
+            intensities=intensities,
+            scan_frequency=SCAN_HZ,
+            seq=i + 1
+        ))
+        truth.append(walker)
+    return scans, truth
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scans', type=int, default=300)
+    parser.add_argument('--points', type=int, default=660)
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    scans, truth = make_scans(args.scans, args.points)
+    tracker = ObstacleTracker()
+
+    times, velocities = [], []
+    clusters = tracks = 0
+    for scan, (wx, wy, _) in zip(scans, truth):
+        t0 = time.perf_counter()
+        found = tracker.update(scan)
+        times.append(time.perf_counter() - t0)
+        clusters += len(found)
+        tracks += tracker.track_count
+
+        # Scene x is along LIDAR angle 0 (forward), y along 90 (right)
+        right, forward = wy / 1000, wx / 1000
+        walker = min(found, key=lambda c: np.hypot(c.x - right, c.y - forward), default=None)
+        if walker is not None and walker.confirmed and abs(abs(walker.x) - 1.2) < 0.3:
+            velocities.append(walker.velocity)
+
+    ms = np.array(times) * 1000
+    print(f"{args.points} points/scan, {len(scans)} scans, 1 core")
+    print(f"  update      mean {ms.mean():5.2f} ms  p99 {np.percentile(ms, 99):5.2f} ms"
+          f"  max {ms.max():5.2f} ms")
+    print(f"  clusters/scan {clusters / len(scans):5.1f}  tracks/scan {tracks / len(scans):5.1f}")
+    if velocities:
+        v = np.abs(np.array(velocities))
+        print(f"  walker |velocity| (rover frame) median vx {np.median(v[:, 0]):.2f}"
+              f"  vy {np.median(v[:, 1]):.2f} m/s over {len(v)} scans")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Occupancy grid throughput: scans/sec integrated into a 20 m x 20 m, 5 cm
+grid on one core, for synthetic room scans along a moving, turning path.
+
+    python3 benchmarks/bench_occupancy_grid.py [--scans 300] [--points 660]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from lidar_simulator import Scene
+from occupancy_grid import OccupancyGrid
+from ydlidar_driver import LidarScan
+
+
+def make_scans(count: int, points: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    scene = Scene.room(width_mm=14000, depth_mm=9000, offset_mm=(0, 0))
+    angles = (np.arange(points) * (360.0 / points)).astype(np.float32)
+    distances, intensities = scene.sample(angles)
+    scans = []
+    for i in range(count):
+        noisy = np.where(distances > 0, distances + rng.normal(0, 10, points), 0)
+        scans.append(LidarScan(
+            timestamp=1000.0 + i / 6.0,
+            angles=angles,
+            distances=np.clip(noisy, 0, 11999).astype(np.uint16),
+            intensities=intensities,
+            scan_frequency=6.0,
+            seq=i + 1
+        ))
+    return scans
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scans', type=int, default=300)
+    parser.add_argument('--points', type=int, default=660)
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    scans = make_scans(args.scans, args.points)
+    grid = OccupancyGrid(size_m=20.0, resolution_m=0.05)
+    # Drive 12 m east while yawing, so the window re-centres along the way
+    poses = [(12.0 * i / len(scans), 0.5 * np.sin(i / 20), 30 * np.sin(i / 50))
+             for i in range(len(scans))]
+
+    start = time.perf_counter()
+    for scan, (x, y, heading) in zip(scans, poses):
+        grid.update(scan, heading, x, y)
+    elapsed = time.perf_counter() - start
+
+    t0 = time.perf_counter()
+    frame = grid.to_bytes()
+    t_bin = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    png = grid.to_png()
+    t_png = time.perf_counter() - t0
+
+    print(f"{grid.cells}x{grid.cells} cells @ {grid.resolution * 100:.0f} cm, "
+          f"{args.points} points/scan, 1 core")
+    print(f"  update     {len(scans) / elapsed:8.1f} scans/s  {1000 * elapsed / len(scans):6.2f} ms/scan")
+    print(f"  to_bytes   {len(frame) / 1024:8.1f} KB      {1000 * t_bin:6.2f} ms")
+    print(f"  to_png     {len(png) / 1024:8.1f} KB      {1000 * t_png:6.2f} ms")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Telemetry fan-out cost per Arduino update: every consumer (Socket.IO
+emit, WebSocket tick, /api/telemetry poll) building its own dict and JSON
+the way to_dict() + json.dumps used to, vs one RoverState snapshot whose
+cached JSON all consumers share. Also the cost of update_from_arduino
+itself with dirty tracking, and of the binary snapshot encoding.
+
+    python3 benchmarks/bench_rover_state.py [--updates 5000]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import common  # Import path setup
+from common import timed
+from rover_state import RoverState
+
+
+def telemetry(i: int) -> dict:
+    return {
+        't': 50 * i,
+        'gps': {'lat': 37.774929 + i * 1e-7, 'lng': -122.419416, 'spd': 3.4, 'acc': 120, 'sat': 9},
+        'imu': {'hdg': (i * 0.7) % 360, 'pitch': 0.5, 'roll': -0.3, 'ax': 0.01, 'ay': 0.02, 'az': 0.98},
+        'lidar': 250, 'ultra': [120, 130, 140, 150, 160],
+        'ibus': {'con': True, 'ch': [1500] * 10},
+        'bat': 84.2,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--updates', type=int, default=5000)
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    frames = [telemetry(i) for i in range(args.updates)]
+    rover = RoverState()
+
+    def updates_only():
+        for data in frames:
+            rover.update_from_arduino(data)
+
+    def rebuild(consumers: int):
+        for data in frames:
+            rover.update_from_arduino(data)
+            for _ in range(consumers):
+                json.dumps(rover._snapshot_dict(time.time()))
+
+    def shared(consumers: int, binary: bool = False):
+        for data in frames:
+            rover.update_from_arduino(data)
+            for _ in range(consumers):
+                snapshot = rover.snapshot()
+                snapshot.binary if binary else snapshot.json
+
+    n = len(frames)
+    t_update = timed(updates_only, repeat=5)[0] / n
+    print(f"{args.updates} updates, 1 core (best of 5; per update, excluding the update itself)")
+    print(f"  update_from_arduino  {1e6 * t_update:5.2f} us")
+    for consumers in (1, 3, 10):
+        t_rebuild = timed(rebuild, consumers, repeat=5)[0] / n - t_update
+        t_shared = timed(shared, consumers, repeat=5)[0] / n - t_update
+        print(f"  {consumers:2d} consumer(s)  rebuild {1e6 * t_rebuild:6.2f} us"
+              f"  snapshot {1e6 * t_shared:6.2f} us")
+    t_binary = timed(shared, 1, True, repeat=5)[0] / n - t_update
+    snapshot = rover.snapshot()
+    print(f"  snapshot + binary  {1e6 * t_binary:6.2f} us"
+          f"  ({len(snapshot.binary)} bytes vs {len(snapshot.json)} JSON)")
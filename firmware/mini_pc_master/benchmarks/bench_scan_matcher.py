@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Scan-matching odometry: time per match on one core, and drift against
+ground truth for a synthetic drive (or just timing for recorded scans).
+
+    python3 benchmarks/bench_scan_matcher.py [capture.ydlcap]
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from lidar_capture import read_scans
+from lidar_simulator import Scene
+from scan_matcher import ScanOdometry
+from ydlidar_driver import LidarScan
+
+
+def synthetic_drive(count: int = 300, points: int = 660, hz: float = 6.0, seed: int = 0):
+    """
+    Scans along an S-curve through a 12 m x 8 m room at ~0.8 m/s.
+    Returns (scans, poses) with poses (x east, y north, heading) in metres/degrees.
+    """
+    rng = np.random.default_rng(seed)
+    angles = (np.arange(points) * (360.0 / points)).astype(np.float32)
+    scans, poses = [], []
+    x, y, heading = -3.0, -1.0, 80.0
+    for i in range(count):
+        # Room frame used by Scene.room: first axis along bearing 0 (north), second along 90 (east)
+        scene = Scene.room(width_mm=12000, depth_mm=8000, offset_mm=(y * 1000, x * 1000),
+                           pillars=((1500 - y * 1000, 800 - x * 1000, 250),
+                                    (-1800 - y * 1000, -900 - x * 1000, 150)))
+        distances, intensities = scene.sample((angles + heading) % 360)
+        noisy = np.where(distances > 0, distances + rng.normal(0, 10, points), 0)
+        scans.append(LidarScan(
+            timestamp=1000.0 + i / hz, angles=angles,
+            distances=np.clip(noisy, 0, 11999).astype(np.uint16),
+            intensities=intensities, scan_frequency=hz, seq=i + 1
+        ))
+        poses.append((x, y, heading))
+        heading = (heading + 8.0 * math.sin(i / 25.0)) % 360
+        h = math.radians(heading)
+        step = 0.8 / hz
+        x += step * math.sin(h)
+        y += step * math.cos(h)
+        x = max(-4.5, min(4.5, x))
+        y = max(-3.0, min(3.0, y))
+    return scans, poses
+
+
+if __name__ == '__main__':
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    if len(sys.argv) > 1:
+        scans, poses = read_scans(sys.argv[1]), None
+    else:
+        scans, poses = synthetic_drive()
+
+    odometry = ScanOdometry()
+    if poses:
+        odometry.x, odometry.y = poses[0][0], poses[0][1]
+    times = []
+    errors = []
+    for i, scan in enumerate(scans):
+        imu = poses[i][2] + np.random.default_rng(i).normal(0, 0.5) if poses else None
+        start = time.perf_counter()
+        delta = odometry.update(scan, imu)
+        if delta is not None:
+            times.append(time.perf_counter() - start)
+        if poses:
+            errors.append(math.hypot(odometry.x - poses[i][0], odometry.y - poses[i][1]))
+
+    t = np.array(times) * 1000
+    print(f"{len(times)} matches, {len(scans[0])} points/scan, 1 core")
+    print(f"  time per match  mean {t.mean():6.2f} ms  p50 {np.percentile(t, 50):6.2f} ms"
+          f"  p99 {np.percentile(t, 99):6.2f} ms  -> {1000 / t.mean():6.1f} matches/s")
+    print(f"  rejected        {odometry.rejected}")
+    if poses:
+        travelled = sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(poses, poses[1:]))
+        print(f"  drift           {errors[-1]:.3f} m after {travelled:.1f} m"
+              f"  (max {max(errors):.3f} m)")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Serial ingestion benchmark: bytes += chunk / re-slicing vs SerialRingBuffer.
+
+Measures framing throughput (bytes/sec) and buffer allocations per second
+for the LIDAR packet framer and the Arduino line reader. "Allocations" are
+new bytes objects created to hold buffered stream data (concatenations,
+slices, per-read chunks); parsed output objects are not counted.
+
+    python3 benchmarks/bench_serial_ingest.py
+"""
+
+import io
+import json
+
+from common import synthetic_stream, timed
+from serial_ring_buffer import SerialRingBuffer
+from ydlidar_driver import (decode_packets_per_sample, decode_packets_vectorized,
+                            READ_SIZE, DECODER_VECTORIZED)
+
+LIDAR_CHUNK = 256
+
+
+def lidar_before(data: bytes):
+    """_read_loop before the ring buffer: bytes += chunk, slice per packet"""
+    stream = io.BytesIO(data)
+    buffer = b''
+    points = allocs = reads = 0
+    while True:
+        chunk = stream.read(LIDAR_CHUNK)
+        reads += 1
+        if not chunk:
+            break
+        allocs += 1
+        buffer += chunk
+        allocs += 1
+        while len(buffer) >= 10:
+            idx = buffer.find(b'\xaa\x55')
+            if idx == -1:
+                buffer = buffer[-1:]
+                allocs += 1
+                break
+            if idx > 0:
+                buffer = buffer[idx:]
+                allocs += 1
+            if len(buffer) < 10:
+                break
+            packet_len = 10 + buffer[3] * 3
+            if len(buffer) < packet_len:
+                break
+            consumed, packets = decode_packets_per_sample(buffer, 0, packet_len)
+            points += sum(len(p[2]) for p in packets)
+            buffer = buffer[packet_len:]
+            allocs += 1
+    return points, allocs, reads
+
+
+def lidar_after(data: bytes, decode=decode_packets_per_sample, read_size=LIDAR_CHUNK):
+    """_read_loop now: readinto the ring buffer, decode in place, consume"""
+    stream = io.BytesIO(data)
+    rx = SerialRingBuffer(8192)
+    points = reads = 0
+    while True:
+        reads += 1
+        if not rx.fill_from(stream, read_size):
+            break
+        pos, packets = decode(rx.raw, rx.head, rx.tail)
+        rx.consume(pos - rx.head)
+        points += sum(len(p[2]) for p in packets)
+    return points, rx.compactions, reads
+
+
+def lidar_after_vectorized(data: bytes):
+    return lidar_after(data, decode_packets_vectorized, READ_SIZE[DECODER_VECTORIZED])
+
+
+def arduino_before(data: bytes):
+    """pyserial readline(): one read(1) per byte, appended to a bytearray"""
+    stream = io.BytesIO(data)
+    lines = allocs = reads = 0
+    while True:
+        line = bytearray()
+        allocs += 1
+        while True:
+            c = stream.read(1)
+            reads += 1
+            if not c:
+                break
+            line += c
+            if line[-1:] == b'\n':
+                break
+        if not line:
+            break
+        bytes(line)
+        allocs += 1
+        lines += 1
+    return lines, allocs, reads
+
+
+def arduino_after(data: bytes):
+    """Buffered fill + pop_line on SerialRingBuffer"""
+    stream = io.BytesIO(data)
+    rx = SerialRingBuffer(4096)
+    lines = allocs = reads = 0
+    while True:
+        reads += 1
+        if not rx.fill_from(stream, 512):
+            break
+        while True:
+            line = rx.pop_line()
+            if line is None:
+                break
+            allocs += 1
+            lines += 1
+    return lines, allocs + rx.compactions, reads
+
+
+def telemetry_lines(count: int = 2000) -> bytes:
+    frame = json.dumps({
+        't': 123456, 'gps': {'lat': 53.3498, 'lng': -6.2603, 'spd': 1.2, 'acc': 3, 'sat': 8},
+        'imu': {'hdg': 182.5, 'pitch': 1.2, 'roll': -0.4, 'ax': 0.01, 'ay': 0.02, 'az': 0.98},
+        'lidar': 120, 'ultra': [80, 90, 100, 110, 120], 'bat': 84.2,
+        'ibus': {'con': True, 'ch': [1500] * 10},
+    }, separators=(',', ':'))
+    return ((frame + '\n') * count).encode()
+
+
+def report(name: str, data: bytes, unit: str, variants):
+    print(f"{name} ({len(data)} bytes)")
+    expected = None
+    for label, fn in variants:
+        elapsed, (frames, allocs, reads) = timed(fn, data)
+        if expected is None:
+            expected = frames
+        assert frames == expected, f"{label}: {frames} {unit} != {expected}"
+        print(f"  {label:<26} {len(data) / elapsed / 1e6:8.2f} MB/s"
+              f"  {allocs / elapsed:10.0f} allocs/s  {allocs / frames:7.4f} allocs/{unit[:-1]}"
+              f"  {reads:7d} reads")
+
+
+if __name__ == '__main__':
+    report('LIDAR ingestion', synthetic_stream(revolutions=200), 'points', [
+        ('before (bytes +=)', lidar_before),
+        ('after (ring)', lidar_after),
+        ('after (ring, vectorized)', lidar_after_vectorized),
+    ])
+    report('Arduino line reader', telemetry_lines(), 'lines', [
+        ('before (readline)', arduino_before),
+        ('after (ring)', arduino_after),
+    ])
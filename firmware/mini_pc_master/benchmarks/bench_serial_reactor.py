@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Serial I/O design comparison, LIDAR plus Arduino:
+  polling  the original Arduino loop (in_waiting check, then 10 ms sleep)
+           + blocking LIDAR read thread
+  threads  blocking-read threads for both (ArduinoReader.run_blocking)
+  reactor  one SerialReactor owning both ports
+
+A child process plays both devices on pseudo-terminals: a VirtualLidar
+at 230400 baud / 6 Hz and an Arduino sending 20 Hz JSON telemetry lines
+stamped with their write time. The parent runs the host side only, so
+CPU% and context switches (process-wide, all threads) belong to the
+design under test. Latency is line write -> telemetry handler call.
+
+--stall silences the LIDAR for the whole measurement (no data, no
+replies), so stall detection and the recovery strategies run inside the
+window: two stop/start attempts, then a soft reboot that reopens the
+port and health-checks a device that never answers (about 35 s in; use
+--seconds 40). The longest gap between telemetry handler calls shows
+what a recovery step blocking the reactor thread costs the Arduino.
+
+--eventlet runs the host side after eventlet.monkey_patch(), as
+rover_controller does: threads are green and SerialReactor gets
+eventlet's select()-based selector instead of epoll. That is what ships.
+The device process is forked before patching, so it is the same in
+both modes.
+
+    python3 benchmarks/bench_serial_reactor.py [--seconds 10] [--stall] [--eventlet]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import threading
+import time
+import tty
+
+import numpy as np
+import serial
+
+import common  # Import path setup
+from arduino_reader import ArduinoReader
+from lidar_simulator import VirtualLidar
+from serial_reactor import SerialReactor
+from ydlidar_driver import YDLidarDriver
+
+TELEMETRY_HZ = 20.0  # TELEMETRY_INTERVAL in the Mega sketch
+
+
+def telemetry_line(seq: int) -> bytes:
+    """A line shaped like sendTelemetry() output, plus a send timestamp"""
+    return (json.dumps({
+        't': seq * 50,
+        'gps': {'lat': 37.774929, 'lng': -122.419416, 'spd': 0.0, 'acc': 5, 'sat': 9},
+        'imu': {'hdg': 123.4, 'pitch': 0.5, 'roll': -0.3, 'ax': 0.01, 'ay': 0.02, 'az': 0.98},
+        'lidar': 250, 'ultra': [120, 130, 140, 150, 160],
+        'ibus': {'con': True, 'ch': [1500] * 10},
+        'bat': 84.2,
+        'sent': time.time(),
+    }, separators=(',', ':')) + '\r\n').encode()
+
+
+def devices(conn, stop):
+    """Child process: virtual LIDAR and Arduino on ptys until `stop` is set"""
+    sim = VirtualLidar(seed=0)
+    lidar_port = sim.open()
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    conn.send((lidar_port, os.ttyname(slave)))
+
+    seq = 0
+    start = time.monotonic()
+    while not stop.is_set():
+        if conn.poll():
+            if conn.recv() == 'stall':
+                sim.stall(clear_on=None)
+            else:
+                sim.clear_faults()
+        seq += 1
+        os.write(master, telemetry_line(seq))
+        delay = start + seq / TELEMETRY_HZ - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    sim.close()
+    os.close(master)
+    os.close(slave)
+
+
+def run(design: str, lidar_port: str, arduino_port: str, seconds: float, conn=None):
+    """With `conn`, have the device process silence the LIDAR while measuring"""
+    latencies = []
+    arrivals = []
+
+    def on_message(data):
+        now = time.time()
+        latencies.append(now - data['sent'])
+        arrivals.append(now)
+
+    def poll(reader):
+        while reader.running:
+            reader.read_available()
+            time.sleep(0.01)
+
+    arduino = serial.Serial(arduino_port, 115200, timeout=1)
+    reader = ArduinoReader(arduino, {'t': on_message})
+    driver = YDLidarDriver(lidar_port, verbose=False)
+    reactor = SerialReactor() if design == 'reactor' else None
+    thread = None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if reactor:
+            reactor.start()
+            reader.attach(reactor)
+        else:
+            reader.running = True
+            target = poll if design == 'polling' else ArduinoReader.run_blocking
+            thread = threading.Thread(target=target, args=(reader,), daemon=True)
+            thread.start()
+        driver.connect(reactor)
+        time.sleep(1.0)  # Drain the backlog queued during the connect() handshake
+
+        latencies.clear()
+        arrivals.clear()
+        recoveries = driver.stats.recovery_attempts
+        if conn:
+            conn.send('stall')
+        scans = driver.stats.scans
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu = time.process_time()
+        time.sleep(seconds)
+        cpu = time.process_time() - cpu
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        scans = driver.stats.scans - scans
+        recoveries = driver.stats.recovery_attempts - recoveries
+        if conn:
+            conn.send('clear')
+        wakeups = reactor.wakeups if reactor else None
+        selector = reactor.stats()['selector'] if reactor else None
+
+        driver.disconnect()
+        reader.running = False
+        if reactor:
+            reader.detach()
+            reactor.stop()
+        else:
+            driver._read_thread.join()
+            thread.join()  # Returns within the port's 1 s read timeout
+    arduino.close()
+
+    switches = (after.ru_nvcsw - usage.ru_nvcsw) + (after.ru_nivcsw - usage.ru_nivcsw)
+    lat = np.array(latencies or [np.nan]) * 1000
+    extra = f"  reactor wakeups {wakeups / seconds:6.1f}/s ({selector})" if wakeups is not None else ''
+    if conn:
+        gap = np.max(np.diff(arrivals)) * 1000 if len(arrivals) > 1 else np.nan
+        extra += f"  max telemetry gap {gap:6.1f} ms  recovery attempts {recoveries}"
+    print(f"  {design:<8}  cpu {100 * cpu / seconds:5.1f}%  ctx switches {switches / seconds:7.1f}/s"
+          f"  telemetry {len(latencies) / seconds:5.1f}/s  latency p50 {np.percentile(lat, 50):6.2f} ms"
+          f"  p99 {np.percentile(lat, 99):6.2f} ms  scans {scans / seconds:4.1f}/s{extra}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--stall', action='store_true',
+                        help="Silence the LIDAR during each run (use --seconds 40)")
+    parser.add_argument('--eventlet', action='store_true',
+                        help="Monkey-patch the host side like rover_controller")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe()
+    stop = ctx.Event()
+    child = ctx.Process(target=devices, args=(child_conn, stop), daemon=True)
+    child.start()
+    lidar_port, arduino_port = parent_conn.recv()
+
+    if args.eventlet:
+        # After the fork: patches the threading/time/select/selectors
+        # module attributes every module under test looks up at call time
+        import eventlet
+        eventlet.monkey_patch()
+
+    for design in ('polling', 'threads', 'reactor'):
+        run(design, lidar_port, arduino_port, args.seconds, parent_conn if args.stall else None)
+
+    stop.set()
+    child.join(timeout=2.0)
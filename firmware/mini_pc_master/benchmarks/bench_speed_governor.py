@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Speed governor cost: swept-path table build time and memory, and time per
+control tick (one SpeedGovernor.limit() over a 180-bin scan) for a sweep
+of throttle/steering commands in a synthetic room. Also prints the
+throttle cap at a few distances from a wall straight ahead.
+
+    python3 benchmarks/bench_speed_governor.py [--ticks 20000]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from lidar_simulator import Scene
+from speed_governor import SpeedGovernor, SweptPathTable
+from ydlidar_driver import LidarScan, ScanDownsampler
+
+
+def binned_room(wall_ahead_mm: float, num_bins: int):
+    """Room scan with the front wall `wall_ahead_mm` away, as bins"""
+    length = 9000  # Scene x (width_mm) is along LIDAR angle 0
+    scene = Scene.room(width_mm=length, depth_mm=6000, pillars=(),
+                       offset_mm=(length / 2 - wall_ahead_mm, 0))
+    angles = (np.arange(660) * (360.0 / 660)).astype(np.float32)
+    distances, intensities = scene.sample(angles)
+    scan = LidarScan(timestamp=0.0, angles=angles, distances=distances,
+                     intensities=intensities, scan_frequency=6.0)
+    return ScanDownsampler(num_bins).update(scan)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ticks', type=int, default=20000)
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    t0 = time.perf_counter()
+    table = SweptPathTable()
+    t_build = time.perf_counter() - t0
+    governor = SpeedGovernor(table)
+    print(f"table {table.table.shape} {table.table.nbytes / 1e6:.2f} MB, built in {1000 * t_build:.0f} ms")
+
+    binned = binned_room(2500, governor.num_bins)
+    rng = np.random.default_rng(0)
+    commands = np.stack((rng.integers(1, 101, args.ticks), rng.integers(-100, 101, args.ticks)), axis=1)
+    t0 = time.perf_counter()
+    for throttle, steering in commands.tolist():
+        governor.limit(binned, throttle, steering, speed=1.0)
+    elapsed = time.perf_counter() - t0
+    print(f"  limit()  {1e6 * elapsed / args.ticks:6.1f} us/tick"
+          f"  ({100 * elapsed / args.ticks / 0.05:.3f}% of a 50 ms control period)")
+
+    for wall in (4000, 3000, 2000, 1500, 1000, 700, 500):
+        d = governor.limit(binned_room(wall, governor.num_bins), 100, 0, speed=1.0)
+        print(f"  wall {wall / 1000:3.1f} m ahead: free {d.free_distance} m"
+              f"  allowed {d.allowed_speed:4.2f} m/s  throttle cap {d.cap:3d}")
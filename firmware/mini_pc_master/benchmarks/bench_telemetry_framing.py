@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Arduino telemetry, JSON line vs binary frame (telemetry_frame):
+  wire     bytes per frame and the highest frame rate 115200 baud carries
+           (10 bits per byte, nothing else on the link)
+  decode   json.loads of one line vs decode_telemetry of one frame
+  reader   ArduinoReader per frame, a read per frame as at a low rate and
+           a 16-frame backlog per read, through to a no-op "t" handler
+
+Lines are printed the way sendTelemetry() prints them (fixed decimals,
+println's \\r\\n) with changing values, so their length is representative.
+
+    python3 benchmarks/bench_telemetry_framing.py [--frames 20000]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import time
+
+import common  # Import path setup
+from arduino_reader import ArduinoReader
+from telemetry_frame import decode_telemetry, encode_telemetry
+
+BAUD = 115200
+
+
+class MemoryPort(io.BytesIO):
+    """Just enough of serial.Serial for ArduinoReader.read_available()"""
+    is_open = True
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.getbuffer()) - self.tell()
+
+
+def sample_values(rng: random.Random, seq: int) -> dict:
+    return {
+        't_ms': 12_000_000 + 50 * seq,
+        'lat': 37.774929 + rng.uniform(-1e-3, 1e-3),
+        'lng': -122.419416 + rng.uniform(-1e-3, 1e-3),
+        'gps_speed': rng.uniform(0, 12), 'gps_accuracy': rng.randrange(80, 250),
+        'satellites': rng.randrange(5, 13),
+        'heading': rng.uniform(0, 359.9), 'pitch': rng.uniform(-10, 10), 'roll': rng.uniform(-10, 10),
+        'accel': tuple(rng.uniform(-1, 1) for _ in range(3)),
+        'lidar': rng.randrange(30, 1200),
+        'ultrasonic': tuple(rng.randrange(2, 400) for _ in range(5)),
+        'ibus_connected': True,
+        'ibus_channels': tuple(rng.randrange(1000, 2001) for _ in range(10)),
+        'battery': rng.uniform(20, 100),
+    }
+
+
+def json_line(v: dict) -> bytes:
+    """sendTelemetry() output for the same values"""
+    return (
+        f'{{"t":{v["t_ms"]},"gps":{{"lat":{v["lat"]:.6f},"lng":{v["lng"]:.6f},'
+        f'"spd":{v["gps_speed"]:.1f},"acc":{v["gps_accuracy"]},"sat":{v["satellites"]}}},'
+        f'"imu":{{"hdg":{v["heading"]:.1f},"pitch":{v["pitch"]:.1f},"roll":{v["roll"]:.1f},'
+        f'"ax":{v["accel"][0]:.2f},"ay":{v["accel"][1]:.2f},"az":{v["accel"][2]:.2f}}},'
+        f'"lidar":{v["lidar"]},"ultra":[{",".join(map(str, v["ultrasonic"]))}],'
+        f'"ibus":{{"con":true,"ch":[{",".join(map(str, v["ibus_channels"]))}]}},'
+        f'"bat":{v["battery"]:.1f}}}\r\n'
+    ).encode()
+
+
+def reader_cost(frames, per_read: int) -> float:
+    """Process CPU seconds per frame through ArduinoReader"""
+    chunks = [b''.join(frames[i:i + per_read]) for i in range(0, len(frames), per_read)]
+    handled = []
+    reader = ArduinoReader(None, {'t': handled.append})
+    start = time.process_time()
+    for chunk in chunks:
+        reader.serial = MemoryPort(chunk)
+        while reader.read_available():
+            pass
+    elapsed = time.process_time() - start
+    assert len(handled) == len(frames), (len(handled), len(frames))
+    return elapsed / len(frames)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=20000)
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    rng = random.Random(0)
+    values = [sample_values(rng, i) for i in range(args.frames)]
+    lines = [json_line(v) for v in values]
+    frames = [encode_telemetry(i, **v) for i, v in enumerate(values)]
+
+    print(f"{args.frames} frames, 1 core, {BAUD} baud")
+    for name, data in (('json', lines), ('binary', frames)):
+        size = sum(map(len, data)) / len(data)
+        print(f"  {name:6s} wire    {size:6.1f} bytes/frame   max {BAUD / 10 / size:6.1f} Hz")
+
+    t0 = time.perf_counter()
+    for line in lines:
+        json.loads(line)
+    t_json = (time.perf_counter() - t0) / len(lines)
+    t0 = time.perf_counter()
+    for frame in frames:
+        decode_telemetry(frame[1:-1])
+    t_bin = (time.perf_counter() - t0) / len(frames)
+    print(f"  decode  json.loads {1e6 * t_json:5.2f} us   decode_telemetry {1e6 * t_bin:5.2f} us")
+
+    for per_read in (1, 16):
+        j = reader_cost(lines, per_read)
+        b = reader_cost(frames, per_read)
+        print(f"  reader  {per_read:2d} frame(s)/read   json {1e6 * j:5.2f} us/frame"
+              f"   binary {1e6 * b:5.2f} us/frame")
+
+    # Cross-check: both encodings decode to the same telemetry
+    handled = []
+    ArduinoReader(MemoryPort(lines[0] + frames[0]), {'t': handled.append}).read_available()
+    a, b = handled
+    assert abs(a['imu']['hdg'] - b['imu']['hdg']) <= 0.05 and a['ultra'] == b['ultra']
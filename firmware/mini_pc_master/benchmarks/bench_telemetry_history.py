@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Telemetry history cost: add() per frame on the telemetry thread, and
+/api/history-style queries (min/max/mean, at most `points` buckets) over
+windows from a minute to the whole run, against computing the same
+buckets from raw frames with numpy (what a flight recorder scan costs
+before any disk I/O).
+
+    python3 benchmarks/bench_telemetry_history.py [--hours 12]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import common  # Import path setup
+from telemetry_history import TelemetryHistory
+
+HZ = 20.0
+POINTS = 500
+
+
+def raw_buckets(times: np.ndarray, values: np.ndarray, start: float, end: float, width: float):
+    """Same min/max/mean buckets straight from raw frames"""
+    lo, hi = np.searchsorted(times, [start, end + 1e-9])
+    t, v = times[lo:hi], values[lo:hi]
+    idx = ((t - start) // width).astype(np.int64)
+    edges = np.flatnonzero(np.diff(idx)) + 1
+    starts = np.concatenate(([0], edges))
+    return (np.minimum.reduceat(v, starts), np.maximum.reduceat(v, starts),
+            np.add.reduceat(v, starts) / np.diff(np.concatenate((starts, [len(v)])))[:, None])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hours', type=float, default=12.0)
+    args = parser.parse_args()
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    frames = int(args.hours * 3600 * HZ)
+    t0 = 1.8e9
+    rng = np.random.default_rng(0)
+    times = t0 + np.arange(frames) / HZ
+    values = np.column_stack((
+        84.2 - np.arange(frames) * 1e-5,                 # battery
+        (np.arange(frames) * 0.05) % 360,                # heading
+        rng.normal(0.5, 2.0, frames),                    # pitch
+        rng.normal(-0.3, 2.0, frames),                   # roll
+        np.abs(rng.normal(3.4, 0.5, frames)),            # speed
+    ))
+    rows = [tuple(row) for row in values.tolist()]
+    stamps = times.tolist()
+
+    history = TelemetryHistory()
+    start = time.perf_counter()
+    for t, row in zip(stamps, rows):
+        history.add(t, row)
+    t_add = (time.perf_counter() - start) / frames
+    print(f"{frames} frames ({args.hours:g} h at {HZ:g} Hz), {POINTS} points per query, 1 core")
+    print(f"  add()  {1e6 * t_add:5.2f} us/frame on the caller")
+
+    end = times[-1]
+    for window in (60, 600, 3600, 6 * 3600, end - t0):
+        q = []
+        for _ in range(20):
+            q0 = time.perf_counter()
+            result = history.query(end - window, end, None, POINTS)
+            q.append(time.perf_counter() - q0)
+        r = []
+        for _ in range(5):
+            r0 = time.perf_counter()
+            raw_buckets(times, values, end - window, end, result['resolution'])
+            r.append(time.perf_counter() - r0)
+        print(f"  window {window / 60:6.0f} min  {result['count']:4d} x {result['resolution']:4d} s"
+              f"  history {1e3 * np.median(q):6.2f} ms  raw {1e3 * np.median(r):7.2f} ms")
@@ -0,0 +1,41 @@
+"""
+Shared helpers for the Mini PC benchmarks: import path setup and a
+synthetic T-mini Plus byte stream (packets built by lidar_simulator) so
+benchmarks run without hardware.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lidar_simulator import encode_packet
+
+
+def synthetic_stream(revolutions: int = 20, samples_per_packet: int = 40,
+                     packets_per_rev: int = 12, seed: int = 0) -> bytes:
+    """Byte stream of full revolutions over a noisy room-sized scene"""
+    rng = random.Random(seed)
+    span = 360.0 / packets_per_rev
+    out = bytearray()
+    for _ in range(revolutions):
+        for k in range(packets_per_rev):
+            start = k * span
+            end = (start + span * (samples_per_packet - 1) / samples_per_packet) % 360
+            samples = [(rng.randrange(150, 8000), rng.randrange(40, 255))
+                       for _ in range(samples_per_packet)]
+            out += encode_packet(start, end, *zip(*samples))
+    return bytes(out)
+
+
+def timed(fn, *args, repeat: int = 3):
+    """Best-of-`repeat` wall time of fn(*args); returns (seconds, last_result)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Telemetry Flight Recorder
+================================================================================
+Keeps every decoded Arduino telemetry frame on disk, column by column,
+for time-range queries over a whole mission (/api/logs?from=&to=&fields=).
+
+Layout: one directory per segment under the recorder root, named by the
+host time (ms) of its first frame, holding one preallocated .npy file
+per column (np.lib.format.open_memmap: self-describing, np.load(...,
+mmap_mode='r') reads it back). Row i of every column is frame i, so
+rows are fixed width (ROW_BYTES) and a query touches only the pages of
+the columns it asks for.
+
+Time index: `time` (host time.time() on receipt, float64, never
+decreasing) is sorted within a segment and segments don't overlap, so a
+range is an in-memory segment list lookup plus two searchsorted calls
+per overlapping segment - no file is scanned.
+
+Rotation: a segment holds `segment_bytes` worth of rows; when it fills
+a new one starts, and the oldest segments are deleted while the total
+exceeds `max_bytes`. Rows not yet written have time 0, so a segment left
+partly filled by a restart is cut at its first zero when reopened.
+
+record() only appends to a deque; a writer thread copies batches into
+the memory maps every `flush_interval` seconds, so the telemetry thread
+never waits on the disk.
+================================================================================
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# name: (dtype, per-row shape)
+COLUMNS = {
+    'time': ('<f8', ()),              # Host time.time() on receipt
+    't': ('<u4', ()),                 # Mega millis()
+    'lat': ('<f8', ()),
+    'lng': ('<f8', ()),
+    'gps_speed': ('<f4', ()),         # km/h
+    'gps_accuracy': ('<u2', ()),      # HDOP
+    'satellites': ('u1', ()),
+    'heading': ('<f4', ()),
+    'pitch': ('<f4', ()),
+    'roll': ('<f4', ()),
+    'ax': ('<f4', ()),
+    'ay': ('<f4', ()),
+    'az': ('<f4', ()),
+    'lidar': ('<u2', ()),             # TF Mini, cm
+    'ultrasonic': ('<u2', (5,)),      # cm
+    'ibus_connected': ('u1', ()),
+    'ibus_channels': ('<u2', (10,)),  # us
+    'battery': ('<f4', ()),
+}
+FIELDS = tuple(COLUMNS)
+ROW_BYTES = sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for dtype, shape in COLUMNS.values())
+
+SEGMENT_BYTES = 8 * 1024 * 1024   # ~70 min at 20 Hz
+MAX_BYTES = 256 * 1024 * 1024
+FLUSH_INTERVAL = 1.0              # s between writer batches
+SYNC_INTERVAL = 10.0              # s between msyncs of the open segment
+QUERY_LIMIT = 5000                # Rows returned before decimating
+
+
+@dataclass
+class SegmentInfo:
+    path: str
+    capacity: int
+    count: int = 0
+    start: float = 0.0            # First and last row time
+    end: float = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.capacity * ROW_BYTES
+
+    def column(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+
+
+class FlightRecorder:
+    """Columnar, size-rotated on-disk log of telemetry frames with a time index"""
+
+    def __init__(self, root: str, segment_bytes: int = SEGMENT_BYTES,
+                 max_bytes: int = MAX_BYTES, flush_interval: float = FLUSH_INTERVAL):
+        self.root = root
+        self.capacity = max(1, segment_bytes // ROW_BYTES)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(root, exist_ok=True)
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._segments: List[SegmentInfo] = self._scan()
+        self._current: Optional[SegmentInfo] = None
+        self._columns: Dict[str, np.memmap] = {}
+        self._last_time = self._segments[-1].end if self._segments else 0.0
+        self._last_sync = time.time()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self.recorded = 0
+        self.dropped = 0           # Frames with values that don't fit their column
+        self.segments_deleted = 0
+
+    # ----- Writing -----
+
+    def record(self, data: dict, received: Optional[float] = None):
+        """Queue one telemetry dict (JSON line layout); O(1), no disk I/O"""
+        self._pending.append((time.time() if received is None else received, data))
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.flush_interval)
+            self._thread = None
+        self.flush()
+        with self._lock:
+            self._close_current()
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Flight recorder: {e}")
+
+    def flush(self):
+        """Write everything queued so far (writer thread, close and queries)"""
+        with self._lock:
+            pending = self._pending
+            batch = []
+            while pending:
+                batch.append(pending.popleft())
+            if not batch:
+                return
+            rows = self._extract(batch)
+            times = rows['time']
+            written = 0
+            while written < len(times):
+                if self._current is None or self._current.count == self._current.capacity:
+                    self._rotate(float(times[written]))
+                seg = self._current
+                take = min(len(times) - written, seg.capacity - seg.count)
+                for name, column in self._columns.items():
+                    column[seg.count:seg.count + take] = rows[name][written:written + take]
+                if seg.count == 0:
+                    seg.start = float(times[written])
+                seg.end = float(times[written + take - 1])
+                seg.count += take  # Last: queries read [:count]
+                written += take
+            self.recorded += len(times)
+            if time.time() - self._last_sync > SYNC_INTERVAL:
+                for column in self._columns.values():
+                    column.flush()
+                self._last_sync = time.time()
+
+    def _extract(self, batch) -> Dict[str, np.ndarray]:
+        """Column arrays for the frames in `batch` that fit the column types"""
+        n = len(batch)
+        rows = {name: np.zeros((n,) + shape, dtype=dtype) for name, (dtype, shape) in COLUMNS.items()}
+        times, ts, lat, lng = rows['time'], rows['t'], rows['lat'], rows['lng']
+        gps_speed, gps_accuracy, satellites = rows['gps_speed'], rows['gps_accuracy'], rows['satellites']
+        heading, pitch, roll = rows['heading'], rows['pitch'], rows['roll']
+        ax, ay, az = rows['ax'], rows['ay'], rows['az']
+        lidar, ultrasonic, battery = rows['lidar'], rows['ultrasonic'], rows['battery']
+        ibus_connected, ibus_channels = rows['ibus_connected'], rows['ibus_channels']
+        i = 0
+        for received, data in batch:
+            try:
+                gps = data.get('gps') or {}
+                imu = data.get('imu') or {}
+                ibus = data.get('ibus') or {}
+                ts[i] = data.get('t', 0)
+                lat[i] = gps.get('lat', 0)
+                lng[i] = gps.get('lng', 0)
+                gps_speed[i] = gps.get('spd', 0)
+                gps_accuracy[i] = gps.get('acc', 0)
+                satellites[i] = gps.get('sat', 0)
+                heading[i] = imu.get('hdg', 0)
+                pitch[i] = imu.get('pitch', 0)
+                roll[i] = imu.get('roll', 0)
+                ax[i] = imu.get('ax', 0)
+                ay[i] = imu.get('ay', 0)
+                az[i] = imu.get('az', 0)
+                lidar[i] = data.get('lidar', 0)
+                ultrasonic[i] = data.get('ultra', (0,) * 5)
+                ibus_connected[i] = bool(ibus.get('con', False))
+                ibus_channels[i] = ibus.get('ch', (1500,) * 10)
+                battery[i] = data.get('bat', 0)
+            except (TypeError, ValueError, OverflowError, AttributeError):
+                self.dropped += 1
+                continue
+            self._last_time = max(self._last_time, received)  # Keep the index sorted
+            times[i] = self._last_time
+            i += 1
+        return {name: column[:i] for name, column in rows.items()}
+
+    def _rotate(self, first_time: float):
+        self._close_current()
+        path = os.path.join(self.root, f"{int(first_time * 1000):013d}")
+        while os.path.exists(path):
+            path += '_'
+        os.makedirs(path)
+        self._columns = {
+            name: np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode='w+',
+                                            dtype=dtype, shape=(self.capacity,) + shape)
+            for name, (dtype, shape) in COLUMNS.items()
+        }
+        self._current = SegmentInfo(path, self.capacity)
+        self._segments.append(self._current)
+        while len(self._segments) > 1 and sum(s.nbytes for s in self._segments) > self.max_bytes:
+            oldest = self._segments.pop(0)
+            shutil.rmtree(oldest.path, ignore_errors=True)
+            self.segments_deleted += 1
+
+    def _close_current(self):
+        for column in self._columns.values():
+            column.flush()
+        self._columns = {}
+        self._current = None
+
+    def _scan(self) -> List[SegmentInfo]:
+        """Index the segments already on disk (oldest first)"""
+        segments = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            try:
+                times = np.load(os.path.join(path, 'time.npy'), mmap_mode='r')
+            except (OSError, ValueError):
+                continue
+            zeros = np.flatnonzero(times == 0)
+            count = int(zeros[0]) if len(zeros) else len(times)
+            if count == 0:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            segments.append(SegmentInfo(path, len(times), count, float(times[0]), float(times[count - 1])))
+        return segments
+
+    # ----- Queries -----
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              fields: Optional[Sequence[str]] = None, limit: int = QUERY_LIMIT) -> dict:
+        """
+        Rows with start <= time <= end (host epoch seconds), `fields`
+        columns plus time. More than `limit` rows are decimated to every
+        step-th row. Raises ValueError for an unknown field.
+        """
+        fields = list(fields) if fields else list(FIELDS)
+        unknown = [f for f in fields if f not in COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+        if 'time' not in fields:
+            fields.insert(0, 'time')
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+
+        self.flush()
+        with self._lock:
+            segments = [SegmentInfo(s.path, s.capacity, s.count, s.start, s.end)
+                        for s in self._segments if s.count and s.end >= start and s.start <= end]
+            current = self._current.path if self._current is not None else None
+            open_columns = dict(self._columns)
+
+        parts = {name: [] for name in fields}
+        for seg in segments:
+            try:
+                columns = open_columns if seg.path == current else None
+                times = (columns['time'] if columns else seg.column('time'))[:seg.count]
+                i0 = int(np.searchsorted(times, start, 'left'))
+                i1 = int(np.searchsorted(times, end, 'right'))
+                if i1 <= i0:
+                    continue
+                for name in fields:
+                    column = columns[name] if columns else seg.column(name)
+                    parts[name].append(np.array(column[i0:i1]))
+            except (OSError, ValueError):
+                continue  # Rotated away while we were reading
+
+        count = sum(len(p) for p in parts['time'])
+        step = max(1, -(-count // limit)) if limit else 1
+        out = {}
+        for name in fields:
+            dtype, shape = COLUMNS[name]
+            column = np.concatenate(parts[name]) if parts[name] else np.zeros((0,) + shape, dtype=dtype)
+            out[name] = column[::step]
+        return {'count': count, 'step': step, 'fields': out}
+
+    @staticmethod
+    def to_lists(columns: Dict[str, np.ndarray]) -> Dict[str, list]:
+        """query() columns for JSON: float32 columns rounded so they print short"""
+        out = {}
+        for name, column in columns.items():
+            if column.dtype == np.float32:
+                column = column.astype(np.float64).round(4)
+            elif name == 'time':
+                column = column.round(3)
+            out[name] = column.tolist()
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            segments = list(self._segments)
+        return {
+            'root': self.root,
+            'recorded': self.recorded,
+            'pending': len(self._pending),
+            'dropped': self.dropped,
+            'segments': len(segments),
+            'segments_deleted': self.segments_deleted,
+            'bytes': sum(s.nbytes for s in segments),
+            'max_bytes': self.max_bytes,
+            'rows': sum(s.count for s in segments),
+            'from': segments[0].start if segments else None,
+            'to': segments[-1].end if segments else None,
+        }
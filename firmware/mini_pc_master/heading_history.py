@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Heading History
+================================================================================
+Compass headings from IMU telemetry, unwrapped (continuous degrees, so a
+turn from 359 to 1 is +2, not -358) and kept in a time-indexed ring for
+interpolated lookups. Shared by the telemetry model (RoverState feeds
+it), LIDAR de-skew (ScanDeskewer reads it) and the telemetry history
+aggregates, which use the same unwrap.
+================================================================================
+"""
+
+import threading
+
+import numpy as np
+
+
+def unwrap_heading(last: float, heading: float) -> float:
+    """`heading` (0-360) moved to within 180 degrees of the unwrapped `last`"""
+    return last + ((heading - last + 180.0) % 360.0 - 180.0)
+
+
+class HeadingHistory:
+    """
+    Time-indexed ring of compass headings for interpolated lookups.
+
+    Headings are unwrapped (continuous degrees) so interpolation across
+    north is correct. Every sample is written twice, `capacity` apart, so
+    the latest `capacity` samples are always one contiguous slice.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._times = np.zeros(2 * capacity, dtype=np.float64)
+        self._headings = np.zeros(2 * capacity, dtype=np.float64)
+        self._next = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, heading: float):
+        with self._lock:
+            if self.count:
+                heading = unwrap_heading(self._headings[(self._next - 1) % self.capacity], heading)
+            i = self._next
+            self._times[i] = self._times[i + self.capacity] = timestamp
+            self._headings[i] = self._headings[i + self.capacity] = heading
+            self._next = (i + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    @property
+    def latest_time(self) -> float:
+        with self._lock:
+            return float(self._times[(self._next - 1) % self.capacity]) if self.count else 0.0
+
+    def clear(self):
+        with self._lock:
+            self.count = 0
+            self._next = 0
+
+    def at(self, times) -> np.ndarray:
+        """Unwrapped headings at `times`, linearly interpolated (clamped at the ends)"""
+        with self._lock:
+            if not self.count:
+                return np.zeros(np.shape(times))
+            end = self._next + self.capacity
+            start = end - self.count
+            return np.interp(times, self._times[start:end], self._headings[start:end])
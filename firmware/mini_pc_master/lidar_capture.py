@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+LIDAR Raw Serial Capture & Replay
+================================================================================
+Records the raw T-mini Plus byte stream with read timestamps, and replays
+a capture into YDLidarDriver in place of a serial.Serial - at recorded
+speed or as fast as possible - for offline profiling, reproducing
+recovery glitches and throughput benchmarks without a sensor.
+
+File layout (little-endian):
+
+    header   8s magic 'YDLCAP01', uint32 baudrate, uint32 reserved
+    record   float64 time.time() of the read, uint32 length, <length> bytes
+
+Usage:
+    python3 lidar_capture.py record out.ydlcap [--port /dev/ttyUSB1] [--seconds 60]
+    python3 lidar_capture.py info capture.ydlcap
+================================================================================
+"""
+
+import bisect
+import mmap
+import struct
+import time
+from typing import Optional
+
+MAGIC = b'YDLCAP01'
+FILE_HEADER = struct.Struct('<8sII')
+RECORD_HEADER = struct.Struct('<dI')
+
+
+class CaptureWriter:
+    """Appends timestamped serial reads to a capture file"""
+
+    def __init__(self, path: str, baudrate: int = 230400):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, baudrate, 0))
+        self.bytes_written = 0
+        self.records = 0
+
+    def write(self, data, timestamp: Optional[float] = None):
+        """Record one read (`data` may be a memoryview into a ring buffer)"""
+        if not len(data):
+            return
+        self._file.write(RECORD_HEADER.pack(time.time() if timestamp is None else timestamp, len(data)))
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self.records += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CaptureReplay:
+    """
+    Serial-like source over a memory-mapped capture file.
+
+    Implements the subset of serial.Serial that YDLidarDriver uses.
+    With `realtime=True` bytes become readable at their recorded time
+    (scaled by `speed`); otherwise the whole capture is readable at once.
+    Commands written by the driver are recorded in `commands` and
+    otherwise ignored.
+    """
+
+    def __init__(self, path: str, realtime: bool = True, speed: float = 1.0,
+                 timeout: float = 1.0, loop: bool = False):
+        self.path = path
+        self.port = f"replay:{path}"
+        self.realtime = realtime
+        self.speed = speed
+        self.timeout = timeout
+        self.loop = loop
+        self.dtr = False
+        self.rts = False
+        self.commands = []
+
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, self.baudrate, _ = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a LIDAR capture file")
+
+        # Record index: payload offset in file, capture time, cumulative payload end
+        self._offsets = []
+        self._times = []
+        self._ends = []
+        pos = FILE_HEADER.size
+        total = 0
+        while pos + RECORD_HEADER.size <= len(self._mm):
+            ts, length = RECORD_HEADER.unpack_from(self._mm, pos)
+            pos += RECORD_HEADER.size
+            if pos + length > len(self._mm):
+                break  # Truncated final record
+            self._offsets.append(pos)
+            self._times.append(ts)
+            total += length
+            self._ends.append(total)
+            pos += length
+        self.total_bytes = total
+        self.duration = self._times[-1] - self._times[0] if self._times else 0.0
+
+        self._pos = 0  # Bytes of payload already read
+        self._clock_start = None
+        self.is_open = True
+
+    @property
+    def exhausted(self) -> bool:
+        return self._pos >= self.total_bytes and not self.loop
+
+    def _available_end(self) -> int:
+        """Payload bytes that have 'arrived' by now"""
+        if not self._ends:
+            return 0
+        if not self.realtime:
+            return self.total_bytes
+        if self._clock_start is None:
+            self._clock_start = time.monotonic()
+        elapsed = (time.monotonic() - self._clock_start) * self.speed
+        idx = bisect.bisect_right(self._times, self._times[0] + elapsed)
+        return self._ends[idx - 1] if idx else 0
+
+    def _next_arrival(self) -> Optional[float]:
+        """Seconds until the record after the current position arrives"""
+        idx = bisect.bisect_right(self._ends, self._pos)
+        if idx >= len(self._times):
+            return None
+        elapsed = (time.monotonic() - self._clock_start) * self.speed
+        return max(0.0, (self._times[idx] - self._times[0] - elapsed) / self.speed)
+
+    @property
+    def in_waiting(self) -> int:
+        return max(0, self._available_end() - self._pos)
+
+    def readinto(self, buffer) -> int:
+        """Copy up to len(buffer) available bytes, waiting up to `timeout` for data"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if self._pos >= self.total_bytes and self.loop and self.total_bytes:
+                self._pos = 0
+                self._clock_start = None
+            available = self._available_end() - self._pos
+            if available > 0 or not self.is_open:
+                break
+            wait = self._next_arrival() if self.realtime and self._clock_start is not None else None
+            remaining = deadline - time.monotonic()
+            if wait is None or remaining <= 0:
+                if wait is None and self.timeout:
+                    time.sleep(min(self.timeout, 0.05))
+                return 0
+            time.sleep(min(wait, remaining))
+
+        size = min(len(buffer), available)
+        out = memoryview(buffer)
+        copied = 0
+        idx = bisect.bisect_right(self._ends, self._pos)
+        while copied < size:
+            rec_start = self._ends[idx - 1] if idx else 0
+            within = self._pos - rec_start
+            n = min(size - copied, self._ends[idx] - self._pos)
+            src = self._offsets[idx] + within
+            out[copied:copied + n] = self._view[src:src + n]
+            copied += n
+            self._pos += n
+            idx += 1
+        return copied
+
+    def read(self, size: int = 1) -> bytes:
+        buffer = bytearray(size)
+        n = self.readinto(buffer)
+        return bytes(buffer[:n])
+
+    def write(self, data) -> int:
+        self.commands.append(bytes(data))
+        return len(data)
+
+    def reset_input_buffer(self):
+        # Like a real port, drop bytes that arrived but were not read yet.
+        # In as-fast-as-possible mode nothing is dropped, since the whole
+        # capture counts as arrived.
+        if self.realtime:
+            self._pos = max(self._pos, self._available_end())
+
+    def reset_output_buffer(self):
+        pass
+
+    def open(self):
+        """Reopen after close() (recovery); replay continues where it stopped"""
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def release(self):
+        """Unmap the capture file"""
+        self.is_open = False
+        self._view.release()
+        self._mm.close()
+        self._file.close()
+
+
+def read_scans(path: str) -> list:
+    """
+    Decode a capture into LidarScans, one per revolution (split on the
+    angle wrap like YDLidarDriver; timestamps are the capture read times)
+    """
+    from ydlidar_driver import ScanAccumulator, decode_packets_vectorized
+
+    replay = CaptureReplay(path, realtime=False, timeout=0)
+    times = replay._times
+    ends = replay._ends
+    data = replay.read(replay.total_bytes)
+    replay.release()
+
+    scans = []
+    current = ScanAccumulator()
+    last_end_angle = 0.0
+    pos = 0
+    for record, end in enumerate(ends):
+        # One record at a time, so each scan gets the time its last bytes were read
+        pos, packets = decode_packets_vectorized(data, pos, end)
+        for end_angle, angles, distances, intensities in packets:
+            if end_angle < last_end_angle and end_angle < 90 and last_end_angle > 270 and len(current):
+                scans.append(current.take(times[record], 0.0, len(scans) + 1))
+                current.clear()
+            current.extend(angles, distances, intensities)
+            last_end_angle = end_angle
+    for prev, scan in zip(scans, scans[1:]):
+        dt = scan.timestamp - prev.timestamp
+        scan.scan_frequency = 1.0 / dt if dt > 0 else 0.0
+    return scans
+
+
+def capture_info(path: str) -> dict:
+    replay = CaptureReplay(path, realtime=False)
+    info = {
+        'path': path,
+        'baudrate': replay.baudrate,
+        'records': len(replay._times),
+        'bytes': replay.total_bytes,
+        'duration': replay.duration,
+        'rate': replay.total_bytes / replay.duration if replay.duration else 0,
+    }
+    replay.release()
+    return info
+
+
+if __name__ == '__main__':
+    import argparse
+    from ydlidar_driver import YDLidarDriver, find_lidar_port
+
+    parser = argparse.ArgumentParser(description='Record or inspect raw YDLIDAR captures')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help='record the raw serial stream')
+    rec.add_argument('path')
+    rec.add_argument('--port', default=None)
+    rec.add_argument('--seconds', type=float, default=60.0)
+    inf = sub.add_parser('info', help='summarize a capture file')
+    inf.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        port = args.port or find_lidar_port() or '/dev/ttyUSB1'
+        lidar = YDLidarDriver(port)
+        lidar.start_capture(args.path)
+        if lidar.connect():
+            print(f"[CAPTURE] Recording {port} to {args.path} for {args.seconds:.0f}s...")
+            try:
+                time.sleep(args.seconds)
+            except KeyboardInterrupt:
+                pass
+        lidar.disconnect()
+        lidar.stop_capture()
+    else:
+        for key, value in capture_info(args.path).items():
+            print(f"{key:>9}: {value}")
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Virtual YDLIDAR T-mini Plus
+================================================================================
+Emulates the sensor behind a pseudo-terminal so YDLidarDriver and
+rover_controller can run, be load-tested and be pushed through recovery
+without hardware:
+
+    A5 60  start scan    -> A5 5A 05 00 00 40 81, then AA 55 packets
+    A5 65  stop          -> silence
+    A5 92  health        -> A5 5A 03 00 00 00 06 + status 00 00 00
+    A5 40  soft reboot   -> silent for `reboot_time`, then idle
+
+Packets are checksummed like the real device and paced by both the
+rotation rate and the wire rate of `baudrate`. Each revolution starts with
+a one-sample zero packet (CT bit 0 set, CT bits 7:1 = frequency in 0.1 Hz).
+The scene is a synthetic room or a revolution taken from a recorded scan
+or capture file. Faults: random packet drops and bad checksums, timed
+dropouts, and stalls that only clear on a given command.
+
+Usage:
+    python3 lidar_simulator.py [--hz 6] [--points 660] [--baud 230400]
+                               [--capture field.ydlcap] [--corrupt 0.01]
+    LIDAR_PORT=/dev/pts/N python3 rover_controller.py
+================================================================================
+"""
+
+import collections
+import math
+import os
+import random
+import select
+import threading
+import time
+import tty
+from typing import Optional
+
+import numpy as np
+
+PACKET_SYNC = b'\xaa\x55'
+MAX_RANGE_MM = 12000
+
+CMD_START_SCAN = b'\xa5\x60'
+CMD_STOP = b'\xa5\x65'
+CMD_HEALTH = b'\xa5\x92'
+CMD_SOFT_REBOOT = b'\xa5\x40'
+
+RESPONSE_START_SCAN = b'\xa5\x5a\x05\x00\x00\x40\x81'
+RESPONSE_HEALTH = b'\xa5\x5a\x03\x00\x00\x00\x06' + b'\x00\x00\x00'
+
+SAMPLE_DTYPE = np.dtype([('distance', '<u2'), ('intensity', 'u1')])
+
+
+def encode_packet(start_angle: float, end_angle: float, distances, intensities,
+                  ct: int = 0) -> bytes:
+    """Build one checksummed AA 55 packet"""
+    samples = np.empty(len(distances), dtype=SAMPLE_DTYPE)
+    samples['distance'] = distances
+    samples['intensity'] = intensities
+    lsn = len(samples)
+    fsa = (int(start_angle * 64) << 1) | 1
+    lsa = (int(end_angle * 64) << 1) | 1
+    cs = 0x55AA ^ (ct | (lsn << 8)) ^ fsa ^ lsa
+    if lsn:
+        cs ^= int(np.bitwise_xor.reduce(samples['distance']))
+    return (PACKET_SYNC + bytes((ct, lsn))
+            + fsa.to_bytes(2, 'little') + lsa.to_bytes(2, 'little') + cs.to_bytes(2, 'little')
+            + samples.tobytes())
+
+
+class Scene:
+    """Range and intensity around the sensor, looked up by nearest angle"""
+
+    def __init__(self, angles, distances, intensities=None):
+        order = np.argsort(angles)
+        self.angles = np.asarray(angles, dtype=np.float64)[order]
+        self.distances = np.asarray(distances, dtype=np.uint16)[order]
+        if intensities is None:
+            intensities = np.full(len(order), 120)
+        self.intensities = np.asarray(intensities, dtype=np.uint8)[order]
+
+    def sample(self, angles: np.ndarray):
+        """(distances, intensities) at `angles` degrees"""
+        if not len(self.angles):
+            return np.zeros(len(angles), np.uint16), np.zeros(len(angles), np.uint8)
+        right = np.searchsorted(self.angles, angles) % len(self.angles)
+        left = right - 1
+        gap_right = (self.angles[right] - angles) % 360
+        gap_left = (angles - self.angles[left]) % 360
+        idx = np.where(gap_left < gap_right, left, right)
+        return self.distances[idx], self.intensities[idx]
+
+    @classmethod
+    def room(cls, width_mm: float = 6000, depth_mm: float = 4000,
+             offset_mm=(500, -300), pillars=((1500, 800, 250), (-1800, -900, 150)),
+             resolution: float = 0.1) -> 'Scene':
+        """Rectangular room with round pillars (x, y, radius); sensor at origin"""
+        angles = np.arange(0, 360, resolution)
+        theta = np.radians(angles)
+        dx, dy = np.cos(theta), np.sin(theta)
+        ox, oy = offset_mm
+        with np.errstate(divide='ignore'):
+            tx = np.where(dx > 0, (width_mm / 2 - ox) / dx, (-width_mm / 2 - ox) / dx)
+            ty = np.where(dy > 0, (depth_mm / 2 - oy) / dy, (-depth_mm / 2 - oy) / dy)
+        dist = np.minimum(np.abs(tx), np.abs(ty))
+        intensity = np.full(len(angles), 100)
+        for px, py, r in pillars:
+            # Ray/circle intersection: t^2 - 2 t (d.p) + |p|^2 - r^2 = 0
+            b = dx * px + dy * py
+            disc = b * b - (px * px + py * py - r * r)
+            hit = (disc >= 0) & (b > 0)
+            t = b - np.sqrt(np.where(hit, disc, 0))
+            closer = hit & (t < dist)
+            dist = np.where(closer, t, dist)
+            intensity = np.where(closer, 200, intensity)
+        dist = np.where(dist < MAX_RANGE_MM, dist, 0)
+        return cls(angles, dist, intensity)
+
+    @classmethod
+    def from_scan(cls, scan) -> 'Scene':
+        """Scene from a recorded LidarScan"""
+        return cls(scan.angles, scan.distances, scan.intensities)
+
+    @classmethod
+    def from_capture(cls, path: str, revolution: int = 1) -> 'Scene':
+        """Scene from one full revolution of a raw capture (lidar_capture.py)"""
+        from lidar_capture import read_scans
+
+        scans = read_scans(path)
+        if not scans:
+            raise ValueError(f"{path} contains no LIDAR revolutions")
+        # The first revolution is usually partial
+        return cls.from_scan(scans[min(revolution, len(scans) - 1)])
+
+
+class VirtualLidar:
+    """
+    T-mini Plus emulator on a pseudo-terminal; `port` is the path to open.
+
+    Counters (`packets_sent`, `packets_dropped`, `packets_corrupted`,
+    `overflow_bytes`, `revolutions`) and the received `commands` can be
+    inspected while it runs. `revolution_times` holds the time.time() at
+    which the last packet of each recent revolution was written, for
+    measuring scan latency downstream.
+    """
+
+    def __init__(self, scene: Optional[Scene] = None, scan_hz: float = 6.0,
+                 points_per_rev: int = 660, samples_per_packet: int = 40,
+                 baudrate: int = 230400, noise_mm: float = 5.0,
+                 corrupt_rate: float = 0.0, drop_rate: float = 0.0,
+                 reboot_time: float = 1.0, autostart: bool = False,
+                 seed: Optional[int] = None):
+        self.scene = scene or Scene.room()
+        self.scan_hz = scan_hz
+        self.points_per_rev = points_per_rev
+        self.samples_per_packet = max(1, min(samples_per_packet, 255))
+        self.baudrate = baudrate
+        self.noise_mm = noise_mm
+        self.corrupt_rate = corrupt_rate
+        self.drop_rate = drop_rate
+        self.reboot_time = reboot_time
+        self.autostart = autostart
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed)
+
+        self.port: Optional[str] = None
+        self.scanning = False
+        self.running = False
+        self.commands = collections.deque(maxlen=256)
+        self.revolution_times = collections.deque(maxlen=256)
+        self.packets_sent = 0
+        self.packets_dropped = 0
+        self.packets_corrupted = 0
+        self.bytes_sent = 0
+        self.overflow_bytes = 0
+        self.revolutions = 0
+
+        self._master = None
+        self._slave = None
+        self._thread: Optional[threading.Thread] = None
+        self._cmd_buffer = bytearray()
+        self._queue = collections.deque()  # Packets of the revolution being sent
+        self._next_due = 0.0
+        self._silent_until = 0.0
+        self._rebooting_until = 0.0
+        self._stall_clear_on = None
+        self._stalled = False
+
+    # ----- lifecycle -----
+
+    def open(self) -> str:
+        """Create the pty and start emulating; returns the port path"""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self.scanning = self.autostart
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def close(self):
+        self.running = False
+        if self._thread:
+            self._thread.join()
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self) -> 'VirtualLidar':
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- fault injection -----
+
+    def dropout(self, seconds: float):
+        """Stop sending data for `seconds`; the device recovers on its own"""
+        self._silent_until = time.monotonic() + seconds
+
+    def stall(self, clear_on: Optional[bytes] = CMD_SOFT_REBOOT):
+        """
+        Wedge the device: no data and no replies until `clear_on` is received
+        (CMD_START_SCAN, CMD_SOFT_REBOOT) or, with None, until clear_faults().
+        """
+        self._stall_clear_on = clear_on
+        self._stalled = True
+
+    def clear_faults(self):
+        self._stalled = False
+        self._silent_until = 0.0
+        self.corrupt_rate = 0.0
+        self.drop_rate = 0.0
+
+    # ----- timing -----
+
+    @property
+    def effective_scan_hz(self) -> float:
+        """Revolutions per second once the baud rate limit is applied"""
+        points_per_sec = self.points_per_rev * self.scan_hz
+        packets = math.ceil((self.points_per_rev - 1) / self.samples_per_packet) + 1
+        rev_bytes = 10 * packets + 3 * self.points_per_rev
+        wire_hz = self.baudrate / 10 / rev_bytes
+        return min(self.scan_hz, wire_hz) if points_per_sec else 0.0
+
+    def scan_latency(self, timestamp: float) -> Optional[float]:
+        """Seconds from the end of the latest revolution sent before `timestamp`"""
+        for sent in reversed(self.revolution_times):
+            if sent <= timestamp:
+                return timestamp - sent
+        return None
+
+    # ----- emulation -----
+
+    def _run(self):
+        while self.running:
+            now = time.monotonic()
+            wait = 0.05
+            if self._streaming(now):
+                wait = max(0.0, min(wait, self._next_due - now))
+            readable, _, _ = select.select([self._master], [], [], wait)
+            if readable:
+                try:
+                    data = os.read(self._master, 256)
+                except (BlockingIOError, OSError):
+                    data = b''
+                if data:
+                    self._handle_input(data)
+
+            now = time.monotonic()
+            if self._streaming(now):
+                self._emit_due(now)
+
+    def _streaming(self, now: float) -> bool:
+        return (self.scanning and not self._stalled
+                and now >= self._silent_until and now >= self._rebooting_until)
+
+    def _handle_input(self, data: bytes):
+        buf = self._cmd_buffer
+        buf += data
+        while len(buf) >= 2:
+            idx = buf.find(b'\xa5')
+            if idx == -1:
+                buf.clear()
+                break
+            del buf[:idx]
+            if len(buf) < 2:
+                break
+            command = bytes(buf[:2])
+            del buf[:2]
+            self.commands.append(command)
+            self._handle_command(command)
+
+    def _handle_command(self, command: bytes):
+        now = time.monotonic()
+        if now < self._rebooting_until:
+            return
+        if self._stalled:
+            if command != self._stall_clear_on:
+                return
+            self._stalled = False
+
+        if command == CMD_START_SCAN:
+            self._write(RESPONSE_START_SCAN)
+            self.scanning = True
+            self._queue.clear()
+            self._next_due = now
+        elif command == CMD_STOP:
+            self.scanning = False
+            self._queue.clear()
+        elif command == CMD_HEALTH:
+            self._write(RESPONSE_HEALTH)
+        elif command == CMD_SOFT_REBOOT:
+            self.scanning = False
+            self._queue.clear()
+            self._rebooting_until = now + self.reboot_time
+
+    def _write(self, data: bytes) -> int:
+        try:
+            n = os.write(self._master, data)
+        except BlockingIOError:
+            n = 0
+        # Host not reading fast enough: the rest is lost, like a UART overrun
+        self.overflow_bytes += len(data) - n
+        return n
+
+    def _revolution(self):
+        """Packets for the next revolution"""
+        n = max(2, self.points_per_rev)
+        angles = np.arange(n) * (360.0 / n)
+        distances, intensities = self.scene.sample(angles)
+        distances = distances.astype(np.float64)
+        if self.noise_mm:
+            noise = self._np_rng.normal(0, self.noise_mm, n)
+            distances = np.where(distances > 0, distances + noise, 0)
+        distances = np.clip(distances, 0, MAX_RANGE_MM - 1).astype(np.uint16)
+
+        freq = min(int(round(self.scan_hz * 10)), 0x7F)
+        packets = [encode_packet(0.0, 0.0, distances[:1], intensities[:1], ct=(freq << 1) | 1)]
+        spp = self.samples_per_packet
+        for i in range(1, n, spp):
+            j = min(i + spp, n)
+            packets.append(encode_packet(angles[i], angles[j - 1],
+                                         distances[i:j], intensities[i:j]))
+        return packets
+
+    def _emit_due(self, now: float):
+        if now - self._next_due > 0.1:
+            self._next_due = now  # Fell behind (e.g. after a pause) - don't burst
+        point_time = 1.0 / (self.points_per_rev * self.scan_hz)
+        while self._next_due <= now:
+            if not self._queue:
+                self._queue.extend(self._revolution())
+            packet = self._queue.popleft()
+            self._next_due += max((packet[3] or 1) * point_time,
+                                  len(packet) * 10.0 / self.baudrate)
+
+            if self._rng.random() < self.drop_rate:
+                self.packets_dropped += 1
+            else:
+                if self._rng.random() < self.corrupt_rate:
+                    packet = bytearray(packet)
+                    packet[8] ^= 0xFF
+                    self.packets_corrupted += 1
+                self.bytes_sent += self._write(packet)
+                self.packets_sent += 1
+
+            if not self._queue:
+                self.revolutions += 1
+                self.revolution_times.append(time.time())
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Virtual YDLIDAR T-mini Plus on a pty')
+    parser.add_argument('--hz', type=float, default=6.0, help='scan frequency')
+    parser.add_argument('--points', type=int, default=660, help='points per revolution')
+    parser.add_argument('--samples', type=int, default=40, help='samples per packet')
+    parser.add_argument('--baud', type=int, default=230400)
+    parser.add_argument('--noise', type=float, default=5.0, help='range noise, mm')
+    parser.add_argument('--capture', help='take the scene from a capture file')
+    parser.add_argument('--corrupt', type=float, default=0.0, help='bad checksum probability')
+    parser.add_argument('--drop', type=float, default=0.0, help='dropped packet probability')
+    parser.add_argument('--autostart', action='store_true', help='stream without waiting for A5 60')
+    parser.add_argument('--stall-at', type=float, help='stall after this many seconds')
+    parser.add_argument('--stall-clear', choices=['start', 'reboot', 'never'], default='reboot')
+    parser.add_argument('--dropout-at', type=float, help='drop out after this many seconds')
+    parser.add_argument('--dropout-for', type=float, default=8.0)
+    args = parser.parse_args()
+
+    sim = VirtualLidar(
+        scene=Scene.from_capture(args.capture) if args.capture else None,
+        scan_hz=args.hz, points_per_rev=args.points, samples_per_packet=args.samples,
+        baudrate=args.baud, noise_mm=args.noise, corrupt_rate=args.corrupt,
+        drop_rate=args.drop, autostart=args.autostart
+    )
+    port = sim.open()
+    print(f"[SIM] Virtual T-mini Plus on {port} "
+          f"({args.points} pts @ {sim.effective_scan_hz:.1f} Hz, {args.baud} baud)")
+    print(f"[SIM] LIDAR_PORT={port} python3 rover_controller.py")
+
+    start = time.monotonic()
+    faults = []
+    if args.stall_at is not None:
+        clear_on = {'start': CMD_START_SCAN, 'reboot': CMD_SOFT_REBOOT, 'never': None}[args.stall_clear]
+        faults.append((args.stall_at, f"stall until {args.stall_clear}", lambda: sim.stall(clear_on)))
+    if args.dropout_at is not None:
+        faults.append((args.dropout_at, f"dropout for {args.dropout_for:.0f}s",
+                       lambda: sim.dropout(args.dropout_for)))
+    faults.sort(key=lambda f: f[0])
+
+    try:
+        last_report = start
+        while True:
+            time.sleep(0.1)
+            now = time.monotonic()
+            while faults and now - start >= faults[0][0]:
+                _, label, inject = faults.pop(0)
+                print(f"[SIM] Injecting {label}")
+                inject()
+            if now - last_report >= 5.0:
+                last_report = now
+                print(f"[SIM] {'scanning' if sim.scanning else 'idle'}: {sim.revolutions} revs, "
+                      f"{sim.packets_sent} packets, {sim.bytes_sent} bytes, "
+                      f"{sim.packets_corrupted} corrupted, {sim.packets_dropped} dropped, "
+                      f"{sim.overflow_bytes} overflowed, "
+                      f"last cmds {[c.hex() for c in list(sim.commands)[-4:]]}")
+    except KeyboardInterrupt:
+        pass
+    sim.close()
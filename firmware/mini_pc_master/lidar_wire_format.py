@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+LIDAR Binary Wire Format
+================================================================================
+Compact scan encoding for WebSocket, Socket.IO and REST clients.
+
+All fields little-endian. Every frame starts with a 22-byte header:
+
+    offset  size  field
+    0       2     magic 'LS'
+    2       1     version (1)
+    3       1     kind (KIND_SCAN / KIND_KEYFRAME / KIND_DELTA)
+    4       2     flags (bit 0: LIDAR connected)
+    6       2     count N (points, bins or changed bins - see kind)
+    8       2     scan frequency, 0.1 Hz units
+    10      4     sequence number (scan seq; stream seq in keyframe/delta streams)
+    14      8     scan timestamp, ms since epoch
+
+KIND_SCAN payload (5 bytes per point, column-wise):
+
+    N x uint16  angle, 0.01 degree units (0-35999)
+    N x uint16  distance, mm
+    N x uint8   intensity
+
+KIND_KEYFRAME payload - min range of N fixed angular bins, bin i covering
+[i, i+1) * 360/N degrees, 0 = no return (also used on its own for binned
+scans, see encode_bins):
+
+    N x uint16  distance, mm
+
+KIND_DELTA payload - only bins that moved by more than the stream threshold
+since the client's current view; applies to the frame with seq - 1:
+
+    N x uint16  bin index
+    N x uint16  distance, mm
+
+A client that sees a gap in delta sequence numbers must ask for a resync
+and drop deltas until the next keyframe.
+
+decode_frame() and DeltaDecoder are the reference decoders; they use only
+`struct` so they can be ported line for line to the dashboard or the
+Android app.
+================================================================================
+"""
+
+import struct
+
+import numpy as np
+
+MAGIC = b'LS'
+VERSION = 1
+
+KIND_SCAN = 0
+KIND_KEYFRAME = 1
+KIND_DELTA = 2
+
+FLAG_CONNECTED = 0x0001
+
+HEADER = struct.Struct('<2sBBHHHIQ')
+ANGLE_SCALE = 100  # 0.01 degree per unit
+ANGLE_UNITS = 360 * ANGLE_SCALE
+
+
+def quantize_angles(angles) -> np.ndarray:
+    """Degrees -> uint16 angle units"""
+    q = np.rint(np.asarray(angles, dtype=np.float64) * ANGLE_SCALE).astype(np.int64)
+    return (q % ANGLE_UNITS).astype(np.uint16)
+
+
+def encode_header(kind: int, count: int, seq: int, timestamp: float,
+                  frequency: float = 0.0, connected: bool = True) -> bytes:
+    return HEADER.pack(
+        MAGIC, VERSION, kind,
+        FLAG_CONNECTED if connected else 0,
+        count,
+        min(int(round(frequency * 10)), 0xFFFF),
+        seq & 0xFFFFFFFF,
+        int(timestamp * 1000)
+    )
+
+
+def encode_scan(scan, seq: int = 0, connected: bool = True) -> bytes:
+    """Encode a LidarScan as a KIND_SCAN frame"""
+    count = len(scan.distances)
+    return b''.join((
+        encode_header(KIND_SCAN, count, seq, scan.timestamp, scan.scan_frequency, connected),
+        quantize_angles(scan.angles).astype('<u2').tobytes(),
+        np.asarray(scan.distances, dtype='<u2').tobytes(),
+        np.asarray(scan.intensities, dtype=np.uint8).tobytes(),
+    ))
+
+
+def encode_bins(binned, connected: bool = True) -> bytes:
+    """Encode a BinnedScan as a standalone KIND_KEYFRAME frame (scan seq)"""
+    return b''.join((
+        encode_header(KIND_KEYFRAME, binned.num_bins, binned.seq, binned.timestamp,
+                      binned.scan_frequency, connected),
+        np.asarray(binned.distances, dtype='<u2').tobytes(),
+    ))
+
+
+def decode_header(data: bytes) -> dict:
+    magic, version, kind, flags, count, freq, seq, ts_ms = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"bad magic {magic!r}")
+    if version != VERSION:
+        raise ValueError(f"unsupported version {version}")
+    return {
+        'kind': kind,
+        'connected': bool(flags & FLAG_CONNECTED),
+        'count': count,
+        'frequency': freq / 10.0,
+        'seq': seq,
+        'timestamp': ts_ms,
+    }
+
+
+def decode_frame(data: bytes) -> dict:
+    """
+    Reference decoder. KIND_SCAN frames return the same shape as
+    YDLidarDriver.get_scan_dict() (angles at 0.01 degree resolution);
+    keyframes add 'bins', deltas add 'indices' and 'distances'. All frames
+    carry 'kind' and 'seq'.
+    """
+    frame = decode_header(data)
+    n = frame['count']
+    offset = HEADER.size
+
+    if frame['kind'] == KIND_SCAN:
+        angles = struct.unpack_from(f'<{n}H', data, offset)
+        offset += 2 * n
+        distances = struct.unpack_from(f'<{n}H', data, offset)
+        offset += 2 * n
+        intensities = struct.unpack_from(f'<{n}B', data, offset)
+        frame['points'] = [
+            {'angle': a / ANGLE_SCALE, 'distance': d, 'intensity': i}
+            for a, d, i in zip(angles, distances, intensities)
+        ]
+    elif frame['kind'] == KIND_KEYFRAME:
+        frame['bins'] = list(struct.unpack_from(f'<{n}H', data, offset))
+    elif frame['kind'] == KIND_DELTA:
+        frame['indices'] = list(struct.unpack_from(f'<{n}H', data, offset))
+        frame['distances'] = list(struct.unpack_from(f'<{n}H', data, offset + 2 * n))
+    else:
+        raise ValueError(f"unknown frame kind {frame['kind']}")
+    return frame
+
+
+class DeltaEncoder:
+    """
+    Per-client keyframe + delta stream over fixed angular bins.
+
+    Keeps the bins as the client currently has them, so changes below the
+    threshold accumulate until they are worth sending.
+    """
+
+    def __init__(self, num_bins: int = 360, keyframe_interval: int = 50,
+                 threshold_mm: int = 30):
+        self.num_bins = num_bins
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.threshold_mm = threshold_mm
+        self.seq = 0
+        self.last_source_seq = None  # Scan seq last encoded (callers skip repeats)
+        self._client_bins = None
+        self._since_keyframe = 0
+        self._keyframe_requested = True
+
+    def request_keyframe(self):
+        """Resync: the next encode() sends a keyframe"""
+        self._keyframe_requested = True
+        self.last_source_seq = None
+
+    def encode(self, bins, timestamp: float, frequency: float = 0.0,
+               connected: bool = True, source_seq: int = None) -> bytes:
+        """Encode the next frame for `bins` (uint16 min range per bin)"""
+        bins = np.asarray(bins, dtype=np.uint16)
+        self.seq += 1
+        self.last_source_seq = source_seq
+
+        if (self._keyframe_requested or self._client_bins is None
+                or len(bins) != len(self._client_bins)
+                or self._since_keyframe >= self.keyframe_interval - 1):
+            self._client_bins = bins.copy()
+            self._since_keyframe = 0
+            self._keyframe_requested = False
+            return b''.join((
+                encode_header(KIND_KEYFRAME, len(bins), self.seq, timestamp, frequency, connected),
+                bins.astype('<u2').tobytes(),
+            ))
+
+        self._since_keyframe += 1
+        diff = np.abs(bins.astype(np.int32) - self._client_bins.astype(np.int32))
+        changed = np.flatnonzero(diff > self.threshold_mm)
+        self._client_bins[changed] = bins[changed]
+        return b''.join((
+            encode_header(KIND_DELTA, len(changed), self.seq, timestamp, frequency, connected),
+            changed.astype('<u2').tobytes(),
+            bins[changed].astype('<u2').tobytes(),
+        ))
+
+
+class DeltaDecoder:
+    """Reference client for keyframe/delta streams"""
+
+    def __init__(self):
+        self.bins = None
+        self.seq = None
+        self.needs_resync = True
+
+    def apply(self, data: bytes):
+        """
+        Apply one frame. Returns the current bins, or None while waiting for
+        a keyframe after a dropped delta (the client should send a resync).
+        """
+        frame = decode_frame(data)
+        if frame['kind'] == KIND_KEYFRAME:
+            self.bins = frame['bins']
+            self.needs_resync = False
+        elif frame['kind'] == KIND_DELTA:
+            if self.needs_resync or frame['seq'] != self.seq + 1:
+                self.needs_resync = True
+                return None
+            for i, d in zip(frame['indices'], frame['distances']):
+                self.bins[i] = d
+        self.seq = frame['seq']
+        return self.bins
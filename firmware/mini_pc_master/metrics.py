@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Hot-Path Metrics
+================================================================================
+Low-overhead counters and fixed-bucket histograms for the serial readers,
+with JSON and Prometheus text exposition.
+
+Observations are plain integer increments plus one bisect per histogram
+sample, made from a single reader thread; readers on other threads see
+values that may be one update behind, which is fine for monitoring.
+================================================================================
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> List[float]:
+    """`count` upper bounds start, start*factor, start*factor^2, ..."""
+    return [start * factor ** i for i in range(count)]
+
+
+# 1 us .. ~4 s in powers of two
+SECONDS_BUCKETS = exponential_buckets(1e-6, 2.0, 23)
+
+# 0.25 s .. 128 s, for outages and recoveries
+RECOVERY_BUCKETS = exponential_buckets(0.25, 2.0, 10)
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket i counts values <= bounds[i] (last bucket: +Inf)"""
+
+    def __init__(self, bounds: Iterable[float] = SECONDS_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (max for the +Inf bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self, scale: float = 1.0, digits: int = 3) -> dict:
+        """Summary with values multiplied by `scale` (e.g. 1000 for ms)"""
+        def fmt(value):
+            return None if value is None else round(value * scale, digits)
+
+        return {
+            'count': self.count,
+            'mean': fmt(self.sum / self.count) if self.count else None,
+            'p50': fmt(self.quantile(0.5)),
+            'p90': fmt(self.quantile(0.9)),
+            'p99': fmt(self.quantile(0.99)),
+            'max': fmt(self.max) if self.count else None,
+        }
+
+
+def format_prometheus(prefix: str, counters: Dict[str, Any], gauges: Dict[str, Any],
+                      histograms: Dict[str, Any], labels: str = '') -> str:
+    """
+    Prometheus text exposition (version 0.0.4). Counter names get a
+    `_total` suffix; `labels` is an optional `key="value",...` string.
+    A value may also be a dict {labels: value} (or {labels: Histogram})
+    for one series per label set, e.g. {'strategy="usb_reset"': 3}.
+    """
+    def series(value):
+        if isinstance(value, dict):
+            return [(','.join(filter(None, (labels, extra))), v) for extra, v in value.items()]
+        return [(labels, value)]
+
+    lines = []
+    for kind, suffix, metrics in (('counter', '_total', counters), ('gauge', '', gauges)):
+        for name, value in metrics.items():
+            metric = f'{prefix}_{name}{suffix}'
+            lines.append(f'# TYPE {metric} {kind}')
+            for label_set, v in series(value):
+                braces = f'{{{label_set}}}' if label_set else ''
+                lines.append(f'{metric}{braces} {v}')
+    for name, value in histograms.items():
+        metric = f'{prefix}_{name}'
+        lines.append(f'# TYPE {metric} histogram')
+        for label_set, hist in series(value):
+            braces = f'{{{label_set}}}' if label_set else ''
+            sep = ',' if label_set else ''
+            cumulative = 0
+            for bound, n in zip(hist.bounds, hist.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{label_set}{sep}le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label_set}{sep}le="+Inf"}} {hist.count}')
+            lines.append(f'{metric}_sum{braces} {hist.sum:.9g}')
+            lines.append(f'{metric}_count{braces} {hist.count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+LIDAR Obstacle Clustering & Tracking
+================================================================================
+Turns each LidarScan into a short list of obstacles instead of hundreds
+of raw returns, and follows them from scan to scan.
+
+Segmentation walks the scan in angle order and starts a new cluster
+wherever two neighbouring returns are further apart than an adaptive
+breakpoint distance (Borges & Aldon): the gap a surface seen at grazing
+angle `lambda_deg` would leave between two beams at that range, plus
+three sigma of range noise. Far returns may therefore be further apart
+than near ones and still belong to one object. A cluster that spans the
+0/360 degree seam is joined back together.
+
+Tracking runs a constant-velocity Kalman filter per object (state x, y,
+vx, vy; position measured), all tracks predicted and updated as batched
+NumPy arrays. Clusters are associated to predicted tracks greedily by
+distance within a gate. Clusters larger than `max_size` (walls,
+furniture rows) are reported but not tracked: their centroid slides as
+the visible part changes, which would read as motion.
+
+Frames: cluster geometry is in the rover frame (x = right, y = forward,
+metres; bearings clockwise degrees from the nose). Tracks live in the
+world frame (x = east, y = north) when a pose from scan_matcher's
+ScanOdometry is given, so a parked car stays still while the rover
+drives past it; without a pose they live in the rover frame.
+================================================================================
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from metrics import Histogram
+
+
+@dataclass
+class Cluster:
+    """One segment of a scan, rover frame"""
+    x: float                 # Centroid, metres right
+    y: float                 # Centroid, metres forward
+    radius: float            # Largest point distance from the centroid, metres
+    span: float              # First-to-last point distance, metres
+    points: int
+    closest_angle: float     # Degrees, clockwise from the nose
+    closest_distance: int    # Millimeters
+    world: Tuple[float, float] = (0.0, 0.0)  # Centroid in the tracking frame
+    track_id: Optional[int] = None
+    confirmed: bool = False  # Track seen in at least min_hits scans
+    velocity: Optional[Tuple[float, float]] = None  # Tracking frame, m/s
+
+    @property
+    def range(self) -> float:
+        return math.hypot(self.x, self.y)
+
+    @property
+    def bearing(self) -> float:
+        return math.degrees(math.atan2(self.x, self.y)) % 360.0
+
+
+class ScanSegmenter:
+    """Adaptive-breakpoint segmentation of one scan into clusters"""
+
+    def __init__(self, min_range: float = 0.15, max_range: float = 8.0,
+                 lambda_deg: float = 10.0, sigma: float = 0.03,
+                 min_gap: float = 0.10, min_points: int = 3):
+        self.min_range = min_range
+        self.max_range = max_range
+        self.lam = math.radians(lambda_deg)
+        self.sigma = sigma
+        self.min_gap = min_gap
+        self.min_points = min_points
+
+    def segment(self, scan) -> List[Cluster]:
+        ranges = scan.distances.astype(np.float32) * np.float32(0.001)
+        keep = np.flatnonzero((ranges >= self.min_range) & (ranges <= self.max_range))
+        if len(keep) < self.min_points:
+            return []
+        order = keep[np.argsort(scan.angles[keep], kind='stable')]
+        angles = scan.angles[order].astype(np.float64)
+        ranges = ranges[order]
+        x, y = scan.xy[:, order]
+
+        # Gap to the previous point (index 0: across the 360 -> 0 seam)
+        dphi = np.radians(np.diff(angles, prepend=angles[-1] - 360.0))
+        gap = np.hypot(x - np.roll(x, 1), y - np.roll(y, 1))
+        prev_range = np.roll(ranges, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            limit = prev_range * np.sin(dphi) / np.sin(self.lam - dphi) + 3 * self.sigma
+        limit = np.maximum(limit, self.min_gap)
+        breaks = (dphi >= self.lam) | (gap > limit)
+
+        starts = np.flatnonzero(breaks)
+        if not len(starts):
+            return self._clusters(angles, ranges, x, y, [np.arange(len(order))])
+        segments = np.split(np.arange(len(order)), starts)[1:]
+        if starts[0] != 0:
+            # No break at the seam: the points before the first break
+            # continue the last segment
+            segments[-1] = np.concatenate((segments[-1], np.arange(starts[0])))
+        return self._clusters(angles, ranges, x, y, segments)
+
+    def _clusters(self, angles, ranges, x, y, segments) -> List[Cluster]:
+        clusters = []
+        for seg in segments:
+            if len(seg) < self.min_points:
+                continue
+            sx, sy = x[seg], y[seg]
+            cx, cy = float(sx.mean()), float(sy.mean())
+            near = seg[int(np.argmin(ranges[seg]))]
+            clusters.append(Cluster(
+                x=cx, y=cy,
+                radius=float(np.sqrt(((sx - cx) ** 2 + (sy - cy) ** 2).max())),
+                span=float(math.hypot(sx[-1] - sx[0], sy[-1] - sy[0])),
+                points=len(seg),
+                closest_angle=float(angles[near]),
+                closest_distance=int(round(float(ranges[near]) * 1000)),
+            ))
+        return clusters
+
+
+class ObstacleTracker:
+    """Segmentation plus constant-velocity Kalman tracks of the small clusters"""
+
+    def __init__(self, segmenter: Optional[ScanSegmenter] = None,
+                 gate: float = 1.0, max_size: float = 1.5,
+                 min_hits: int = 3, max_misses: int = 3,
+                 accel_sigma: float = 2.0, meas_sigma: float = 0.1,
+                 initial_speed_sigma: float = 2.0):
+        self.segmenter = segmenter or ScanSegmenter()
+        self.gate = gate
+        self.max_size = max_size
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.accel_var = accel_sigma ** 2
+        self.meas_var = meas_sigma ** 2
+        self.initial_speed_var = initial_speed_sigma ** 2
+
+        self._state = np.zeros((0, 4))      # x, y, vx, vy per track
+        self._cov = np.zeros((0, 4, 4))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._misses = np.zeros(0, dtype=np.int64)
+        self._next_id = 1
+        self._last_time: Optional[float] = None
+
+        self.clusters: List[Cluster] = []   # Latest scan, replaced (not mutated) per update
+        self.frame = 'rover'
+        self.seq = 0
+        self.timestamp = 0.0
+        self.update_time = Histogram()
+
+    def reset(self):
+        self._state = np.zeros((0, 4))
+        self._cov = np.zeros((0, 4, 4))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._misses = np.zeros(0, dtype=np.int64)
+        self._last_time = None
+        self.clusters = []
+
+    @property
+    def track_count(self) -> int:
+        return len(self._ids)
+
+    def update(self, scan, pose: Optional[Tuple[float, float, float]] = None) -> List[Cluster]:
+        """
+        Segment `scan` and advance the tracks. `pose` is the rover's (x east,
+        y north, compass heading) when the scan was taken, e.g.
+        ScanOdometry.pose; without it tracking is in the rover frame.
+        """
+        start = time.perf_counter()
+
+        clusters = self.segmenter.segment(scan)
+        frame = 'world' if pose is not None else 'rover'
+        if frame != self.frame:
+            self.reset()
+            self.frame = frame
+        for c in clusters:
+            c.world = self._to_world(c.x, c.y, pose)
+
+        dt = 0.0 if self._last_time is None else min(max(scan.timestamp - self._last_time, 0.0), 1.0)
+        self._last_time = scan.timestamp
+        self._predict(dt)
+
+        trackable = [i for i, c in enumerate(clusters) if 2 * c.radius <= self.max_size]
+        matches = self._associate([clusters[i].world for i in trackable])
+        matched_tracks = np.zeros(len(self._ids), dtype=bool)
+        if matches:
+            tracks = np.array([t for t, _ in matches])
+            z = np.array([clusters[trackable[k]].world for _, k in matches])
+            self._correct(tracks, z)
+            matched_tracks[tracks] = True
+            for t, k in matches:
+                clusters[trackable[k]].track_id = int(self._ids[t])
+
+        self._hits[matched_tracks] += 1
+        self._misses[matched_tracks] = 0
+        self._misses[~matched_tracks] += 1
+        alive = self._misses <= self.max_misses
+        self._keep(alive)
+
+        matched = {k for _, k in matches}
+        new = [clusters[trackable[k]] for k in range(len(trackable)) if k not in matched]
+        if new:
+            self._spawn(new)
+
+        rows = {int(track_id): r for r, track_id in enumerate(self._ids)}
+        for c in clusters:
+            r = rows.get(c.track_id)
+            if r is not None:
+                c.confirmed = bool(self._hits[r] >= self.min_hits)
+                c.velocity = (float(self._state[r, 2]), float(self._state[r, 3]))
+
+        clusters.sort(key=lambda c: c.closest_distance)
+        self.clusters = clusters
+        self.seq = getattr(scan, 'seq', 0)
+        self.timestamp = scan.timestamp
+        self.update_time.observe(time.perf_counter() - start)
+        return clusters
+
+    @staticmethod
+    def _to_world(x: float, y: float, pose) -> Tuple[float, float]:
+        if pose is None:
+            return x, y
+        px, py, heading = pose
+        h = math.radians(heading)
+        return (px + x * math.cos(h) + y * math.sin(h),
+                py - x * math.sin(h) + y * math.cos(h))
+
+    # ----- Kalman filter (all tracks at once) -----
+
+    def _predict(self, dt: float):
+        if not len(self._ids) or dt <= 0:
+            return
+        f = np.eye(4)
+        f[0, 2] = f[1, 3] = dt
+        q = np.zeros((4, 4))
+        q[0, 0] = q[1, 1] = dt ** 4 / 4
+        q[0, 2] = q[2, 0] = q[1, 3] = q[3, 1] = dt ** 3 / 2
+        q[2, 2] = q[3, 3] = dt ** 2
+        self._state = self._state @ f.T
+        self._cov = f @ self._cov @ f.T + self.accel_var * q
+
+    def _associate(self, points) -> List[Tuple[int, int]]:
+        """Greedy nearest (track, cluster) pairs within the gate"""
+        if not len(self._ids) or not points:
+            return []
+        z = np.asarray(points)
+        dist = np.hypot(self._state[:, None, 0] - z[None, :, 0],
+                        self._state[:, None, 1] - z[None, :, 1])
+        pairs = []
+        used_t, used_z = set(), set()
+        for flat in np.argsort(dist, axis=None):
+            t, k = divmod(int(flat), len(z))
+            if dist[t, k] > self.gate:
+                break
+            if t in used_t or k in used_z:
+                continue
+            used_t.add(t)
+            used_z.add(k)
+            pairs.append((t, k))
+        return pairs
+
+    def _correct(self, tracks: np.ndarray, z: np.ndarray):
+        x = self._state[tracks]
+        p = self._cov[tracks]
+        s = p[:, :2, :2] + self.meas_var * np.eye(2)
+        k = p[:, :, :2] @ np.linalg.inv(s)                         # (m, 4, 2)
+        self._state[tracks] = x + (k @ (z - x[:, :2])[:, :, None])[:, :, 0]
+        self._cov[tracks] = p - k @ p[:, :2, :]
+
+    def _keep(self, mask: np.ndarray):
+        self._state = self._state[mask]
+        self._cov = self._cov[mask]
+        self._ids = self._ids[mask]
+        self._hits = self._hits[mask]
+        self._misses = self._misses[mask]
+
+    def _spawn(self, clusters: List[Cluster]):
+        n = len(clusters)
+        state = np.zeros((n, 4))
+        state[:, :2] = [c.world for c in clusters]
+        cov = np.zeros((n, 4, 4))
+        cov[:, 0, 0] = cov[:, 1, 1] = self.meas_var
+        cov[:, 2, 2] = cov[:, 3, 3] = self.initial_speed_var
+        ids = np.arange(self._next_id, self._next_id + n)
+        self._next_id += n
+        for c, track_id in zip(clusters, ids):
+            c.track_id = int(track_id)
+        self._state = np.concatenate((self._state, state))
+        self._cov = np.concatenate((self._cov, cov))
+        self._ids = np.concatenate((self._ids, ids))
+        self._hits = np.concatenate((self._hits, np.ones(n, dtype=np.int64)))
+        self._misses = np.concatenate((self._misses, np.zeros(n, dtype=np.int64)))
+
+    # ----- Output -----
+
+    def to_dict(self, max_distance: Optional[float] = None) -> dict:
+        """Latest clusters with their tracks; `max_distance` (mm) drops farther ones"""
+        objects = []
+        for c in self.clusters:
+            if max_distance is not None and c.closest_distance > max_distance:
+                continue
+            vx, vy = c.velocity if c.velocity is not None else (None, None)
+            objects.append({
+                'id': c.track_id,
+                'x': round(c.x, 3),
+                'y': round(c.y, 3),
+                'range': round(c.range, 3),
+                'bearing': round(c.bearing, 1),
+                'radius': round(c.radius, 3),
+                'span': round(c.span, 3),
+                'points': c.points,
+                'closest': {'angle': round(c.closest_angle, 1), 'distance': c.closest_distance},
+                'confirmed': c.confirmed,
+                'vx': None if vx is None else round(vx, 2),
+                'vy': None if vy is None else round(vy, 2),
+                'speed': None if vx is None else round(math.hypot(vx, vy), 2),
+            })
+        return {
+            'seq': self.seq,
+            'timestamp': int(self.timestamp * 1000),
+            'frame': self.frame,
+            'count': len(objects),
+            'tracks': self.track_count,
+            'objects': objects,
+            'update_ms': self.update_time.to_dict(scale=1e3),
+        }
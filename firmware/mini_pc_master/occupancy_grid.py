@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Occupancy Grid Mapping
+================================================================================
+Rolling local log-odds occupancy grid fed by YDLidarDriver scans.
+
+Frames: world x = east, y = north, in metres. LIDAR angles are clockwise
+from the rover's nose, so a return at `angle` lies on compass bearing
+heading + angle. Grid row 0 is the southern edge of the window.
+
+Each scan is integrated in one vectorized pass: every beam is sampled at
+half-cell steps from the sensor to the return; the cells crossed get one
+free update and the end cells one occupied update per scan. The window
+re-centres on the rover in whole-cell shifts once it drifts a quarter of
+the window from the centre, so the map around the rover is kept while
+cells that leave the window are forgotten.
+
+Grid frame (to_bytes(), little-endian, zlib-compressed cells):
+
+    offset  size  field
+    0       2     magic 'OG'
+    2       1     version (1)
+    3       1     flags (bit 0: cells are zlib-compressed)
+    4       2     width (cells, east)
+    6       2     height (cells, north)
+    8       2     resolution, mm per cell
+    10      4     int32 origin x, mm (west edge of column 0)
+    14      4     int32 origin y, mm (south edge of row 0)
+    18      4     int32 rover x, mm
+    22      4     int32 rover y, mm
+    26      2     rover heading, 0.01 degree units
+    28      4     update count
+    32      8     timestamp of the last scan, ms since epoch
+    40      ...   height x width uint8 cells, row 0 first:
+                  0-254 = occupancy probability x 254, 255 = unknown
+================================================================================
+"""
+
+import math
+import struct
+import threading
+import zlib
+from typing import Tuple
+
+import numpy as np
+
+MAGIC = b'OG'
+VERSION = 1
+FLAG_ZLIB = 0x01
+HEADER = struct.Struct('<2sBBHHHiiiiHIQ')
+UNKNOWN = 255
+
+L_OCCUPIED = 0.85
+L_FREE = -0.4
+L_MIN = -4.0
+L_MAX = 4.0
+
+
+class OccupancyGrid:
+    """Log-odds occupancy grid over a square window that follows the rover"""
+
+    def __init__(self, size_m: float = 20.0, resolution_m: float = 0.05,
+                 max_range_m: float = 12.0):
+        self.resolution = resolution_m
+        self.cells = int(round(size_m / resolution_m))
+        self.max_range = max_range_m
+        self.log_odds = np.zeros((self.cells, self.cells), dtype=np.float32)
+        self._free = np.zeros(self.cells * self.cells, dtype=bool)
+        self._hit = np.zeros(self.cells * self.cells, dtype=bool)
+
+        # World position of the south-west corner of cell (0, 0)
+        half = self.cells // 2 * resolution_m
+        self.origin = (-half, -half)
+        self.pose = (0.0, 0.0, 0.0)  # x, y, heading
+        self.updates = 0
+        self.timestamp = 0.0
+        self._lock = threading.Lock()
+        self._encoded: dict = {}
+
+    @property
+    def size_m(self) -> float:
+        return self.cells * self.resolution
+
+    def world_to_cell(self, x: float, y: float) -> Tuple[int, int]:
+        """(row, col) of the cell containing world point (x, y)"""
+        return (int(math.floor((y - self.origin[1]) / self.resolution)),
+                int(math.floor((x - self.origin[0]) / self.resolution)))
+
+    def recenter(self, x: float, y: float):
+        """Shift the window in whole cells if (x, y) is a quarter-window off centre"""
+        row, col = self.world_to_cell(x, y)
+        center = self.cells // 2
+        margin = self.cells // 4
+        if abs(row - center) <= margin and abs(col - center) <= margin:
+            return
+        self._shift(row - center, col - center)
+
+    def _shift(self, drow: int, dcol: int):
+        """Move the window by (drow, dcol) cells north/east, keeping overlapping cells"""
+        g = self.log_odds
+        n = self.cells
+        if abs(drow) >= n or abs(dcol) >= n:
+            g.fill(0)
+        else:
+            src_r = slice(max(drow, 0), n + min(drow, 0))
+            dst_r = slice(max(-drow, 0), n - max(drow, 0))
+            src_c = slice(max(dcol, 0), n + min(dcol, 0))
+            dst_c = slice(max(-dcol, 0), n - max(dcol, 0))
+            g[dst_r, dst_c] = g[src_r, src_c]
+            if drow > 0:
+                g[n - drow:, :] = 0
+            elif drow < 0:
+                g[:-drow, :] = 0
+            if dcol > 0:
+                g[:, n - dcol:] = 0
+            elif dcol < 0:
+                g[:, :-dcol] = 0
+        self.origin = (self.origin[0] + dcol * self.resolution,
+                       self.origin[1] + drow * self.resolution)
+
+    def update(self, scan, heading: float, x: float = 0.0, y: float = 0.0):
+        """Integrate one LidarScan taken at pose (x, y) metres, compass `heading`"""
+        with self._lock:
+            self.recenter(x, y)
+            self.pose = (x, y, heading)
+            self.timestamp = scan.timestamp
+
+            ranges = scan.distances.astype(np.float32) * 0.001
+            valid = (ranges > 0) & (ranges < self.max_range)
+            ranges = ranges[valid]
+            # Beam directions: the scan's cached sensor-frame points rotated by heading
+            right, forward = scan.xy[:, valid] / ranges
+            h = math.radians(heading)
+            cos_h, sin_h = np.float32(math.cos(h)), np.float32(math.sin(h))
+            dx = right * cos_h + forward * sin_h
+            dy = forward * cos_h - right * sin_h
+
+            res = self.resolution
+            cols0 = (x - self.origin[0]) / res
+            rows0 = (y - self.origin[1]) / res
+            n = self.cells
+
+            # Free space: half-cell samples along each beam, stopping a cell short of the return
+            step = 0.5
+            counts = np.maximum((ranges / res - 1.0) / step, 0).astype(np.intp)
+            total = int(counts.sum())
+            if total:
+                beam = np.repeat(np.arange(len(counts)), counts)
+                k = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                t = k.astype(np.float32) * step
+                cols = np.floor(cols0 + t * dx[beam]).astype(np.intp)
+                rows = np.floor(rows0 + t * dy[beam]).astype(np.intp)
+                inside = (rows >= 0) & (rows < n) & (cols >= 0) & (cols < n)
+                self._free[rows[inside] * n + cols[inside]] = True
+
+            cols = np.floor(cols0 + ranges / res * dx).astype(np.intp)
+            rows = np.floor(rows0 + ranges / res * dy).astype(np.intp)
+            inside = (rows >= 0) & (rows < n) & (cols >= 0) & (cols < n)
+            self._hit[rows[inside] * n + cols[inside]] = True
+            self._free &= ~self._hit
+
+            flat = self.log_odds.reshape(-1)
+            free = np.flatnonzero(self._free)
+            hit = np.flatnonzero(self._hit)
+            flat[free] = np.maximum(flat[free] + L_FREE, L_MIN)
+            flat[hit] = np.minimum(flat[hit] + L_OCCUPIED, L_MAX)
+            self._free[free] = False
+            self._hit[hit] = False
+
+            self.updates += 1
+            self._encoded.clear()
+
+    def probabilities(self) -> np.ndarray:
+        """Occupancy probability per cell (0.5 = unknown)"""
+        with self._lock:
+            return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    def _cells_u8(self) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-self.log_odds))
+        cells = np.rint(p * 254).astype(np.uint8)
+        cells[self.log_odds == 0] = UNKNOWN
+        return cells
+
+    def to_bytes(self) -> bytes:
+        """Grid frame (see module docstring), cached until the next update"""
+        with self._lock:
+            data = self._encoded.get('bin')
+            if data is None:
+                x, y, heading = self.pose
+                data = HEADER.pack(
+                    MAGIC, VERSION, FLAG_ZLIB, self.cells, self.cells,
+                    int(round(self.resolution * 1000)),
+                    int(round(self.origin[0] * 1000)), int(round(self.origin[1] * 1000)),
+                    int(round(x * 1000)), int(round(y * 1000)),
+                    int(round((heading % 360) * 100)) % 36000,
+                    self.updates & 0xFFFFFFFF, int(self.timestamp * 1000)
+                ) + zlib.compress(self._cells_u8().tobytes(), 1)
+                self._encoded['bin'] = data
+            return data
+
+    def to_png(self) -> bytes:
+        """8-bit greyscale PNG, north up: white free, black occupied, grey unknown"""
+        with self._lock:
+            data = self._encoded.get('png')
+            if data is None:
+                p = 1.0 / (1.0 + np.exp(-self.log_odds[::-1]))
+                image = np.rint((1.0 - p) * 255).astype(np.uint8)
+                data = encode_png(image)
+                self._encoded['png'] = data
+            return data
+
+    def clear(self):
+        with self._lock:
+            self.log_odds.fill(0)
+            self.updates = 0
+            self._encoded.clear()
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Minimal 8-bit greyscale PNG encoder (no imaging dependency)"""
+    height, width = image.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)  # Filter byte 0 per row
+    raw[:, 1:] = image
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return (struct.pack('>I', len(body)) + kind + body
+                + struct.pack('>I', zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(raw.tobytes(), 1)),
+        chunk(b'IEND', b''),
+    ))
+
+
+def decode_grid(data: bytes) -> dict:
+    """Reference decoder for to_bytes() frames"""
+    (magic, version, flags, width, height, res_mm, ox, oy,
+     rx, ry, hdg, updates, ts_ms) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"bad magic {magic!r}")
+    if version != VERSION:
+        raise ValueError(f"unsupported version {version}")
+    cells = data[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        cells = zlib.decompress(cells)
+    return {
+        'width': width,
+        'height': height,
+        'resolution': res_mm / 1000.0,
+        'origin': (ox / 1000.0, oy / 1000.0),
+        'pose': (rx / 1000.0, ry / 1000.0, hdg / 100.0),
+        'updates': updates,
+        'timestamp': ts_ms,
+        'cells': np.frombuffer(cells, dtype=np.uint8).reshape(height, width),
+    }
+
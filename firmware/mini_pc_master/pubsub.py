@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Publish / Subscribe Mailboxes
+================================================================================
+Hands items (e.g. complete LIDAR scans) from a producer thread to any
+number of consumers without running consumer code on the producer.
+
+Every subscription owns a bounded mailbox and its own consumer: a worker
+thread for plain callbacks, or a task on an asyncio loop for coroutine
+callbacks. publish() only appends to each mailbox and wakes its consumer,
+so a slow consumer never stalls the producer or other consumers. When a
+mailbox is full the subscription's policy decides what is lost:
+
+    DROP_OLDEST  evict the oldest queued item (maxlen=1: latest wins)
+    DROP_NEWEST  refuse the incoming item, keep the queue as is
+
+Per subscription: delivered/dropped/error counts, queue depth, lag from
+publish to handler start and handler duration histograms (metrics.py).
+================================================================================
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from metrics import Histogram
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+
+class Subscription:
+    """One consumer of a Publisher with its own mailbox, policy and worker"""
+
+    def __init__(self, name: str, callback: Callable[[Any], Any], maxlen: int = 1,
+                 policy: str = DROP_OLDEST, loop: Optional[asyncio.AbstractEventLoop] = None):
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"unknown drop policy {policy!r}")
+        self.name = name
+        self.callback = callback
+        self.maxlen = max(1, maxlen)
+        self.policy = policy
+        self.loop = loop
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._event: Optional[asyncio.Event] = None
+        self._worker = None
+        self.running = False
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.lag = Histogram()
+        self.handler_time = Histogram()
+
+    def start(self):
+        self.running = True
+        if self.loop is not None:
+            self._worker = asyncio.run_coroutine_threadsafe(self._run_task(), self.loop)
+        else:
+            self._worker = threading.Thread(target=self._run_thread, daemon=True,
+                                            name=f'sub-{self.name}')
+            self._worker.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._queue.clear()
+            self._cond.notify()
+        self._wake_loop()
+
+    def offer(self, item):
+        """Queue `item` according to the drop policy (called by the publisher)"""
+        with self._cond:
+            self.published += 1
+            if len(self._queue) >= self.maxlen:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self._queue.popleft()
+            self._queue.append((time.perf_counter(), item))
+            self._cond.notify()
+        self._wake_loop()
+
+    def _wake_loop(self):
+        if self.loop is not None and self._event is not None:
+            self.loop.call_soon_threadsafe(self._event.set)
+
+    def _take(self):
+        with self._cond:
+            return self._queue.popleft() if self._queue else None
+
+    def _run_thread(self):
+        while True:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._cond.wait()
+                if not self.running:
+                    return
+                queued, item = self._queue.popleft()
+            self._handle(queued, item)
+
+    async def _run_task(self):
+        self._event = asyncio.Event()
+        while self.running:
+            entry = self._take()
+            if entry is None:
+                await self._event.wait()
+                self._event.clear()
+                continue
+            queued, item = entry
+            start = time.perf_counter()
+            self.lag.observe(start - queued)
+            try:
+                await self.callback(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"[PUBSUB] {self.name} handler error: {e}")
+            self.handler_time.observe(time.perf_counter() - start)
+            self.delivered += 1
+
+    def _handle(self, queued: float, item):
+        start = time.perf_counter()
+        self.lag.observe(start - queued)
+        try:
+            self.callback(item)
+        except Exception as e:
+            self.errors += 1
+            print(f"[PUBSUB] {self.name} handler error: {e}")
+        self.handler_time.observe(time.perf_counter() - start)
+        self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            'policy': self.policy,
+            'maxlen': self.maxlen,
+            'mode': 'asyncio' if self.loop is not None else 'thread',
+            'queued': len(self._queue),
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'lag_ms': self.lag.to_dict(scale=1e3),
+            'handler_ms': self.handler_time.to_dict(scale=1e3),
+        }
+
+
+class Publisher:
+    """Fans items out to named Subscriptions"""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, callback: Callable[[Any], Any], maxlen: int = 1,
+                  policy: str = DROP_OLDEST,
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """
+        Run `callback(item)` for published items on a worker thread, or as a
+        task on `loop` when `callback` is a coroutine function. Replaces
+        (and stops) an existing subscription of the same name.
+        """
+        if loop is None and asyncio.iscoroutinefunction(callback):
+            raise ValueError("coroutine callbacks need an event loop")
+        subscription = Subscription(name, callback, maxlen, policy, loop)
+        subscription.start()
+        with self._lock:
+            previous = self._subscriptions.get(name)
+            subscriptions = dict(self._subscriptions)
+            subscriptions[name] = subscription
+            self._subscriptions = subscriptions
+        if previous:
+            previous.stop()
+        return subscription
+
+    def unsubscribe(self, name: str):
+        with self._lock:
+            subscriptions = dict(self._subscriptions)
+            subscription = subscriptions.pop(name, None)
+            self._subscriptions = subscriptions
+        if subscription:
+            subscription.stop()
+
+    def publish(self, item):
+        """Queue `item` for every subscriber; never blocks on a consumer"""
+        for subscription in self._subscriptions.values():
+            subscription.offer(item)
+
+    def close(self):
+        for name in list(self._subscriptions):
+            self.unsubscribe(name)
+
+    def stats(self) -> dict:
+        return {name: s.stats() for name, s in self._subscriptions.items()}
@@ -12,6 +12,7 @@ Serves telemetry API and WebSocket to web dashboard
 
 import eventlet
 eventlet.monkey_patch()
+from eventlet import tpool
 
 import serial
 import serial.tools.list_ports
@@ -23,13 +24,25 @@ import socket
 import signal
 import atexit
 import asyncio
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from datetime import datetime
+from typing import Optional
 import math
 from pathfinding import GPSPoint, WaypointRouter, ObstacleAvoidance
-from ydlidar_driver import YDLidarDriver, find_lidar_port, LidarScan
+from ydlidar_driver import (YDLidarDriver, find_lidar_port, LidarScan, ScanFilterChain,
+                            ScanDeskewer)
+from serial_reactor import SerialReactor
+from arduino_reader import ArduinoReader
+from rover_state import RoverState
+from flight_recorder import FlightRecorder, QUERY_LIMIT
+from telemetry_history import MAX_POINTS as HISTORY_POINTS
+from lidar_wire_format import DeltaEncoder, encode_bins
+from occupancy_grid import OccupancyGrid
+from scan_matcher import ScanOdometry
+from obstacle_tracker import ObstacleTracker
+from speed_governor import SpeedGovernor
 
 # Try to import websockets for plain WebSocket support
 try:
@@ -42,6 +55,24 @@ except ImportError:
 
 # ===== CONFIGURATION =====
 ARDUINO_BAUD = 115200
+ARDUINO_RECONNECT_INTERVAL = 2.0  # Seconds between reopen attempts after a port error
+LIDAR_FORMAT_JSON = 'json'
+LIDAR_FORMAT_BINARY = 'binary'  # lidar_wire_format frames
+LIDAR_FORMAT_DELTA = 'delta'    # lidar_wire_format keyframes + deltas
+LIDAR_FORMATS = (LIDAR_FORMAT_JSON, LIDAR_FORMAT_BINARY, LIDAR_FORMAT_DELTA)
+LIDAR_STALE_THROTTLE = 30  # Forward throttle cap (%) while LIDAR data is stale
+# 'reactor': one selector thread (green, select() under eventlet) reads Arduino and LIDAR as bytes arrive;
+# 'threads': blocking-read threads for the Arduino and the LIDAR
+SERIAL_IO = os.environ.get('SERIAL_IO', 'reactor')
+# 'json': the Mega's 20 Hz JSON line; 'binary': telemetry_frame COBS frames
+# every ARDUINO_TELEMETRY_MS (negotiated with TELEM:BIN after each Mega reset)
+ARDUINO_TELEMETRY = os.environ.get('ARDUINO_TELEMETRY', 'json')
+ARDUINO_TELEMETRY_MS = int(os.environ.get('ARDUINO_TELEMETRY_MS', '50'))
+# Every telemetry frame on disk for /api/logs?from=&to=&fields= (size-rotated);
+# a relative FLIGHT_RECORDER_DIR is taken from this file's directory, not the CWD
+FLIGHT_RECORDER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   os.environ.get('FLIGHT_RECORDER_DIR', 'flight_log'))
+FLIGHT_RECORDER_MB = int(os.environ.get('FLIGHT_RECORDER_MB', '256'))
 WS_PORT = 5001  # Plain WebSocket port for /ws/telemetry
 WEB_HOST = '0.0.0.0'
 WEB_PORT = 5000  # Match main web server port
@@ -84,172 +115,117 @@ def find_arduino_port():
     return None
 
 # ===== GLOBAL STATE =====
-class RoverState:
-    def __init__(self):
-        # Telemetry
-        self.speed = 0.0
-        self.battery = 85.0
-        self.heading = 0.0
-        self.pitch = 0.0
-        self.roll = 0.0
-        self.accel = {'x': 0, 'y': 0, 'z': 0}
-        self.lidar_distance = 0
-        self.ultrasonic = [0, 0, 0, 0, 0]
-        
-        # GPS
-        self.gps_lat = 0.0
-        self.gps_lng = 0.0
-        self.gps_speed = 0.0
-        self.gps_accuracy = 0
-        self.gps_satellites = 0
-        
-        # iBUS RC Control (10 channels from FlySky FS-IA10B)
-        self.ibus_connected = False
-        self.ibus_channels = [1500] * 10  # Default center position
-        self.ibus_frame_rate = 0
-        
-        # System
-        self.mode = "MANUAL"
-        self.connected = False
-        self.last_update = None
-        self.telemetry_log = []
-        self.max_log_entries = 100
-        
-        # Host info
-        self.host_type = "Mini PC"
-        self.host_os = "Ubuntu"
-        
-    def update_from_arduino(self, data):
-        """Update state from Arduino JSON telemetry"""
-        try:
-            # GPS
-            if 'gps' in data:
-                self.gps_lat = data['gps'].get('lat', 0)
-                self.gps_lng = data['gps'].get('lng', 0)
-                self.gps_speed = data['gps'].get('spd', 0)
-                self.gps_accuracy = data['gps'].get('acc', 0)
-                self.gps_satellites = data['gps'].get('sat', 0)
-            
-            # IMU
-            if 'imu' in data:
-                self.heading = data['imu'].get('hdg', 0)
-                self.pitch = data['imu'].get('pitch', 0)
-                self.roll = data['imu'].get('roll', 0)
-                self.accel = {
-                    'x': data['imu'].get('ax', 0),
-                    'y': data['imu'].get('ay', 0),
-                    'z': data['imu'].get('az', 0)
-                }
-            
-            # Sensors
-            self.lidar_distance = data.get('lidar', 0)
-            self.ultrasonic = data.get('ultra', [0]*5)
-            self.battery = data.get('bat', 85)
-            
-            # iBUS RC
-            if 'ibus' in data:
-                self.ibus_connected = data['ibus'].get('con', False)
-                self.ibus_channels = data['ibus'].get('ch', [1500]*10)
-            
-            self.last_update = datetime.now().isoformat()
-            
-            # Log entry
-            log_entry = f"[{self.last_update[:19]}] HDG:{self.heading:.0f}° BAT:{self.battery:.0f}%"
-            self.telemetry_log.append(log_entry)
-            if len(self.telemetry_log) > self.max_log_entries:
-                self.telemetry_log.pop(0)
-                
-        except Exception as e:
-            print(f"[ERROR] Failed to parse telemetry: {e}")
-    
-    def to_dict(self):
-        """Convert state to dictionary for JSON/WebSocket"""
-        return {
-            'timestamp': int(time.time() * 1000),
-            'gps': {
-                'lat': round(self.gps_lat, 6),
-                'lng': round(self.gps_lng, 6),
-                'speed': round(self.gps_speed, 1),
-                'accuracy': self.gps_accuracy,
-                'satellites': self.gps_satellites
-            },
-            'imu': {
-                'heading': round(self.heading, 1),
-                'pitch': round(self.pitch, 1),
-                'roll': round(self.roll, 1),
-                'accelX': round(self.accel['x'], 2),
-                'accelY': round(self.accel['y'], 2),
-                'accelZ': round(self.accel['z'], 2)
-            },
-            'lidar': [
-                {'angle': 0, 'distance': self.lidar_distance}
-            ],
-            'ultrasonic': self.ultrasonic,
-            'battery': round(self.battery, 1),
-            'motorLeft': 0,
-            'motorRight': 0,
-            'mode': self.mode,
-            'connected': self.connected,
-            'ibus': {
-                'connected': self.ibus_connected,
-                'channels': self.ibus_channels,
-                'frameRate': self.ibus_frame_rate
-            }
-        }
-    
-    def get_rc_control(self):
-        """Convert iBUS channels to throttle/steering"""
-        if not self.ibus_connected:
-            return 0, 0
-        
-        # Channel mapping (FlySky FS-I6x default):
-        # CH1 = Roll/Aileron (steering)
-        # CH2 = Pitch/Elevator
-        # CH3 = Throttle
-        # CH4 = Yaw/Rudder
-        # CH5-10 = Aux switches
-        
-        throttle_raw = self.ibus_channels[2]  # CH3
-        steering_raw = self.ibus_channels[0]  # CH1
-        
-        # Convert 1000-2000 to -100..100
-        throttle = int((throttle_raw - 1500) / 5)  # ±100
-        steering = int((steering_raw - 1500) / 5)  # ±100
-        
-        return throttle, steering
-
-
 rover = RoverState()
 router = WaypointRouter()
 arduino = None
 arduino_port = None
+arduino_reader: Optional[ArduinoReader] = None
+arduino_telemetry = {'mode': 'json', 'interval': 50}  # Last telemetry_mode ack
+serial_reactor = SerialReactor() if SERIAL_IO == 'reactor' else None
+flight_recorder: Optional[FlightRecorder] = None  # Opened at startup (open_flight_recorder)
+
+def open_flight_recorder():
+    """Open FLIGHT_RECORDER_DIR and start its writer; leaves recording off on failure"""
+    global flight_recorder
+    try:
+        flight_recorder = FlightRecorder(FLIGHT_RECORDER_DIR,
+                                         max_bytes=FLIGHT_RECORDER_MB * 1024 * 1024)
+    except OSError as e:
+        print(f"[WARN] Flight recorder disabled: {e}")
+        return
+    flight_recorder.start()
+    print(f"[OK] Flight recorder: {FLIGHT_RECORDER_DIR}")
 
 # ===== YDLIDAR 360° SCANNER =====
 lidar = None
 lidar_port = None
 
+# Scan-matching odometry (IMU heading as prior) and the rolling 20 m x 20 m
+# occupancy grid it positions
+odometry = ScanOdometry()
+occupancy = OccupancyGrid(size_m=20.0, resolution_m=0.05)
+
+# Scan clusters tracked in the odometry frame (replaces per-point obstacle lists)
+obstacle_tracker = ObstacleTracker()
+
+# Held by the mapping worker per scan, /api/odometry/reset and grid
+# encoding, so a reset never lands between odometry.update() and
+# obstacle_tracker.update(). A native lock: its holders run in tpool.
+mapping_lock = eventlet.patcher.original('threading').Lock()
+
+def run_mapping(fn, *args):
+    """
+    `fn(*args)` under mapping_lock on a tpool (native) thread. Scan matching
+    is ~13 ms of NumPy per scan, which on a green thread would hold the
+    eventlet hub (serial reactor, Socket.IO) for that long. Everything that
+    touches odometry, occupancy or the tracker goes through here, so the
+    grid's own (green) lock is never contended across threads.
+    """
+    def locked():
+        with mapping_lock:
+            return fn(*args)
+    return tpool.execute(locked)
+
+# Time-to-collision throttle cap along the commanded arc (RC mode)
+speed_governor = SpeedGovernor()
+
 def connect_lidar():
     """Connect to YDLIDAR T-mini Plus"""
     global lidar, lidar_port
     
-    lidar_port = find_lidar_port()
+    # LIDAR_PORT overrides detection (e.g. the pty of lidar_simulator.py)
+    lidar_port = os.environ.get('LIDAR_PORT') or find_lidar_port()
     
     if lidar_port is None:
         print("[LIDAR] No YDLIDAR found!")
         return False
     
     try:
-        lidar = YDLidarDriver(lidar_port)
+        # De-skew each packet by the IMU heading change during the revolution, then
+        # intensity gate, isolated-point removal and 3-scan temporal median, so a
+        # single spurious return can't trigger an emergency stop
+        lidar = YDLidarDriver(lidar_port, filters=ScanFilterChain.default(),
+                              deskew=ScanDeskewer(rover.heading_history),
+                              verbose=os.environ.get('LIDAR_VERBOSE', '1') != '0',
+                              cartesian=True)
+        
+        def emit_lidar_scan(scan: LidarScan):
+            """Push each new scan to Socket.IO clients (only the latest if behind)"""
+            if socketio and len(scan):
+                formats = set(sio_lidar_formats.values())
+                if LIDAR_FORMAT_JSON in formats:
+                    socketio.emit('lidar_scan', lidar.get_scan_dict(), to=LIDAR_FORMAT_JSON)
+                if LIDAR_FORMAT_BINARY in formats:
+                    socketio.emit('lidar_scan_bin', lidar.get_scan_bytes(), to=LIDAR_FORMAT_BINARY)
+                for sid, stream in list(sio_lidar_streams.items()):
+                    frame = encode_lidar_delta(stream)
+                    if frame:  # None while there is no scan to bin
+                        socketio.emit('lidar_delta', frame, to=sid)
         
-        def on_lidar_scan(scan: LidarScan):
-            """Callback for each complete LIDAR scan"""
-            if socketio and scan.points:
-                scan_data = lidar.get_scan_dict()
-                socketio.emit('lidar_scan', scan_data)
+        def update_map(scan: LidarScan):
+            # Without Arduino telemetry there is no IMU heading to anchor to
+            delta = odometry.update(scan, rover.heading if rover.connected else None)
+            occupancy.update(scan, odometry.heading, odometry.x, odometry.y)
+            # Under the same lock as odometry, so the pose belongs to this scan
+            obstacle_tracker.update(scan, odometry.pose)
+            return delta
         
-        lidar.set_scan_callback(on_lidar_scan)
+        def map_lidar_scan(scan: LidarScan):
+            """Scan matching, occupancy update and obstacle tracking for each scan"""
+            if len(scan):
+                delta = run_mapping(update_map, scan)
+                if delta is not None and socketio:
+                    socketio.emit('odometry', odometry.to_dict())
+                if socketio:
+                    socketio.emit('lidar_objects', obstacle_tracker.to_dict())
         
-        if lidar.connect():
+        # Each runs on its own worker so JSON encoding, network I/O and mapping
+        # never hold up serial parsing. Odometry integrates consecutive scans,
+        # so it may queue a couple rather than skipping straight to the latest.
+        lidar.subscribe('socketio', emit_lidar_scan)
+        lidar.subscribe('mapping', map_lidar_scan, maxlen=3)
+        
+        if lidar.connect(serial_reactor):
             print(f"[OK] YDLIDAR connected on {lidar_port}")
             return True
         else:
@@ -260,10 +236,32 @@ def connect_lidar():
         print(f"[ERROR] LIDAR connection failed: {e}")
         return False
 
+def make_lidar_stream(options: dict) -> DeltaEncoder:
+    """Delta stream from client options {bins, keyframe_interval, threshold}"""
+    return DeltaEncoder(
+        num_bins=clamp_bins(options.get('bins', 360)),
+        keyframe_interval=max(1, min(1000, int(options.get('keyframe_interval', 50)))),
+        threshold_mm=max(0, min(12000, int(options.get('threshold', 30))))
+    )
+
+def clamp_bins(value) -> int:
+    """Client-requested bin count, limited to 8-3600"""
+    return max(8, min(3600, int(value)))
+
+def encode_lidar_delta(stream: DeltaEncoder) -> Optional[bytes]:
+    """Next keyframe/delta frame of `stream` for the latest scan"""
+    binned = lidar.get_binned_scan(stream.num_bins)
+    if binned is None:
+        return None
+    return stream.encode(
+        binned.distances, binned.timestamp, binned.scan_frequency,
+        connected=lidar.connected, source_seq=binned.seq
+    )
+
 # ===== ARDUINO COMMUNICATION =====
 def connect_arduino():
     """Establish connection to Arduino"""
-    global arduino, arduino_port
+    global arduino, arduino_port, arduino_reader
     
     arduino_port = find_arduino_port()
     
@@ -275,43 +273,92 @@ def connect_arduino():
     try:
         arduino = serial.Serial(arduino_port, ARDUINO_BAUD, timeout=1)
         time.sleep(2)  # Wait for Arduino reset
+        arduino_reader = ArduinoReader(arduino, {
+            't': handle_telemetry,
+            'event': handle_arduino_event,
+            'status': handle_arduino_status,
+            'ibus': handle_ibus_reply,
+        }, on_lost=arduino_lost)
         rover.connected = True
         print(f"[OK] Connected to Arduino on {arduino_port}")
+        request_telemetry_mode()
         return True
     except Exception as e:
         print(f"[ERROR] Failed to connect: {e}")
         rover.connected = False
         return False
 
-def read_telemetry_thread():
-    """Background thread to read telemetry from Arduino"""
-    while True:
-        try:
-            if not arduino or not arduino.is_open:
-                time.sleep(0.1)
-                continue
-            if arduino.in_waiting > 0:
-                line = arduino.readline().decode('utf-8', errors='ignore').strip()
-                
-                if line.startswith('{'):
-                    try:
-                        data = json.loads(line)
-                        rover.update_from_arduino(data)
-                        
-                        # Broadcast via WebSocket if available
-                        if socketio:
-                            socketio.emit('telemetry', rover.to_dict())
-                            
-                    except json.JSONDecodeError:
-                        pass
-                elif line:
-                    print(f"[ARDUINO] {line}")
-                    
-        except Exception as e:
-            print(f"[ERROR] Telemetry read: {e}")
-            time.sleep(1)
-        
-        time.sleep(0.01)
+def start_arduino_reader():
+    """Read the Arduino from the reactor, or from its own thread with SERIAL_IO=threads"""
+    if not arduino_reader:
+        return
+    if serial_reactor:
+        arduino_reader.attach(serial_reactor)
+    else:
+        threading.Thread(target=arduino_reader.run_blocking, daemon=True).start()
+
+arduino_reconnecting = threading.Event()
+
+def arduino_lost():
+    """Reader detached after a port error (unplug, Mega brown-out): reopen in the background"""
+    rover.connected = False
+    if not arduino_reconnecting.is_set():
+        arduino_reconnecting.set()
+        threading.Thread(target=reconnect_arduino, daemon=True).start()
+
+def reconnect_arduino():
+    """Close the dead port and retry connect_arduino() until the Mega is back"""
+    try:
+        if arduino:
+            arduino.close()
+    except Exception:
+        pass
+    while not connect_arduino():
+        time.sleep(ARDUINO_RECONNECT_INTERVAL)
+    start_arduino_reader()
+    arduino_reconnecting.clear()
+
+def handle_telemetry(data: dict):
+    """Apply one Arduino telemetry object and push it to Socket.IO clients"""
+    rover.update_from_arduino(data)
+    if flight_recorder:
+        flight_recorder.record(data)
+    
+    # Broadcast via WebSocket if available
+    if socketio:
+        socketio.emit('telemetry', rover.to_dict())
+
+def request_telemetry_mode():
+    """Ask the Mega for ARDUINO_TELEMETRY; it starts in JSON after every reset"""
+    if ARDUINO_TELEMETRY == 'binary':
+        send_command(f"TELEM:BIN,{ARDUINO_TELEMETRY_MS}")
+    elif ARDUINO_TELEMETRY_MS != 50:
+        send_command(f"TELEM:JSON,{ARDUINO_TELEMETRY_MS}")
+
+def handle_arduino_event(data: dict):
+    """boot / ready / stopped / pong / rc_mode / telemetry_mode / error notifications"""
+    print(f"[ARDUINO] Event: {json.dumps(data)}")
+    event = data.get('event')
+    if event == 'ready':
+        arduino_telemetry.update(mode='json', interval=50)
+        request_telemetry_mode()
+    elif event == 'telemetry_mode':
+        arduino_telemetry.update(mode=data.get('mode'), interval=data.get('interval'))
+    if socketio:
+        socketio.emit('arduino_event', data)
+
+def handle_arduino_status(data: dict):
+    """STATUS reply: per-sensor health flags"""
+    rover.sensor_health = data.get('status', {})
+    if socketio:
+        socketio.emit('arduino_status', rover.sensor_health)
+
+def handle_ibus_reply(data: dict):
+    """IBUS reply: receiver state, frame rate and channels"""
+    ibus = data.get('ibus', {})
+    rover.ibus_connected = ibus.get('connected', False)
+    rover.ibus_frame_rate = ibus.get('rate', 0)
+    rover.ibus_channels = ibus.get('ch', rover.ibus_channels)
 
 def send_command(cmd):
     """Send command to Arduino"""
@@ -324,8 +371,17 @@ def send_command(cmd):
     return False
 
 # ===== RC CONTROL THREAD =====
+def current_speed() -> float:
+    """Ground speed (m/s): scan-matched while LIDAR odometry is fresh, else GPS"""
+    delta = odometry.last_delta
+    if delta is not None and time.time() - delta.timestamp < 0.5:
+        return odometry.speed
+    return rover.gps_speed / 3.6  # km/h from the Mega
+
 def rc_control_thread():
     """Background thread for RC control via iBUS with LIDAR obstacle avoidance"""
+    lidar_was_stale = False
+    governor_was_limiting = False
     while True:
         try:
             if rover.mode == "RC" and rover.ibus_connected:
@@ -336,7 +392,16 @@ def rc_control_thread():
                 if abs(steering) < 5:
                     steering = 0
                 
-                if lidar and lidar.connected and throttle > 0:
+                # Stale sectors would steer by obstacles that may have moved: creep
+                # instead until the driver's recovery brings scans back
+                lidar_stale = bool(lidar and lidar.connected and lidar.stale)
+                if lidar_stale != lidar_was_stale:
+                    print(f"[LIDAR] Scan data {'stale' if lidar_stale else 'fresh'} "
+                          f"({lidar.freshness()['recovery_state']})")
+                    lidar_was_stale = lidar_stale
+                if lidar_stale and throttle > 0:
+                    throttle = min(throttle, LIDAR_STALE_THROTTLE)
+                elif lidar and lidar.connected and throttle > 0:
                     sectors = lidar.get_sector_distances(8)
                     if sectors:
                         new_throttle, new_steering, action = ObstacleAvoidance.get_avoidance_from_lidar_360(
@@ -346,6 +411,19 @@ def rc_control_thread():
                             print(f"[LIDAR] {action}: T={new_throttle} S={new_steering}")
                             throttle = new_throttle
                             steering = new_steering
+                    
+                    # The bands above react at fixed distances; the governor caps
+                    # throttle by stopping distance and TTC at the current speed
+                    if throttle > 0:
+                        decision = speed_governor.limit(
+                            lidar.get_binned_scan(speed_governor.num_bins), throttle, steering,
+                            speed=current_speed(), latency=lidar.scan_age)
+                        if decision.limited:
+                            if not governor_was_limiting:
+                                print(f"[LIDAR] TTC_LIMIT: T={decision.throttle} "
+                                      f"free={decision.free_distance} m")
+                            throttle = decision.throttle
+                        governor_was_limiting = decision.limited
                 
                 drive_rover(throttle, steering)
                 
@@ -379,8 +457,11 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
 @app.route('/api/telemetry', methods=['GET'])
 def get_telemetry():
-    """Get current telemetry state"""
-    return jsonify(rover.to_dict())
+    """Get current telemetry state (?format=bin for the rover_state binary snapshot)"""
+    snapshot = rover.snapshot()
+    if request.args.get('format') == 'bin':
+        return Response(snapshot.binary, mimetype='application/octet-stream')
+    return Response(snapshot.json, mimetype='application/json')
 
 @app.route('/api/control', methods=['POST'])
 def control():
@@ -433,6 +514,9 @@ def status():
         'arduino_port': arduino_port,
         'lidar_connected': lidar.connected if lidar else False,
         'lidar_port': lidar_port,
+        'lidar': lidar.freshness() if lidar else None,
+        'sensors': rover.sensor_health,
+        'governor': speed_governor.to_dict(),
         'ibus_connected': rover.ibus_connected,
         'mode': rover.mode,
         'host': rover.host_type,
@@ -462,19 +546,131 @@ def system_info():
         }
     })
 
+def parse_log_time(value: Optional[str], now: float) -> Optional[float]:
+    """?from= / ?to=: epoch seconds, seconds before now if <= 0, or ISO 8601"""
+    if not value:
+        return None
+    try:
+        t = float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+    return now + t if t <= 0 else t
+
 @app.route('/api/logs', methods=['GET'])
 def logs():
-    """Get telemetry logs"""
-    return jsonify({'logs': rover.telemetry_log})
+    """
+    Last 100 telemetry log lines, or with ?from=&to=&fields=[&limit=] the
+    flight recorder's frames in that range (columns; decimated to `limit`)
+    """
+    if not any(key in request.args for key in ('from', 'to', 'fields')):
+        return jsonify({'logs': list(rover.telemetry_log)})
+    if not flight_recorder:
+        return jsonify({'error': 'Flight recorder disabled'}), 503
+    try:
+        now = time.time()
+        start = parse_log_time(request.args.get('from'), now)
+        end = parse_log_time(request.args.get('to'), now)
+        fields = [f for f in request.args.get('fields', '').split(',') if f]
+        limit = max(1, min(request.args.get('limit', QUERY_LIMIT, type=int), 100000))
+        result = flight_recorder.query(start, end, fields, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'from': start,
+        'to': end,
+        'count': result['count'],
+        'step': result['step'],
+        'fields': FlightRecorder.to_lists(result['fields']),
+    })
+
+@app.route('/api/logs/stats', methods=['GET'])
+def logs_stats():
+    """Flight recorder segments, rows and disk use"""
+    if not flight_recorder:
+        return jsonify({'error': 'Flight recorder disabled'}), 503
+    return jsonify(flight_recorder.stats())
+
+@app.route('/api/history', methods=['GET'])
+def history():
+    """
+    Min/max/mean of battery, heading, pitch, roll and GPS speed over
+    ?from=&to= (default the last hour) in at most ?points= buckets.
+    Heading is in compass degrees [0, 360); a bucket with max < min
+    turned through north.
+    """
+    try:
+        now = time.time()
+        start = parse_log_time(request.args.get('from'), now)
+        end = parse_log_time(request.args.get('to'), now)
+        fields = [f for f in request.args.get('fields', '').split(',') if f]
+        points = max(1, min(request.args.get('points', HISTORY_POINTS, type=int), 5000))
+        return jsonify(rover.history.query(start, end, fields, points))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/history/stats', methods=['GET'])
+def history_stats():
+    """Telemetry history levels and time span"""
+    return jsonify(rover.history.stats())
 
 # ===== LIDAR 360° API =====
 @app.route('/api/lidar/scan', methods=['GET'])
 def get_lidar_scan():
-    """Get full 360° LIDAR scan data"""
+    """
+    Get full 360° LIDAR scan data (?format=bin for the binary wire format,
+    ?bins=N for N fixed min-range bins instead of raw points, ?xy=1 to add
+    Cartesian x/y in metres to the JSON)
+    """
     if not lidar:
         return jsonify({'error': 'LIDAR not connected', 'points': []}), 503
     
-    return jsonify(lidar.get_scan_dict())
+    num_bins = request.args.get('bins', type=int)
+    if request.args.get('format') == 'bin':
+        if num_bins:
+            binned = lidar.get_binned_scan(clamp_bins(num_bins))
+            data = encode_bins(binned, lidar.connected) if binned is not None else None
+        else:
+            data = lidar.get_scan_bytes()
+        if data is None:
+            return Response(status=204)
+        return Response(data, mimetype='application/octet-stream')
+    
+    cartesian = request.args.get('xy', 0, type=int) == 1
+    if num_bins:
+        return jsonify(lidar.get_binned_dict(clamp_bins(num_bins), cartesian=cartesian))
+    return jsonify(lidar.get_scan_dict(cartesian=cartesian))
+
+@app.route('/api/lidar/filters', methods=['GET'])
+def get_lidar_filters():
+    """Per-stage timing and rejection counts of the scan filter chain"""
+    if not lidar:
+        return jsonify({'error': 'LIDAR not connected', 'enabled': False}), 503
+    return jsonify(lidar.get_filter_stats())
+
+@app.route('/api/lidar/stats', methods=['GET'])
+def get_lidar_stats():
+    """Driver hot-path counters and timing histograms"""
+    if not lidar:
+        return jsonify({'error': 'LIDAR not connected', 'connected': False}), 503
+    return jsonify(lidar.get_stats())
+
+@app.route('/api/lidar/metrics', methods=['GET'])
+def get_lidar_metrics():
+    """Driver metrics in the Prometheus text format"""
+    if not lidar:
+        return Response('# LIDAR not connected\n', status=503, mimetype='text/plain')
+    return Response(lidar.get_prometheus_metrics(),
+                    mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/serial/stats', methods=['GET'])
+def get_serial_stats():
+    """Serial I/O design, reactor wakeups/dispatches and Arduino line/frame counts"""
+    return jsonify({
+        'mode': SERIAL_IO,
+        'telemetry': {'requested': ARDUINO_TELEMETRY, **arduino_telemetry},
+        'reactor': serial_reactor.stats() if serial_reactor else None,
+        'arduino': arduino_reader.stats() if arduino_reader else None,
+    })
 
 @app.route('/api/lidar/sectors', methods=['GET'])
 def get_lidar_sectors():
@@ -485,7 +681,8 @@ def get_lidar_sectors():
     num_sectors = request.args.get('sectors', 8, type=int)
     return jsonify({
         'connected': lidar.connected,
-        'sectors': lidar.get_sector_distances(num_sectors)
+        'sectors': lidar.get_sector_distances(num_sectors),
+        **lidar.freshness()
     })
 
 @app.route('/api/lidar/closest', methods=['GET'])
@@ -500,31 +697,49 @@ def get_lidar_closest():
             'connected': True,
             'angle': round(closest.angle, 1),
             'distance': closest.distance,
-            'intensity': closest.intensity
+            'intensity': closest.intensity,
+            **lidar.freshness()
         })
-    return jsonify({'connected': True, 'angle': None, 'distance': None})
+    return jsonify({'connected': True, 'angle': None, 'distance': None, **lidar.freshness()})
 
-@app.route('/api/lidar/obstacles', methods=['GET'])
-def get_lidar_obstacles():
-    """Get obstacles within specified range"""
+@app.route('/api/lidar/objects', methods=['GET'])
+def get_lidar_objects():
+    """Obstacle clusters of the latest scan with track id and velocity (?max_distance=mm)"""
     if not lidar:
-        return jsonify({'error': 'LIDAR not connected', 'obstacles': []}), 503
-    
-    min_angle = request.args.get('min_angle', 0, type=float)
-    max_angle = request.args.get('max_angle', 360, type=float)
-    max_distance = request.args.get('max_distance', 2000, type=float)
-    
-    obstacles = lidar.get_obstacles_in_range(min_angle, max_angle, max_distance)
+        return jsonify({'error': 'LIDAR not connected', 'objects': []}), 503
     
+    max_distance = request.args.get('max_distance', type=float)
     return jsonify({
         'connected': lidar.connected,
-        'count': len(obstacles),
-        'obstacles': [
-            {'angle': round(o.angle, 1), 'distance': o.distance, 'intensity': o.intensity}
-            for o in obstacles
-        ]
+        **obstacle_tracker.to_dict(max_distance),
+        **lidar.freshness()
     })
 
+# ===== ODOMETRY API =====
+@app.route('/api/odometry', methods=['GET'])
+def get_odometry():
+    """Scan-matched pose (x east, y north, m) and the latest pose delta"""
+    return jsonify(odometry.to_dict())
+
+@app.route('/api/odometry/reset', methods=['POST'])
+def reset_odometry():
+    """Restart odometry at the origin"""
+    def reset():
+        odometry.reset()
+        obstacle_tracker.reset()  # Tracks are in the odometry frame
+    run_mapping(reset)  # Not mid-scan on the mapping worker
+    return jsonify({'success': True})
+
+# ===== OCCUPANCY MAP API =====
+@app.route('/api/map/grid', methods=['GET'])
+def get_map_grid():
+    """Occupancy grid around the rover (binary grid frame, or ?format=png)"""
+    if not occupancy.updates:
+        return Response(status=204)
+    if request.args.get('format') == 'png':
+        return Response(run_mapping(occupancy.to_png), mimetype='image/png')
+    return Response(run_mapping(occupancy.to_bytes), mimetype='application/octet-stream')
+
 # ===== WAYPOINT NAVIGATION API =====
 @app.route('/api/navigation/waypoints', methods=['GET'])
 def get_waypoints():
@@ -557,11 +772,48 @@ def abort_navigation():
     return jsonify({'status': 'aborted'})
 
 # ===== WEBSOCKET EVENTS =====
+sio_lidar_formats = {}  # Socket.IO sid -> LIDAR scan format
+sio_lidar_streams = {}  # Socket.IO sid -> DeltaEncoder (delta format only)
+
 @socketio.on('connect')
 def handle_connect():
     print("[WS] Client connected")
+    sio_lidar_formats[request.sid] = LIDAR_FORMAT_JSON
+    join_room(LIDAR_FORMAT_JSON)
     emit('status', {'connected': rover.connected, 'mode': rover.mode})
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    sio_lidar_formats.pop(request.sid, None)
+    sio_lidar_streams.pop(request.sid, None)
+
+@socketio.on('lidar_format')
+def handle_lidar_format(data):
+    """
+    Choose 'lidar_scan' JSON events, 'lidar_scan_bin' binary events or
+    'lidar_delta' keyframe/delta frames ({format: 'delta', bins,
+    keyframe_interval, threshold})
+    """
+    fmt = data.get('format', LIDAR_FORMAT_JSON)
+    if fmt not in LIDAR_FORMATS:
+        emit('error', {'message': f'Invalid LIDAR format: {fmt}'})
+        return
+    leave_room(sio_lidar_formats.get(request.sid, LIDAR_FORMAT_JSON))
+    join_room(fmt)
+    sio_lidar_formats[request.sid] = fmt
+    if fmt == LIDAR_FORMAT_DELTA:
+        sio_lidar_streams[request.sid] = make_lidar_stream(data)
+    else:
+        sio_lidar_streams.pop(request.sid, None)
+    emit('lidar_format', {'format': fmt})
+
+@socketio.on('lidar_resync')
+def handle_lidar_resync(data=None):
+    """Client dropped a delta - send a keyframe with the next scan"""
+    stream = sio_lidar_streams.get(request.sid)
+    if stream:
+        stream.request_keyframe()
+
 @socketio.on('command')
 def handle_command(data):
     """Handle WebSocket commands"""
@@ -578,6 +830,8 @@ def handle_command(data):
 
 # ===== PLAIN WEBSOCKET SERVER (for RoverOS app) =====
 ws_clients = set()
+ws_lidar_formats = {}  # websocket -> LIDAR scan format
+ws_lidar_streams = {}  # websocket -> DeltaEncoder (delta format only)
 
 async def ws_handler(websocket, path):
     """Handle plain WebSocket connections from RoverOS app"""
@@ -605,6 +859,24 @@ async def ws_handler(websocket, path):
                     }))
                 elif msg_type == 'ping':
                     await websocket.send(json.dumps({'type': 'pong'}))
+                elif msg_type == 'lidar_format':
+                    # 'binary' switches lidar_scan messages to binary frames,
+                    # 'delta' to keyframes + deltas (bins, keyframe_interval, threshold)
+                    fmt = data.get('format', LIDAR_FORMAT_JSON)
+                    if fmt in LIDAR_FORMATS:
+                        ws_lidar_formats[websocket] = fmt
+                        if fmt == LIDAR_FORMAT_DELTA:
+                            ws_lidar_streams[websocket] = make_lidar_stream(data)
+                        else:
+                            ws_lidar_streams.pop(websocket, None)
+                    await websocket.send(json.dumps({
+                        'type': 'lidar_format',
+                        'format': ws_lidar_formats.get(websocket, LIDAR_FORMAT_JSON)
+                    }))
+                elif msg_type == 'lidar_resync':
+                    stream = ws_lidar_streams.get(websocket)
+                    if stream:
+                        stream.request_keyframe()
                 elif msg_type == 'command':
                     cmd = data.get('command', {})
                     if cmd.get('type') == 'move':
@@ -617,34 +889,74 @@ async def ws_handler(websocket, path):
         pass
     finally:
         ws_clients.discard(websocket)
+        ws_lidar_formats.pop(websocket, None)
+        ws_lidar_streams.pop(websocket, None)
         print(f"[WS-PLAIN] Client {client_id} disconnected")
 
 async def ws_broadcast_loop():
     """Broadcast telemetry and LIDAR data to all plain WebSocket clients"""
+    last_odometry_seq = None
+    last_objects_seq = None
+    telemetry_version = None
+    telemetry_msg = None
     while True:
         if ws_clients:
-            # Broadcast telemetry
-            telemetry_msg = json.dumps({
-                'type': 'telemetry',
-                'data': rover.to_dict()
-            })
+            # Broadcast telemetry, re-encoded only when the snapshot changed
+            snapshot = rover.snapshot()
+            if snapshot.version != telemetry_version:
+                telemetry_version = snapshot.version
+                telemetry_msg = '{"type":"telemetry","data":' + snapshot.json + '}'
+            
+            # Send to all clients (copy set to avoid modification during iteration)
+            clients_snapshot = list(ws_clients)
+            formats = {ws_lidar_formats.get(c, LIDAR_FORMAT_JSON) for c in clients_snapshot}
             
-            # Broadcast LIDAR if available
-            lidar_msg = None
+            # Broadcast LIDAR if available, encoded once per format in use
+            lidar_msgs = {}
+            scan = None
             if lidar and lidar.last_complete_scan:
                 scan = lidar.last_complete_scan
-                lidar_msg = json.dumps({
-                    'type': 'lidar_scan',
-                    'data': [{'angle': p.angle, 'distance': p.distance, 'timestamp': time.time()} 
-                             for p in scan.points[:360]]
-                })
+                binned = lidar.get_binned_scan(360) if LIDAR_FORMAT_JSON in formats else None
+                if binned is not None:
+                    # One closest return per degree (bin centres), all the way round
+                    now = time.time()
+                    hit = binned.distances > 0
+                    lidar_msgs[LIDAR_FORMAT_JSON] = json.dumps({
+                        'type': 'lidar_scan',
+                        'data': [{'angle': a, 'distance': d, 'timestamp': now}
+                                 for a, d in zip(binned.angles[hit].tolist(), binned.distances[hit].tolist())]
+                    })
+                if LIDAR_FORMAT_BINARY in formats:
+                    lidar_msgs[LIDAR_FORMAT_BINARY] = lidar.get_scan_bytes()
+            
+            # Pose deltas go out once per matched scan
+            odom_msg = None
+            delta = odometry.last_delta
+            if delta is not None and delta.seq != last_odometry_seq:
+                last_odometry_seq = delta.seq
+                odom_msg = json.dumps({'type': 'odometry', 'data': odometry.to_dict()})
+            
+            objects_msg = None
+            if obstacle_tracker.seq != last_objects_seq:
+                last_objects_seq = obstacle_tracker.seq
+                objects_msg = json.dumps({'type': 'lidar_objects', 'data': obstacle_tracker.to_dict()})
             
-            # Send to all clients (copy set to avoid modification during iteration)
             disconnected = set()
-            clients_snapshot = list(ws_clients)
             for client in clients_snapshot:
                 try:
                     await client.send(telemetry_msg)
+                    if odom_msg:
+                        await client.send(odom_msg)
+                    if objects_msg:
+                        await client.send(objects_msg)
+                    stream = ws_lidar_streams.get(client)
+                    if stream:
+                        # Only new scans (or a requested keyframe) go out
+                        lidar_msg = None
+                        if scan and stream.last_source_seq != scan.seq:
+                            lidar_msg = encode_lidar_delta(stream)
+                    else:
+                        lidar_msg = lidar_msgs.get(ws_lidar_formats.get(client, LIDAR_FORMAT_JSON))
                     if lidar_msg:
                         await client.send(lidar_msg)
                 except:
@@ -687,6 +999,8 @@ if __name__ == '__main__':
     print("  LIDAR: YDLIDAR T-mini Plus (360° Scanner)")
     print("="*60 + "\n")
     
+    open_flight_recorder()
+    
     # Connect to Arduino
     if not connect_arduino():
         print("[WARN] Arduino not found, running in demo mode...")
@@ -696,7 +1010,9 @@ if __name__ == '__main__':
         print("[WARN] LIDAR not found, SLAM disabled...")
     
     # Start background threads
-    threading.Thread(target=read_telemetry_thread, daemon=True).start()
+    if serial_reactor:
+        serial_reactor.start()
+    start_arduino_reader()
     threading.Thread(target=rc_control_thread, daemon=True).start()
     
     # Start plain WebSocket server for RoverOS app
@@ -719,6 +1035,9 @@ if __name__ == '__main__':
                 print("[OK] Arduino disconnected")
             except:
                 pass
+        if flight_recorder:
+            flight_recorder.close()
+            print("[OK] Flight recorder flushed")
         print("[OK] Goodbye")
     
     # Register cleanup handlers
@@ -730,9 +1049,12 @@ if __name__ == '__main__':
     print(f"[INIT] Starting server on {WEB_HOST}:{WEB_PORT}")
     print("[INIT] API Endpoints:")
     print("       /api/telemetry     - Rover telemetry")
-    print("       /api/lidar/scan    - 360° LIDAR scan")
+    print("       /api/lidar/scan    - 360° LIDAR scan (?format=bin for binary)")
     print("       /api/lidar/sectors - Sector distances")
     print("       /api/lidar/closest - Closest obstacle")
+    print("       /api/lidar/objects - Tracked obstacle clusters")
+    print("       /api/odometry      - Scan-matched pose")
+    print("       /api/map/grid      - Occupancy grid (?format=png for an image)")
     if WEBSOCKETS_AVAILABLE:
         print(f"[INIT] WebSocket: ws://{WEB_HOST}:{WS_PORT} (plain WebSocket for RoverOS)")
     print("[INIT] Press Ctrl+C to stop\n")
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Rover State and Telemetry Snapshots
+================================================================================
+RoverState holds the latest Arduino telemetry plus mode/connection flags.
+Consumers (Socket.IO emit per telemetry update, the plain WebSocket
+broadcast, /api/telemetry) read it through snapshot(): an immutable
+TelemetrySnapshot built once after the state changes, numbered by
+`version`, whose JSON and binary encodings are made on first use and
+then shared by every consumer until the next change.
+
+Fields that appear in the snapshot are tracked: assigning one marks the
+state dirty, whoever assigns it (update_from_arduino, mode changes,
+IBUS replies). snapshot() clears the flag before reading the fields, so
+a write racing a build just causes one more build.
+
+Binary snapshot (little-endian, 78 bytes, /api/telemetry?format=bin):
+
+    offset  size  field
+    0       2     magic 'RT'
+    2       1     format version (1)
+    3       1     flags (bit 0: Arduino connected, bit 1: iBUS connected)
+    4       4     snapshot version
+    8       8     timestamp, ms since epoch
+    16      4     int32 GPS latitude, 1e-7 degree
+    20      4     int32 GPS longitude, 1e-7 degree
+    24      2     GPS speed, 0.1 km/h
+    26      2     GPS accuracy (HDOP)
+    28      1     satellites
+    29      1     mode (0 MANUAL, 1 RC, 2 AUTONOMOUS, 255 other)
+    30      2     heading, 0.1 degree
+    32      2     int16 pitch, 0.1 degree
+    34      2     int16 roll, 0.1 degree
+    36      6     int16 accel x, y, z, 0.01 g
+    42      2     TF Mini distance (cm)
+    44      10    5 x ultrasonic distance (cm; missing sensors 0)
+    54      20    10 x iBUS channel (us; missing channels 1500)
+    74      2     iBUS frame rate
+    76      2     battery, 0.1 %
+
+decode_snapshot() is the reference decoder.
+================================================================================
+"""
+
+import json
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from heading_history import HeadingHistory
+from telemetry_history import TelemetryHistory
+
+SNAPSHOT_MAGIC = b'RT'
+SNAPSHOT_FORMAT = 1
+SNAPSHOT = struct.Struct('<2sBBIQiiHHBBHhhhhhH5H10HHH')
+FLAG_CONNECTED = 0x01
+FLAG_IBUS_CONNECTED = 0x02
+MODES = ('MANUAL', 'RC', 'AUTONOMOUS')
+SNAPSHOT_ULTRASONIC = 5   # Fixed counts in the binary layout; the Arduino's lists
+SNAPSHOT_CHANNELS = 10    # are padded (0 cm, 1500 us center) or truncated to fit
+
+
+def _u16(value) -> int:
+    return min(max(int(value), 0), 0xFFFF)
+
+
+def _i16(value) -> int:
+    return min(max(int(value), -0x8000), 0x7FFF)
+
+
+def _fixed(values, count: int, fill: int) -> list:
+    values = list(values[:count])
+    return values + [fill] * (count - len(values))
+
+
+class TelemetrySnapshot:
+    """One immutable view of RoverState; encodings are cached on first use"""
+
+    __slots__ = ('version', 'timestamp', '_data', '_json', '_binary')
+
+    def __init__(self, version: int, timestamp: float, data: dict):
+        self.version = version
+        self.timestamp = timestamp
+        self._data = data
+        self._json = None
+        self._binary = None
+
+    def to_dict(self) -> dict:
+        """The snapshot dict itself, shared by all callers: don't modify it"""
+        return self._data
+
+    @property
+    def json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self._data, separators=(',', ':'))
+        return self._json
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            d = self._data
+            gps, imu, ibus = d['gps'], d['imu'], d['ibus']
+            mode = MODES.index(d['mode']) if d['mode'] in MODES else 255
+            self._binary = SNAPSHOT.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_FORMAT,
+                (FLAG_CONNECTED if d['connected'] else 0) |
+                (FLAG_IBUS_CONNECTED if ibus['connected'] else 0),
+                self.version & 0xFFFFFFFF, d['timestamp'],
+                round(gps['lat'] * 1e7), round(gps['lng'] * 1e7),
+                _u16(round(gps['speed'] * 10)), _u16(gps['accuracy']),
+                min(max(int(gps['satellites']), 0), 255), mode,
+                _u16(round(imu['heading'] * 10)), _i16(round(imu['pitch'] * 10)),
+                _i16(round(imu['roll'] * 10)),
+                _i16(round(imu['accelX'] * 100)), _i16(round(imu['accelY'] * 100)),
+                _i16(round(imu['accelZ'] * 100)),
+                _u16(d['lidar'][0]['distance']),
+                *(_u16(u) for u in _fixed(d['ultrasonic'], SNAPSHOT_ULTRASONIC, 0)),
+                *(_u16(ch) for ch in _fixed(ibus['channels'], SNAPSHOT_CHANNELS, 1500)),
+                _u16(ibus['frameRate']), _u16(round(d['battery'] * 10)))
+        return self._binary
+
+
+def decode_snapshot(data: bytes) -> dict:
+    """Reference decoder for TelemetrySnapshot.binary (same layout as to_dict)"""
+    f = SNAPSHOT.unpack_from(data)
+    if f[0] != SNAPSHOT_MAGIC or f[1] != SNAPSHOT_FORMAT:
+        raise ValueError(f"not a telemetry snapshot (magic {f[0]!r}, format {f[1]})")
+    return {
+        'version': f[3],
+        'timestamp': f[4],
+        'gps': {'lat': f[5] / 1e7, 'lng': f[6] / 1e7, 'speed': f[7] / 10,
+                'accuracy': f[8], 'satellites': f[9]},
+        'imu': {'heading': f[11] / 10, 'pitch': f[12] / 10, 'roll': f[13] / 10,
+                'accelX': f[14] / 100, 'accelY': f[15] / 100, 'accelZ': f[16] / 100},
+        'lidar': [{'angle': 0, 'distance': f[17]}],
+        'ultrasonic': list(f[18:23]),
+        'battery': f[34] / 10,
+        'mode': MODES[f[10]] if f[10] < len(MODES) else 'UNKNOWN',
+        'connected': bool(f[2] & FLAG_CONNECTED),
+        'ibus': {'connected': bool(f[2] & FLAG_IBUS_CONNECTED),
+                 'channels': list(f[23:33]), 'frameRate': f[33]},
+    }
+
+
+class _Tracked:
+    """Slot-backed attribute whose assignment marks the snapshot dirty"""
+
+    __slots__ = ('slot',)
+
+    def __set_name__(self, owner, name):
+        self.slot = getattr(owner, '_' + name)  # The __slots__ member descriptor
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.slot.__get__(obj, owner)
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+        obj._dirty = True
+
+
+class RoverState:
+    __slots__ = (
+        # Telemetry (tracked: backing slots for the _Tracked attributes below)
+        '_battery', '_heading', '_pitch', '_roll', '_accel', '_lidar_distance', '_ultrasonic',
+        '_gps_lat', '_gps_lng', '_gps_speed', '_gps_accuracy', '_gps_satellites',
+        '_ibus_connected', '_ibus_channels', '_ibus_frame_rate', '_mode', '_connected',
+        # Not part of the snapshot
+        'speed', 'heading_history', 'history', 'sensor_health', 'last_update',
+        'telemetry_log', 'max_log_entries', 'host_type', 'host_os',
+        '_dirty', '_snapshot', '_version', '_snapshot_lock',
+    )
+
+    battery = _Tracked()
+    heading = _Tracked()
+    pitch = _Tracked()
+    roll = _Tracked()
+    accel = _Tracked()
+    lidar_distance = _Tracked()
+    ultrasonic = _Tracked()
+    gps_lat = _Tracked()
+    gps_lng = _Tracked()
+    gps_speed = _Tracked()
+    gps_accuracy = _Tracked()
+    gps_satellites = _Tracked()
+    ibus_connected = _Tracked()
+    ibus_channels = _Tracked()
+    ibus_frame_rate = _Tracked()
+    mode = _Tracked()
+    connected = _Tracked()
+
+    def __init__(self):
+        # Telemetry
+        self.speed = 0.0
+        self.battery = 85.0
+        self.heading = 0.0
+        self.pitch = 0.0
+        self.roll = 0.0
+        self.accel = {'x': 0, 'y': 0, 'z': 0}
+        self.heading_history = HeadingHistory()  # Timestamped IMU headings for LIDAR de-skew
+        self.lidar_distance = 0
+        self.ultrasonic = [0, 0, 0, 0, 0]
+
+        # GPS
+        self.gps_lat = 0.0
+        self.gps_lng = 0.0
+        self.gps_speed = 0.0
+        self.gps_accuracy = 0
+        self.gps_satellites = 0
+
+        # iBUS RC Control (10 channels from FlySky FS-IA10B)
+        self.ibus_connected = False
+        self.ibus_channels = [1500] * 10  # Default center position
+        self.ibus_frame_rate = 0
+        self.sensor_health = {}  # Last STATUS reply: {ibus, lidar, imu, gps, husky}
+
+        # System
+        self.mode = "MANUAL"
+        self.connected = False
+        self.last_update = None
+        self.history = TelemetryHistory()  # 1 s / 10 s / 1 min aggregates for /api/history
+        self.max_log_entries = 100
+        self.telemetry_log = deque(maxlen=self.max_log_entries)  # Full history: flight_recorder
+
+        # Host info
+        self.host_type = "Mini PC"
+        self.host_os = "Ubuntu"
+
+        # Snapshot cache
+        self._dirty = True
+        self._snapshot = None
+        self._version = 0
+        self._snapshot_lock = threading.Lock()
+
+    def update_from_arduino(self, data):
+        """Update state from Arduino telemetry (JSON line or decoded binary frame)"""
+        try:
+            now = time.time()
+
+            # GPS
+            if 'gps' in data:
+                self.gps_lat = data['gps'].get('lat', 0)
+                self.gps_lng = data['gps'].get('lng', 0)
+                self.gps_speed = data['gps'].get('spd', 0)
+                self.gps_accuracy = data['gps'].get('acc', 0)
+                self.gps_satellites = data['gps'].get('sat', 0)
+
+            # IMU
+            if 'imu' in data:
+                self.heading = data['imu'].get('hdg', 0)
+                self.heading_history.append(now, self.heading)
+                self.pitch = data['imu'].get('pitch', 0)
+                self.roll = data['imu'].get('roll', 0)
+                self.accel = {
+                    'x': data['imu'].get('ax', 0),
+                    'y': data['imu'].get('ay', 0),
+                    'z': data['imu'].get('az', 0)
+                }
+
+            # Sensors
+            self.lidar_distance = data.get('lidar', 0)
+            self.ultrasonic = data.get('ultra', [0]*5)
+            self.battery = data.get('bat', 85)
+
+            # iBUS RC
+            if 'ibus' in data:
+                self.ibus_connected = data['ibus'].get('con', False)
+                self.ibus_channels = data['ibus'].get('ch', [1500]*10)
+
+            self.history.add(now, (self.battery, self.heading, self.pitch, self.roll, self.gps_speed))
+            self.last_update = datetime.now().isoformat()
+
+            # Log entry
+            log_entry = f"[{self.last_update[:19]}] HDG:{self.heading:.0f}° BAT:{self.battery:.0f}%"
+            self.telemetry_log.append(log_entry)
+
+        except Exception as e:
+            print(f"[ERROR] Failed to parse telemetry: {e}")
+
+    def snapshot(self) -> TelemetrySnapshot:
+        """Current snapshot, rebuilt only if a tracked field changed since the last one"""
+        with self._snapshot_lock:
+            if self._dirty:
+                self._dirty = False  # Before reading: a concurrent write re-dirties
+                self._version += 1
+                now = time.time()
+                self._snapshot = TelemetrySnapshot(self._version, now, self._snapshot_dict(now))
+            return self._snapshot
+
+    def _snapshot_dict(self, now: float) -> dict:
+        accel = self.accel
+        return {
+            'timestamp': int(now * 1000),
+            'gps': {
+                'lat': round(self.gps_lat, 6),
+                'lng': round(self.gps_lng, 6),
+                'speed': round(self.gps_speed, 1),
+                'accuracy': self.gps_accuracy,
+                'satellites': self.gps_satellites
+            },
+            'imu': {
+                'heading': round(self.heading, 1),
+                'pitch': round(self.pitch, 1),
+                'roll': round(self.roll, 1),
+                'accelX': round(accel['x'], 2),
+                'accelY': round(accel['y'], 2),
+                'accelZ': round(accel['z'], 2)
+            },
+            'lidar': [
+                {'angle': 0, 'distance': self.lidar_distance}
+            ],
+            'ultrasonic': list(self.ultrasonic),
+            'battery': round(self.battery, 1),
+            'motorLeft': 0,
+            'motorRight': 0,
+            'mode': self.mode,
+            'connected': self.connected,
+            'ibus': {
+                'connected': self.ibus_connected,
+                'channels': list(self.ibus_channels),
+                'frameRate': self.ibus_frame_rate
+            }
+        }
+
+    def to_dict(self):
+        """Convert state to dictionary for JSON/WebSocket (the current snapshot's)"""
+        return self.snapshot().to_dict()
+
+    def get_rc_control(self):
+        """Convert iBUS channels to throttle/steering"""
+        if not self.ibus_connected:
+            return 0, 0
+
+        # Channel mapping (FlySky FS-I6x default):
+        # CH1 = Roll/Aileron (steering)
+        # CH2 = Pitch/Elevator
+        # CH3 = Throttle
+        # CH4 = Yaw/Rudder
+        # CH5-10 = Aux switches
+
+        throttle_raw = self.ibus_channels[2]  # CH3
+        steering_raw = self.ibus_channels[0]  # CH1
+
+        # Convert 1000-2000 to -100..100
+        throttle = int((throttle_raw - 1500) / 5)  # ±100
+        steering = int((steering_raw - 1500) / 5)  # ±100
+
+        return throttle, steering
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+LIDAR Scan-Matching Odometry
+================================================================================
+Estimates the rover's 2D motion between consecutive LidarScans with a
+correlative scan matcher (coarse-to-fine grid search, NumPy only).
+
+Each scan becomes the reference for the next one: its points are drawn
+into a likelihood grid (Gaussian falloff around every return) and a 4x
+coarser max-pooled copy. The next scan is scored at every candidate
+rotation and translation by summing the grid under its transformed
+points - first over a wide window on the coarse grid, then over a
+one-coarse-cell window on the fine grid, with a parabolic fit around the
+best cell for sub-cell accuracy. The rotation search is centred on the
+IMU heading change and deviations from it are penalised; the translation
+search is centred on the previous motion (constant velocity).
+
+Rover frame: x = right, y = forward (metres); rotations are clockwise
+degrees like compass headings and LIDAR angles. ScanOdometry integrates
+the deltas into a world pose with x = east, y = north, the frame used by
+occupancy_grid.
+================================================================================
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass
+class PoseDelta:
+    """Motion from the previous scan to this one, in the previous rover frame"""
+    right: float       # Metres
+    forward: float     # Metres
+    dtheta: float      # Degrees, clockwise
+    score: float       # Mean likelihood of the matched points (0-1)
+    ok: bool           # False when the match was rejected and the prior used
+    seq: int = 0
+    timestamp: float = 0.0
+    match_time: float = 0.0  # Seconds spent matching
+
+
+class ScanMatcher:
+    """Correlative scan-to-scan matcher"""
+
+    def __init__(self, resolution: float = 0.05, extent: float = 10.0,
+                 coarse_factor: int = 4, sigma: float = 0.05,
+                 search_xy: float = 0.4, search_deg: float = 8.0,
+                 coarse_deg_step: float = 1.0, fine_deg_step: float = 0.25,
+                 heading_sigma: float = 2.0, prior_weight: float = 0.05,
+                 max_points: int = 400, min_score: float = 0.25):
+        self.resolution = resolution
+        self.coarse_factor = coarse_factor
+        self.coarse_resolution = resolution * coarse_factor
+        # Fine grid covers [-extent, extent) in both axes, a multiple of the coarse cell
+        self.cells = int(math.ceil(2 * extent / self.coarse_resolution)) * coarse_factor
+        self.extent = self.cells * resolution / 2
+        self.sigma = sigma
+        self.search_xy = search_xy
+        self.search_deg = search_deg
+        self.coarse_deg_step = coarse_deg_step
+        self.fine_deg_step = fine_deg_step
+        self.heading_sigma = heading_sigma
+        self.prior_weight = prior_weight
+        self.max_points = max_points
+        self.min_score = min_score
+
+        self.coarse_pad = int(math.ceil(search_xy / self.coarse_resolution)) + 1
+        self.fine_pad = coarse_factor + 1
+        self._fine = None    # Padded likelihood grids of the reference scan
+        self._coarse = None
+
+    def _points(self, scan):
+        """(angles rad, ranges m) of usable returns, subsampled to max_points"""
+        ranges = scan.distances.astype(np.float32) * np.float32(0.001)
+        keep = (ranges > 0.15) & (ranges < self.extent - self.search_xy - self.coarse_resolution)
+        angles = np.radians(scan.angles[keep].astype(np.float32))
+        ranges = ranges[keep]
+        if len(ranges) > self.max_points:
+            stride = int(math.ceil(len(ranges) / self.max_points))
+            angles = angles[::stride]
+            ranges = ranges[::stride]
+        return angles, ranges
+
+    def set_reference(self, scan):
+        """Build the likelihood grids that the next scan is matched against"""
+        angles, ranges = self._points(scan)
+        n = self.cells
+        grid = np.zeros((n, n), dtype=np.float32)
+        cols = ((ranges * np.sin(angles) + self.extent) / self.resolution).astype(np.intp)
+        rows = ((ranges * np.cos(angles) + self.extent) / self.resolution).astype(np.intp)
+        inside = (rows >= 0) & (rows < n) & (cols >= 0) & (cols < n)
+        grid[rows[inside], cols[inside]] = 1.0
+
+        # Separable max-of-Gaussian falloff: likelihood = exp(-d^2 / 2 sigma^2)
+        radius = int(math.ceil(2 * self.sigma / self.resolution))
+        weights = np.exp(-0.5 * ((np.arange(-radius, radius + 1) * self.resolution) / self.sigma) ** 2)
+        for axis in (0, 1):
+            blurred = grid.copy()
+            for offset, w in zip(range(-radius, radius + 1), weights):
+                if offset:
+                    shifted = np.roll(grid, offset, axis=axis) * np.float32(w)
+                    np.maximum(blurred, shifted, out=blurred)
+            grid = blurred
+
+        f = self.coarse_factor
+        coarse = grid.reshape(n // f, f, n // f, f).max(axis=(1, 3))
+        self._fine = self._pad(grid, self.fine_pad)
+        self._coarse = self._pad(coarse, self.coarse_pad)
+
+    def reset(self):
+        """Forget the reference scan"""
+        self._fine = self._coarse = None
+
+    @staticmethod
+    def _pad(grid: np.ndarray, pad: int) -> np.ndarray:
+        """
+        Zero border of `pad` cells for the translation search, plus a zero
+        block below the grid where points that fall outside are parked.
+        """
+        n = grid.shape[0]
+        out = np.zeros((n + 4 * pad + 1, n + 2 * pad), dtype=np.float32)
+        out[pad:pad + n, pad:pad + n] = grid
+        return out
+
+    def _search(self, grid: np.ndarray, pad: int, resolution: float,
+                angles, ranges, thetas, center, radius: int, prior: float):
+        """
+        Score every rotation in `thetas` and every shift within `radius`
+        cells of `center` (right, forward). Returns (scores[rot, dy, dx], shifts).
+        """
+        height, width = grid.shape
+        n = width - 2 * pad
+        a = angles[None, :] + np.radians(thetas.astype(np.float32))[:, None]
+        x = ranges * np.sin(a) + np.float32(center[0] + self.extent)
+        y = ranges * np.cos(a) + np.float32(center[1] + self.extent)
+        cols = np.floor(x / resolution).astype(np.intp)
+        rows = np.floor(y / resolution).astype(np.intp)
+        inside = (rows >= 0) & (rows < n) & (cols >= 0) & (cols < n)
+        flat = np.where(inside, (rows + pad) * width + cols + pad,
+                        (n + 3 * pad) * width + pad)
+
+        shifts = np.arange(-radius, radius + 1)
+        offsets = (shifts[:, None] * width + shifts[None, :]).reshape(-1)
+        values = grid.reshape(-1)[flat[:, :, None] + offsets[None, None, :]]
+        scores = values.sum(axis=1) / max(len(ranges), 1)
+        penalty = self.prior_weight * ((thetas - prior) / self.heading_sigma) ** 2
+        scores -= penalty[:, None].astype(np.float32)
+        return scores.reshape(len(thetas), len(shifts), len(shifts)), shifts
+
+    def match(self, scan, prior_dtheta: float = 0.0,
+              prior_motion=(0.0, 0.0)) -> Optional[PoseDelta]:
+        """
+        Motion from the reference scan to `scan`, then make `scan` the
+        reference. Returns None for the first scan.
+        """
+        start = time.perf_counter()
+        if self._fine is None:
+            self.set_reference(scan)
+            return None
+        angles, ranges = self._points(scan)
+
+        # Coarse: wide window, 1 degree steps
+        span = self.search_deg
+        thetas = prior_dtheta + np.arange(-span, span + 1e-9, self.coarse_deg_step)
+        scores, shifts = self._search(self._coarse, self.coarse_pad, self.coarse_resolution,
+                                      angles, ranges, thetas, prior_motion,
+                                      self.coarse_pad - 1, prior_dtheta)
+        k, iy, ix = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        theta = float(thetas[k])
+        center = (prior_motion[0] + shifts[ix] * self.coarse_resolution,
+                  prior_motion[1] + shifts[iy] * self.coarse_resolution)
+
+        # Fine: one coarse cell / step around the coarse optimum
+        step = self.coarse_deg_step
+        thetas = theta + np.arange(-step, step + 1e-9, self.fine_deg_step)
+        scores, shifts = self._search(self._fine, self.fine_pad, self.resolution,
+                                      angles, ranges, thetas, center,
+                                      self.coarse_factor, prior_dtheta)
+        k, iy, ix = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        best = float(scores[k, iy, ix]) + self.prior_weight * (
+            (thetas[k] - prior_dtheta) / self.heading_sigma) ** 2
+
+        theta = float(thetas[k]) + _vertex(scores[:, iy, ix], k) * self.fine_deg_step
+        right = center[0] + (shifts[ix] + _vertex(scores[k, iy, :], ix)) * self.resolution
+        forward = center[1] + (shifts[iy] + _vertex(scores[k, :, ix], iy)) * self.resolution
+
+        ok = best >= self.min_score
+        if not ok:
+            right, forward = prior_motion
+            theta = prior_dtheta
+        self.set_reference(scan)
+        return PoseDelta(right=right, forward=forward, dtheta=theta, score=best, ok=ok,
+                         seq=scan.seq, timestamp=scan.timestamp,
+                         match_time=time.perf_counter() - start)
+
+
+def _vertex(values: np.ndarray, i: int) -> float:
+    """Sub-sample offset of the peak at i from a parabola through i-1, i, i+1"""
+    if i <= 0 or i >= len(values) - 1:
+        return 0.0
+    left, mid, right = float(values[i - 1]), float(values[i]), float(values[i + 1])
+    denom = left - 2 * mid + right
+    if denom >= 0:
+        return 0.0
+    return max(-0.5, min(0.5, 0.5 * (left - right) / denom))
+
+
+class ScanOdometry:
+    """
+    Integrates scan-matcher deltas into a world pose (x east, y north,
+    compass heading). With an IMU heading the pose heading follows the IMU
+    (no drift) and the matched rotation only refines the translation.
+    """
+
+    def __init__(self, matcher: Optional[ScanMatcher] = None):
+        self.matcher = matcher or ScanMatcher()
+        self.x = 0.0
+        self.y = 0.0
+        self.heading = 0.0
+        self.speed = 0.0  # m/s over the last accepted match
+        self.last_delta: Optional[PoseDelta] = None
+        self.matches = 0
+        self.rejected = 0
+        self._last_imu: Optional[float] = None
+
+    @property
+    def pose(self):
+        return self.x, self.y, self.heading
+
+    def update(self, scan, imu_heading: Optional[float] = None) -> Optional[PoseDelta]:
+        """Match `scan` against the previous one and advance the pose"""
+        if imu_heading is not None and self._last_imu is not None:
+            prior = (imu_heading - self._last_imu + 180.0) % 360.0 - 180.0
+        else:
+            prior = self.last_delta.dtheta if self.last_delta else 0.0
+        motion = ((self.last_delta.right, self.last_delta.forward)
+                  if self.last_delta and self.last_delta.ok else (0.0, 0.0))
+
+        delta = self.matcher.match(scan, prior, motion)
+        if delta is None:
+            if imu_heading is not None:
+                self.heading = imu_heading
+        else:
+            h = math.radians(self.heading)
+            self.x += delta.right * math.cos(h) + delta.forward * math.sin(h)
+            self.y += -delta.right * math.sin(h) + delta.forward * math.cos(h)
+            self.heading = (imu_heading if imu_heading is not None
+                            else self.heading + delta.dtheta) % 360.0
+            self.matches += 1
+            self.rejected += not delta.ok
+            if delta.ok and self.last_delta is not None:
+                dt = delta.timestamp - self.last_delta.timestamp
+                if dt > 0:
+                    self.speed = math.hypot(delta.right, delta.forward) / dt
+            self.last_delta = delta
+        self._last_imu = imu_heading
+        return delta
+
+    def reset(self):
+        self.x = self.y = 0.0
+        self.speed = 0.0
+        self.last_delta = None
+        self._last_imu = None
+        self.matcher.reset()
+
+    def to_dict(self) -> dict:
+        d = self.last_delta
+        return {
+            'x': round(self.x, 3),
+            'y': round(self.y, 3),
+            'heading': round(self.heading, 1),
+            'speed': round(self.speed, 2),
+            'matches': self.matches,
+            'rejected': self.rejected,
+            'delta': None if d is None else {
+                'right': round(d.right, 3),
+                'forward': round(d.forward, 3),
+                'dtheta': round(d.dtheta, 2),
+                'score': round(d.score, 3),
+                'ok': d.ok,
+                'seq': d.seq,
+                'timestamp': int(d.timestamp * 1000),
+            },
+        }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Serial I/O Reactor
+================================================================================
+One thread that owns the serial file descriptors (Arduino, LIDAR) and
+sleeps in selectors.DefaultSelector until bytes arrive or a timer is
+due, then dispatches to the device's reader callback. Replaces a polling
+or blocking-read thread per device.
+
+In rover_controller, eventlet.monkey_patch() runs first, so the thread
+is a green thread and DefaultSelector is eventlet's select()-based one:
+each wait yields to the eventlet hub, which keeps reader callbacks (and
+their Socket.IO emits) on the hub. Only an unpatched process (tools,
+SERIAL_IO benchmarks without --eventlet) gets epoll on Linux. With two
+descriptors select() costs the same; stats() reports which selector is
+in use.
+
+Callbacks run on the reactor thread and must not block: readers read
+what is available (non-blocking) and return. Timers are one-shot; a
+timer callback that returns a number is rescheduled that many seconds
+later, which is how periodic housekeeping (LIDAR stall detection and
+recovery steps) runs without a wakeup per byte. Recovery serial I/O is
+non-blocking too; the USB reset's sysfs writes and ioctl are the one
+inline kernel wait left (bench_serial_reactor.py --stall measures the
+telemetry gap while recovering).
+
+add_reader(), remove_reader() and call_later() may be called from any
+thread; calls from other threads are handed to the reactor through a
+self-pipe so the selector is only touched by its own thread.
+================================================================================
+"""
+
+import heapq
+import itertools
+import os
+import selectors
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+class SerialReactor:
+    """selectors-based event loop for serial readers and timers"""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._timers: list = []  # Heap of (when, seq, callback)
+        self._seq = itertools.count()
+        self._pending: deque = deque()
+        self._names: Dict[int, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self.wakeups = 0
+        self.timer_calls = 0
+        self.dispatches: Dict[str, int] = {}
+        self.errors = 0
+
+    # ----- Registration (any thread) -----
+
+    def add_reader(self, fileobj, callback: Callable[[], None], name: str = ''):
+        """Call `callback()` whenever `fileobj` (fd or object with fileno()) is readable"""
+        if not self._on_reactor():
+            return self.call_soon_threadsafe(self.add_reader, fileobj, callback, name)
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        self.remove_reader(fd)  # The fd number may be a reopened device
+        self._selector.register(fd, selectors.EVENT_READ, callback)
+        self._names[fd] = name or str(fd)
+
+    def remove_reader(self, fd: int):
+        if not self._on_reactor():
+            return self.call_soon_threadsafe(self.remove_reader, fd)
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+        self._names.pop(fd, None)
+
+    def call_later(self, delay: float, callback: Callable[[], Optional[float]]):
+        """Run `callback()` after `delay` s; a numeric return value reschedules it"""
+        if not self._on_reactor():
+            return self.call_soon_threadsafe(self.call_later, delay, callback)
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._seq), callback))
+
+    def call_soon_threadsafe(self, fn: Callable, *args):
+        """Run fn(*args) on the reactor thread at its next wakeup"""
+        self._pending.append((fn, args))
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass  # Pipe already full of wakeups
+
+    def _on_reactor(self) -> bool:
+        thread = self._thread
+        return thread is None or not thread.is_alive() or threading.current_thread() is thread
+
+    # ----- Loop -----
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self.run, daemon=True, name='serial-reactor')
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self.call_soon_threadsafe(lambda: None)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def run(self):
+        if self._thread is None:
+            self._thread = threading.current_thread()
+        self.running = True
+        while self.running:
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            events = self._selector.select(timeout)
+            self.wakeups += 1
+
+            for key, _ in events:
+                if key.data is None:
+                    try:
+                        while os.read(self._wake_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                name = self._names.get(key.fd, '?')
+                self.dispatches[name] = self.dispatches.get(name, 0) + 1
+                self._call(key.data)
+
+            while self._pending:
+                fn, args = self._pending.popleft()
+                self._call(fn, *args)
+
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, callback = heapq.heappop(self._timers)
+                self.timer_calls += 1
+                delay = self._call(callback)
+                if isinstance(delay, (int, float)):
+                    heapq.heappush(self._timers, (now + delay, next(self._seq), callback))
+
+    def _call(self, fn, *args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.errors += 1
+            print(f"[REACTOR] Callback error: {e}")
+            return None
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'selector': type(self._selector).__name__,
+            'readers': dict(sorted(self._names.items())),
+            'wakeups': self.wakeups,
+            'timer_calls': self.timer_calls,
+            'dispatches': dict(self.dispatches),
+            'errors': self.errors,
+        }
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Serial Ring Buffer
+================================================================================
+Preallocated receive buffer shared by the LIDAR and Arduino serial readers.
+Bytes are read straight into a fixed bytearray with readinto() and consumed
+by advancing a head offset, so parsing never re-slices or concatenates the
+stream. When the write side reaches the end of the storage, the unconsumed
+tail (at most one partial packet or line) is moved back to the front.
+================================================================================
+"""
+
+from typing import List, Optional
+
+
+class SerialRingBuffer:
+    """Fixed-size byte buffer with zero-copy fill, peek and consume"""
+
+    def __init__(self, capacity: int = 8192):
+        self.capacity = capacity
+        self.raw = bytearray(capacity)
+        self._view = memoryview(self.raw)
+        self.head = 0   # First unconsumed byte
+        self.tail = 0   # One past the last valid byte
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def free_space(self) -> int:
+        """Bytes that can be written without overwriting unconsumed data"""
+        return self.capacity - len(self)
+
+    def clear(self):
+        """Drop all buffered bytes"""
+        self.head = 0
+        self.tail = 0
+
+    def _make_room(self, size: int):
+        """Move unconsumed bytes to the front if `size` bytes don't fit after tail"""
+        if self.head == self.tail:
+            self.head = self.tail = 0
+        elif self.capacity - self.tail < size and self.head > 0:
+            pending = self.tail - self.head
+            self.raw[:pending] = self._view[self.head:self.tail]
+            self.head = 0
+            self.tail = pending
+            self.compactions += 1
+
+    def fill_from(self, stream, size: int) -> int:
+        """Read up to `size` bytes from `stream` directly into the buffer"""
+        self._make_room(size)
+        size = min(size, self.capacity - self.tail)
+        if size <= 0:
+            return 0
+        n = stream.readinto(self._view[self.tail:self.tail + size]) or 0
+        self.tail += n
+        return n
+
+    def write(self, data) -> int:
+        """Append bytes already in memory (e.g. from a non-readinto source)"""
+        self._make_room(len(data))
+        n = min(len(data), self.capacity - self.tail)
+        self.raw[self.tail:self.tail + n] = data[:n]
+        self.tail += n
+        return n
+
+    def find(self, sub: bytes, offset: int = 0) -> int:
+        """Index of `sub` relative to head, or -1"""
+        idx = self.raw.find(sub, self.head + offset, self.tail)
+        return idx - self.head if idx != -1 else -1
+
+    def find_sync(self, sync: bytes) -> bool:
+        """
+        Discard bytes up to the next `sync` marker.
+
+        Returns True with the marker at head, or False after dropping
+        everything except a possible partial marker at the end.
+        """
+        idx = self.find(sync)
+        if idx == -1:
+            keep = len(sync) - 1
+            if len(self) > keep:
+                self.head = self.tail - keep
+            return False
+        self.head += idx
+        return True
+
+    def peek(self, size: int, offset: int = 0) -> memoryview:
+        """View of up to `size` bytes starting `offset` bytes past head"""
+        start = self.head + offset
+        return self._view[start:min(start + size, self.tail)]
+
+    def consume(self, size: int):
+        """Mark `size` bytes at head as processed"""
+        self.head = min(self.head + size, self.tail)
+        if self.head == self.tail:
+            self.head = self.tail = 0
+
+    def pop_line(self, terminator: bytes = b'\n') -> Optional[bytes]:
+        """Remove and return the next complete line (without terminator), or None"""
+        idx = self.raw.find(terminator, self.head, self.tail)
+        if idx == -1:
+            if self.free_space() == 0:
+                # Line longer than the buffer - drop it rather than stall
+                self.clear()
+            return None
+        line = bytes(self._view[self.head:idx])
+        self.consume(idx + len(terminator) - self.head)
+        return line
+
+    def pop_lines(self, terminator: bytes = b'\n') -> List[bytes]:
+        """Remove every complete line at once (one copy and one split), or []"""
+        idx = self.raw.rfind(terminator, self.head, self.tail)
+        if idx == -1:
+            if self.free_space() == 0:
+                self.clear()
+            return []
+        lines = bytes(self._view[self.head:idx]).split(terminator)
+        self.consume(idx + len(terminator) - self.head)
+        return lines
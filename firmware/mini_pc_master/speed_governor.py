@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Time-to-Collision Speed Governor
+================================================================================
+Caps forward throttle so the rover can always stop short of the first
+LIDAR return on the arc it is driving, however fast it goes. The fixed
+15/30/60 cm bands in pathfinding.ObstacleAvoidance react at the same
+distance at walking pace and at full throttle; here the allowed speed
+comes from the free distance along the commanded arc:
+
+    v_allowed = min(free / TTC_MIN,  v such that v*t_react + v^2/(2*decel) = free - margin)
+
+Swept path: the hoverboard mixes left = throttle + steering and right =
+throttle - steering, so the commanded arc has curvature
+2*steering / (track * throttle) (positive = turning right). For a fixed
+set of curvature levels, every bin of a BinnedScan and every 5 cm range
+step along the bin's ray, SweptPathTable precomputes whether that point
+is inside the corridor the rover body sweeps (half_width either side of
+the arc, up to `lookahead` along it) and, if so, how far the front
+bumper travels before reaching it (uint8, 2 cm units). A control tick is
+then one gather over the bins for the two curvature levels around the
+command plus a min: no trig per tick.
+
+Rover frame: x = right, y = forward (metres), LIDAR at the origin;
+bins are clockwise degrees from the nose as everywhere else.
+================================================================================
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# Rover geometry and dynamics (hoverboard base; tune on the vehicle)
+TRACK_WIDTH = 0.50      # m between wheel centres
+HALF_WIDTH = 0.30       # m, body half width plus clearance
+FRONT_OFFSET = 0.30     # m from the LIDAR to the front bumper
+MAX_SPEED = 2.0         # m/s at throttle 100
+DECEL = 1.5             # m/s^2 the motors reliably brake at
+REACTION_TIME = 0.15    # s from scan to wheels (control tick, serial, motor loop)
+TTC_MIN = 1.5           # s, never close on an obstacle faster than this
+STOP_MARGIN = 0.15      # m left between bumper and obstacle at rest
+MIN_SPEED = 0.1         # m/s, below this the cap is a stop
+
+GOVERNOR_BINS = 180     # 2 degree bins
+RANGE_STEP = 0.05       # m per range step of the table
+PATH_UNIT = 0.02        # m per unit of stored path distance
+NOT_IN_PATH = 255
+
+
+def curvature_levels() -> np.ndarray:
+    """Fine steps up to 1/m (R >= 1 m), coarse steps to 4/m (R = 0.25 m)"""
+    fine = np.arange(-40, 41) * 0.025
+    coarse = np.arange(5, 17) * 0.25
+    return np.concatenate((-coarse[::-1], fine, coarse))
+
+
+class SweptPathTable:
+    """Path distance to every (curvature level, bin, range step), 255 = not in path"""
+
+    def __init__(self, num_bins: int = GOVERNOR_BINS, lookahead: float = 4.0,
+                 half_width: float = HALF_WIDTH, front_offset: float = FRONT_OFFSET):
+        self.num_bins = num_bins
+        self.lookahead = lookahead
+        self.curvatures = curvature_levels()
+        self.steps = int(math.ceil((lookahead + front_offset + half_width) / RANGE_STEP)) + 1
+
+        k = self.curvatures[:, None, None]
+        theta = np.radians((np.arange(num_bins) + 0.5) * (360.0 / num_bins))[None, :, None]
+        r = (np.arange(self.steps) * RANGE_STEP)[None, None, :]
+        x = r * np.sin(theta)
+        y = r * np.cos(theta)
+
+        # Arc centre at (R, 0); R = 1e9 stands in for a straight line
+        radius = 1.0 / np.where(k == 0, 1e-9, k)
+        lateral = np.abs(np.hypot(x - radius, y) - np.abs(radius))
+        swept = np.arctan2(y, np.abs(radius) - np.sign(radius) * x)  # Angle travelled about the centre
+        s = np.abs(radius) * np.where(swept < 0, swept + 2 * np.pi, swept) - front_offset
+        inside = (lateral <= half_width) & (s <= lookahead)
+
+        table = np.full((len(self.curvatures), num_bins, self.steps + 1), NOT_IN_PATH, dtype=np.uint8)
+        table[:, :, :-1] = np.where(inside, np.clip(np.rint(np.maximum(s, 0) / PATH_UNIT), 0, 254),
+                                    NOT_IN_PATH)
+        self.table = table  # Last range column: no return / beyond the lookahead
+        self._bins = np.arange(num_bins)
+
+    def levels_for(self, curvature: float) -> slice:
+        """The one or two table levels bracketing `curvature` (clamped to the table)"""
+        c = self.curvatures
+        i = int(np.searchsorted(c, curvature))
+        if i <= 0:
+            return slice(0, 1)
+        if i >= len(c):
+            return slice(len(c) - 1, len(c))
+        return slice(i - 1, i + 1)
+
+    def free_distance(self, distances: np.ndarray, curvature: float) -> Optional[float]:
+        """
+        Bumper travel (m) to the first return on the arc, conservative
+        between levels; None when the path is clear to the lookahead.
+        """
+        steps = np.rint(distances * np.float32(0.001 / RANGE_STEP)).astype(np.intp)
+        steps[(distances == 0) | (steps >= self.steps)] = self.steps
+        nearest = int(self.table[self.levels_for(curvature), self._bins, steps].min())
+        return None if nearest == NOT_IN_PATH else nearest * PATH_UNIT
+
+
+@dataclass
+class GovernorDecision:
+    throttle: int                  # Throttle after the cap
+    requested: int                 # Throttle before the cap
+    cap: int                       # Highest throttle allowed on this arc
+    curvature: float               # 1/m, positive = right
+    free_distance: Optional[float] # m along the arc; None = clear to the lookahead
+    speed: float                   # m/s used for the TTC
+    ttc: Optional[float]           # s at `speed`; None when clear or stopped
+    allowed_speed: float           # m/s
+    eval_time: float = 0.0         # Seconds spent deciding
+    timestamp: float = 0.0
+
+    @property
+    def limited(self) -> bool:
+        return self.throttle < self.requested
+
+
+class SpeedGovernor:
+    """Throttle cap from time-to-collision along the commanded arc"""
+
+    def __init__(self, table: Optional[SweptPathTable] = None,
+                 max_speed: float = MAX_SPEED, decel: float = DECEL,
+                 reaction_time: float = REACTION_TIME, ttc_min: float = TTC_MIN,
+                 stop_margin: float = STOP_MARGIN, track_width: float = TRACK_WIDTH):
+        self.table = table or SweptPathTable()
+        self.max_speed = max_speed
+        self.decel = decel
+        self.reaction_time = reaction_time
+        self.ttc_min = ttc_min
+        self.stop_margin = stop_margin
+        self.track_width = track_width
+        self.last: Optional[GovernorDecision] = None
+        self.limited_ticks = 0
+
+    @property
+    def num_bins(self) -> int:
+        return self.table.num_bins
+
+    def curvature(self, throttle: float, steering: float) -> float:
+        """Arc curvature (1/m) of the left = T + S, right = T - S mix"""
+        if steering == 0:
+            return 0.0
+        if abs(steering) >= abs(throttle):
+            # Inner wheel stopped or reversing: pivot, tightest level
+            return math.copysign(self.table.curvatures[-1], steering)
+        return 2.0 * steering / (self.track_width * throttle)
+
+    def allowed_speed(self, free: Optional[float], latency: float = 0.0) -> float:
+        """Fastest speed that still stops `stop_margin` short and keeps TTC >= ttc_min"""
+        if free is None:
+            return self.max_speed
+        room = free - self.stop_margin
+        if room <= 0:
+            return 0.0
+        t = self.reaction_time + latency
+        stopping = self.decel * (math.sqrt(t * t + 2.0 * room / self.decel) - t)
+        return min(self.max_speed, stopping, free / self.ttc_min)
+
+    def limit(self, binned, throttle: int, steering: int, speed: float = 0.0,
+              latency: float = 0.0) -> GovernorDecision:
+        """
+        Cap forward `throttle` for the arc of (throttle, steering) over a
+        BinnedScan of `num_bins` bins. `speed` (m/s) is the measured speed
+        for the reported TTC; `latency` (s) is the scan's age, added to
+        the reaction time.
+        """
+        start = time.perf_counter()
+        curvature = self.curvature(throttle, steering) if throttle > 0 else 0.0
+        free = None
+        if throttle > 0 and binned is not None:
+            free = self.table.free_distance(binned.distances, curvature)
+        allowed = self.allowed_speed(free, latency)
+        cap = 0 if allowed < MIN_SPEED else int(100 * allowed / self.max_speed)
+        governed = min(throttle, cap) if throttle > 0 else throttle
+
+        decision = GovernorDecision(
+            throttle=governed, requested=throttle, cap=cap, curvature=curvature,
+            free_distance=free, speed=speed,
+            ttc=free / speed if free is not None and speed > 0.05 else None,
+            allowed_speed=allowed, eval_time=time.perf_counter() - start,
+            timestamp=time.time())
+        self.limited_ticks += decision.limited
+        self.last = decision
+        return decision
+
+    def to_dict(self) -> dict:
+        d = self.last
+        if d is None:
+            return {'active': False, 'limited_ticks': self.limited_ticks}
+        return {
+            'active': True,
+            'throttle': d.throttle,
+            'requested': d.requested,
+            'cap': d.cap,
+            'limited': d.limited,
+            'curvature': round(d.curvature, 3),
+            'free_distance': None if d.free_distance is None else round(d.free_distance, 2),
+            'speed': round(d.speed, 2),
+            'ttc': None if d.ttc is None else round(d.ttc, 2),
+            'allowed_speed': round(d.allowed_speed, 2),
+            'eval_us': round(d.eval_time * 1e6, 1),
+            'limited_ticks': self.limited_ticks,
+            'timestamp': int(d.timestamp * 1000),
+        }
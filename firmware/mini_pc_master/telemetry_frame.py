@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Binary Telemetry Frames (Arduino Mega -> Mini PC)
+================================================================================
+Fixed-layout alternative to the Mega's JSON telemetry line, enabled with
+the serial command TELEM:BIN[,interval_ms] (TELEM:JSON switches back;
+the Mega acknowledges with {"event":"telemetry_mode",...} and starts in
+JSON mode after every reset). Events and command replies stay JSON lines.
+
+Wire: 0x00, COBS(payload), 0x00. COBS removes every zero byte from the
+payload, so a zero always delimits a frame and text lines (which never
+contain one) can be interleaved. A reader that sees 0x00 at the start of
+its buffer reads a frame up to the next 0x00; anything else is text up
+to '\\n'.
+
+Payload (little-endian, 70 bytes, struct TelemetryFrame in the sketch):
+
+    offset  size  field
+    0       1     type (1 = telemetry)
+    1       1     version (1)
+    2       2     sequence number, +1 per frame (wraps)
+    4       4     millis() on the Mega
+    8       4     int32 GPS latitude, 1e-7 degree
+    12      4     int32 GPS longitude, 1e-7 degree
+    16      2     GPS speed, 0.01 km/h
+    18      2     GPS HDOP (TinyGPS hdop.value())
+    20      1     satellites
+    21      1     flags (bit 0: iBUS connected)
+    22      2     heading, 0.01 degree
+    24      2     int16 pitch, 0.01 degree
+    26      2     int16 roll, 0.01 degree
+    28      6     int16 accel x, y, z, 0.001 g
+    34      2     TF Mini distance (cm)
+    36      10    5 x ultrasonic distance (cm)
+    46      20    10 x iBUS channel (us)
+    66      2     battery, 0.01 %
+    68      2     CRC-16/CCITT-FALSE of bytes 0-67
+
+decode_telemetry() returns the same dict layout as the JSON line, so
+RoverState.update_from_arduino() takes either.
+================================================================================
+"""
+
+import struct
+from binascii import crc_hqx
+from typing import Optional
+
+FRAME_TELEMETRY = 1
+FRAME_VERSION = 1
+
+TELEMETRY = struct.Struct('<BBHIiiHHBBHhhhhhH5H10HHH')
+CRC = struct.Struct('<H')
+TELEMETRY_SIZE = TELEMETRY.size  # 70
+FLAG_IBUS_CONNECTED = 0x01
+
+# Wire bytes per frame: delimiter + COBS overhead byte + payload + delimiter
+TELEMETRY_WIRE_SIZE = TELEMETRY_SIZE + 3
+
+
+class FrameError(ValueError):
+    """Malformed COBS, bad CRC or unknown frame type"""
+
+
+def crc16(data) -> int:
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), as crc16Ccitt() in the sketch"""
+    return crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data: bytes) -> bytes:
+    out = bytearray()
+    for block in data.split(b'\x00'):
+        while len(block) >= 254:
+            out.append(0xFF)
+            out += block[:254]
+            block = block[254:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data) -> bytearray:
+    """
+    In place on a copy: each code byte is where the previous block's zero
+    goes, so zero the code bytes and drop the first (and any after a
+    0xFF block, which implies no zero). One pass over the codes, no
+    per-block slicing.
+    """
+    buf = bytearray(data)
+    n = len(buf)
+    drop = [0]
+    i = 0
+    while i < n:
+        code = buf[i]
+        if code == 0:
+            raise FrameError("zero inside a COBS frame")
+        if i != drop[-1]:
+            buf[i] = 0
+        i += code
+        if code == 0xFF and i < n:
+            drop.append(i)
+    if i != n:
+        raise FrameError("truncated COBS block")
+    for i in reversed(drop):
+        del buf[i]
+    return buf
+
+
+def encode_telemetry(seq: int, t_ms: int, lat: float = 0.0, lng: float = 0.0,
+                     gps_speed: float = 0.0, gps_accuracy: int = 0, satellites: int = 0,
+                     heading: float = 0.0, pitch: float = 0.0, roll: float = 0.0,
+                     accel=(0.0, 0.0, 0.0), lidar: int = 0, ultrasonic=(0,) * 5,
+                     ibus_connected: bool = False, ibus_channels=(1500,) * 10,
+                     battery: float = 0.0) -> bytes:
+    """Complete wire frame (delimiters included), as the sketch sends it"""
+    payload = TELEMETRY.pack(
+        FRAME_TELEMETRY, FRAME_VERSION, seq & 0xFFFF, t_ms & 0xFFFFFFFF,
+        round(lat * 1e7), round(lng * 1e7), round(gps_speed * 100), gps_accuracy,
+        satellites, FLAG_IBUS_CONNECTED if ibus_connected else 0,
+        round(heading * 100) % 36000, round(pitch * 100), round(roll * 100),
+        *(round(a * 1000) for a in accel), lidar, *ultrasonic, *ibus_channels,
+        round(battery * 100), 0)
+    payload = payload[:-2] + CRC.pack(crc16(payload[:-2]))
+    return b'\x00' + cobs_encode(payload) + b'\x00'
+
+
+def decode_telemetry(encoded) -> dict:
+    """
+    Telemetry dict (JSON line layout, plus 'seq') from one frame's COBS
+    bytes, delimiters excluded. Raises FrameError.
+    """
+    payload = cobs_decode(encoded)
+    if len(payload) != TELEMETRY_SIZE:
+        raise FrameError(f"frame is {len(payload)} bytes, expected {TELEMETRY_SIZE}")
+    if crc16(payload[:-2]) != CRC.unpack_from(payload, TELEMETRY_SIZE - 2)[0]:
+        raise FrameError("CRC mismatch")
+    f = TELEMETRY.unpack(payload)
+    if f[0] != FRAME_TELEMETRY or f[1] != FRAME_VERSION:
+        raise FrameError(f"unsupported frame type {f[0]} v{f[1]}")
+    return {
+        't': f[3],
+        'seq': f[2],
+        'gps': {'lat': f[4] * 1e-7, 'lng': f[5] * 1e-7, 'spd': f[6] * 0.01, 'acc': f[7], 'sat': f[8]},
+        'imu': {'hdg': f[10] * 0.01, 'pitch': f[11] * 0.01, 'roll': f[12] * 0.01,
+                'ax': f[13] * 0.001, 'ay': f[14] * 0.001, 'az': f[15] * 0.001},
+        'lidar': f[16],
+        'ultra': list(f[17:22]),
+        'ibus': {'con': bool(f[9] & FLAG_IBUS_CONNECTED), 'ch': list(f[22:32])},
+        'bat': f[32] * 0.01,
+    }
+
+
+def seq_gap(previous: Optional[int], seq: int) -> int:
+    """Frames lost between two sequence numbers (16-bit wrap)"""
+    if previous is None:
+        return 0
+    return (seq - previous - 1) & 0xFFFF
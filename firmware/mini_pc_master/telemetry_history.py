@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+================================================================================
+Multi-Resolution Telemetry History
+================================================================================
+Min/max/mean of a few telemetry fields (battery, heading, pitch, roll,
+GPS speed) at 1 s, 10 s and 1 min resolution, kept incrementally so a
+plot of a whole mission never touches raw frames (/api/history).
+
+Each level is a ring of buckets (bucket number, count, and per field
+min, max and sum). Frames accumulate into the open 1 s bucket in plain
+floats; when a frame lands in the next second the bucket is closed:
+written to the 1 s ring and merged into the open 10 s and 1 min buckets
+in place. So add() is a handful of float compares per frame and numpy
+touches one row per level once a second. A query also closes an open
+bucket whose second is over, so the last frames before a link loss
+show up without waiting for a next frame; only the current second is
+left out.
+
+A query picks the finest level that has the window within its
+retention and fits it in `points` buckets. Past the coarsest level's
+fit, groups of k buckets are merged, so the answer is at most `points`
+rows from at most one ring's worth of buckets, whatever the window.
+
+Heading is accumulated unwrapped (heading_history.unwrap_heading, as
+in HeadingHistory), so min/max/mean stay meaningful through a turn past
+north, and is wrapped back to [0, 360) on the way out: a bucket whose
+max is below its min turned through north.
+================================================================================
+"""
+
+import math
+import threading
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from heading_history import unwrap_heading
+
+HISTORY_FIELDS = ('battery', 'heading', 'pitch', 'roll', 'speed')
+CIRCULAR_FIELDS = ('heading',)
+
+# (seconds per bucket, buckets kept): 1 h at 1 s, 24 h at 10 s, 7 days at 1 min
+LEVELS = ((1, 3600), (10, 8640), (60, 10080))
+MAX_POINTS = 500
+
+
+class _Ring:
+    """Fixed-capacity buckets of one resolution, slot = bucket % capacity"""
+
+    def __init__(self, resolution: int, capacity: int, num_fields: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.bucket = np.full(capacity, -1, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.min = np.zeros((capacity, num_fields))
+        self.max = np.zeros((capacity, num_fields))
+        self.sum = np.zeros((capacity, num_fields))
+        self.newest = -1
+
+    def merge(self, bucket: int, count: int, mins, maxs, sums):
+        slot = bucket % self.capacity
+        if self.bucket[slot] != bucket:
+            self.bucket[slot] = bucket
+            self.count[slot] = count
+            self.min[slot] = mins
+            self.max[slot] = maxs
+            self.sum[slot] = sums
+        else:
+            self.count[slot] += count
+            np.minimum(self.min[slot], mins, out=self.min[slot])
+            np.maximum(self.max[slot], maxs, out=self.max[slot])
+            self.sum[slot] += sums
+        self.newest = max(self.newest, bucket)
+
+    def oldest(self) -> int:
+        """Oldest bucket number still in the ring"""
+        return max(self.newest - self.capacity + 1, 0)
+
+
+class TelemetryHistory:
+    """Incremental min/max/mean aggregates at several resolutions"""
+
+    def __init__(self, fields: Sequence[str] = HISTORY_FIELDS, levels=LEVELS):
+        self.fields = tuple(fields)
+        self.levels = [_Ring(resolution, capacity, len(self.fields)) for resolution, capacity in levels]
+        self._circular = [i for i, name in enumerate(self.fields) if name in CIRCULAR_FIELDS]
+        self._lock = threading.Lock()
+        self._open = -1             # Open bucket of the finest level
+        self._count = 0
+        self._mins = self._maxs = self._sums = None
+        self._last = [0.0] * len(self.fields)  # Previous values (for unwrapping)
+        self._last_time = 0.0
+        self.first_time: Optional[float] = None
+        self.frames = 0
+
+    def add(self, timestamp: float, values: Sequence[float]):
+        """One frame's field values (in `fields` order) at host time `timestamp`"""
+        with self._lock:
+            timestamp = max(float(timestamp), self._last_time)  # Keep buckets in order
+            self._last_time = timestamp
+            if self.first_time is None:
+                self.first_time = timestamp
+            values = [float(v) for v in values]
+            if self.frames:
+                for i in self._circular:
+                    values[i] = unwrap_heading(self._last[i], values[i])
+            self._last = values
+            self.frames += 1
+
+            bucket = int(timestamp // self.levels[0].resolution)
+            if bucket != self._open or not self._count:
+                if self._count:
+                    self._close()
+                self._open = bucket
+                self._count = 1
+                self._mins = list(values)
+                self._maxs = list(values)
+                self._sums = list(values)
+                return
+            self._count += 1
+            mins, maxs, sums = self._mins, self._maxs, self._sums
+            for i, v in enumerate(values):
+                if v < mins[i]:
+                    mins[i] = v
+                elif v > maxs[i]:
+                    maxs[i] = v
+                sums[i] += v
+
+    def _close(self):
+        """Fold the open finest bucket into every level"""
+        start = self._open * self.levels[0].resolution
+        for ring in self.levels:
+            ring.merge(start // ring.resolution, self._count, self._mins, self._maxs, self._sums)
+        self._count = 0
+
+    def _close_stale(self, now: float):
+        """Close the open bucket if its second ended before `now`"""
+        if self._count and now >= (self._open + 1) * self.levels[0].resolution:
+            self._close()
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              fields: Optional[Sequence[str]] = None, points: int = MAX_POINTS) -> dict:
+        """
+        At most `points` buckets covering [start, end] (host epoch
+        seconds; default the last hour), each with min/max/mean per field.
+        Heading values are compass degrees in [0, 360).
+        Raises ValueError for an unknown field.
+        """
+        fields = list(fields) if fields else list(self.fields)
+        unknown = [f for f in fields if f not in self.fields]
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+        columns = [self.fields.index(f) for f in fields]
+        points = max(1, points)
+
+        with self._lock:
+            self._close_stale(time.time())
+            empty = {'resolution': None, 'from': start, 'to': end, 'count': 0, 'time': [],
+                     'fields': {f: {'min': [], 'max': [], 'mean': []} for f in fields}}
+            if self.first_time is None:
+                return empty
+            end = self._last_time if end is None else min(end, self._last_time)
+            start = end - 3600 if start is None else start
+            start = max(start, self.first_time)
+            if end < start:
+                return empty
+
+            # Finest level holding the window within `points` buckets, else
+            # the coarsest one (clamped to its retention) with merged groups
+            for ring in self.levels:
+                b0, b1 = int(start // ring.resolution), int(end // ring.resolution)
+                if b0 >= ring.oldest() and b1 - b0 + 1 <= points:
+                    break
+            else:
+                b0 = max(b0, ring.oldest())
+            group = max(1, math.ceil((b1 - b0 + 1) / points))
+
+            buckets = np.arange(b0, b1 + 1)
+            slots = buckets % ring.capacity
+            valid = ring.bucket[slots] == buckets
+            count = np.where(valid, ring.count[slots], 0)
+            mins = np.where(valid[:, None], ring.min[slots][:, columns], np.inf)
+            maxs = np.where(valid[:, None], ring.max[slots][:, columns], -np.inf)
+            sums = np.where(valid[:, None], ring.sum[slots][:, columns], 0.0)
+
+        if group > 1:
+            pad = -len(buckets) % group
+            buckets = np.concatenate((buckets, np.zeros(pad, dtype=buckets.dtype)))[::group]
+            count = np.concatenate((count, np.zeros(pad, dtype=count.dtype))).reshape(-1, group).sum(axis=1)
+            mins = np.concatenate((mins, np.full((pad, len(columns)), np.inf))) \
+                .reshape(-1, group, len(columns)).min(axis=1)
+            maxs = np.concatenate((maxs, np.full((pad, len(columns)), -np.inf))) \
+                .reshape(-1, group, len(columns)).max(axis=1)
+            sums = np.concatenate((sums, np.zeros((pad, len(columns))))) \
+                .reshape(-1, group, len(columns)).sum(axis=1)
+
+        keep = count > 0
+        means = (sums[keep] / count[keep][:, None]).round(3)
+        mins, maxs = mins[keep].round(3), maxs[keep].round(3)
+        circular = [k for k, name in enumerate(fields) if name in CIRCULAR_FIELDS]
+        for values in (mins, maxs, means):
+            values[:, circular] = (values[:, circular] % 360.0).round(3)
+        return {
+            'resolution': ring.resolution * group,
+            'from': start,
+            'to': end,
+            'count': int(keep.sum()),
+            'time': (buckets[keep] * ring.resolution).tolist(),
+            'fields': {
+                name: {'min': mins[:, k].tolist(),
+                       'max': maxs[:, k].tolist(),
+                       'mean': means[:, k].tolist()}
+                for k, name in enumerate(fields)
+            },
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'fields': list(self.fields),
+                'frames': self.frames,
+                'from': self.first_time,
+                'to': self._last_time or None,
+                'levels': [{'resolution': ring.resolution, 'buckets': ring.capacity,
+                            'retention_s': ring.resolution * ring.capacity}
+                           for ring in self.levels],
+            }
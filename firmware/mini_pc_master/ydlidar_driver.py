@@ -17,8 +17,85 @@ import os
 import subprocess
 import glob as glob_module
 import fcntl
-from dataclasses import dataclass
-from typing import List, Optional, Callable
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Callable, Tuple
+from serial_ring_buffer import SerialRingBuffer
+from lidar_wire_format import encode_scan
+from lidar_capture import CaptureWriter
+from metrics import RECOVERY_BUCKETS, Histogram, format_prometheus
+from heading_history import HeadingHistory
+from pubsub import DROP_OLDEST, Publisher, Subscription
+
+# Packet framing (AA 55 | CT | LSN | FSA | LSA | CS | LSN x 3-byte samples)
+PACKET_SYNC = b'\xaa\x55'
+PACKET_HEADER_LEN = 10
+SAMPLE_LEN = 3
+PACKET_HEADER = struct.Struct('<BBHHH')  # CT, LSN, FSA, LSA, CS after the sync bytes
+_SAMPLE_STRUCTS: Dict[int, struct.Struct] = {}
+MAX_RANGE_MM = 12000
+
+# Decoder modes for YDLidarDriver
+DECODER_PER_SAMPLE = 'per_sample'
+DECODER_VECTORIZED = 'vectorized'
+
+# Serial read size: READ_WINDOW of wire time (reads block until it arrives,
+# so this bounds the latency it adds), at least one 40-sample packet, at most
+# READ_SIZE for the decoder. The vectorized decoder gets longer runs of
+# packets at high baud rates; a backlog is always read in one go
+READ_SIZE = {DECODER_PER_SAMPLE: 256, DECODER_VECTORIZED: 1024}
+READ_WINDOW = 0.01
+MIN_READ_SIZE = PACKET_HEADER_LEN + 40 * SAMPLE_LEN
+
+# A revolution is closed by the angle wrap. Without one (wrap packet lost)
+# it is closed once its packets span SCAN_TIMEOUT of receive time: longer
+# than one revolution at the slowest T-mini Plus rate (5 Hz)
+SCAN_TIMEOUT = 0.25
+
+# Recovery: a stall longer than STALL_TIMEOUT starts the escalating strategies
+# (two attempts each). Waits are timer-driven from the read loop, which checks
+# the state machine every RECOVERY_TICK while a strategy owns the port.
+RECOVERY_STRATEGIES = ('stop_start', 'soft_reboot', 'usb_reset')
+STALL_TIMEOUT = 5.0
+RECOVERY_VERIFY_TIMEOUT = 5.0
+RECOVERY_RETRY_DELAY = 2.0
+RECOVERY_COOLDOWN = 30.0
+RECOVERY_TICK = 0.05
+HEALTH_TIMEOUT = 0.5  # Wait for the A5 92 reply, polled without blocking reads
+REACTOR_IDLE_TICK = 0.25  # Stall check interval while streaming under a reactor
+
+STATE_STREAMING = 'streaming'
+STATE_RECOVERING = 'recovering'  # Running a strategy step, port not read
+STATE_VERIFYING = 'verifying'    # Strategy done, waiting for a complete scan
+STATE_BACKOFF = 'backoff'        # Failed attempt, retry after RECOVERY_RETRY_DELAY
+STATE_COOLDOWN = 'cooldown'      # All attempts failed, retry after RECOVERY_COOLDOWN
+
+# Scans older than this are flagged stale (about three revolutions at 6 Hz)
+STALE_AFTER = 0.5
+
+# Fixed-bin resolutions kept up to date on every scan (least recently requested dropped)
+MAX_BIN_RESOLUTIONS = 8
+
+# (end_angle, angles, distances, intensities) for one checksummed packet;
+# the sample columns are lists (per-sample decoder) or numpy arrays (vectorized)
+DecodedPacket = Tuple[float, list, list, list]
+
+
+def polar_to_xy(angles: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    """
+    (2, N) float32 metres in the sensor frame: row 0 = x (right), row 1 =
+    y (forward), for clockwise-from-nose `angles` in degrees and
+    `distances` in mm. No-return points (distance 0) land on the origin.
+    """
+    theta = np.radians(angles, dtype=np.float32)
+    xy = np.empty((2, len(distances)), dtype=np.float32)
+    np.sin(theta, out=xy[0])
+    np.cos(theta, out=xy[1])
+    xy *= distances * np.float32(0.001)
+    return xy
+
 
 @dataclass
 class LidarPoint:
@@ -26,49 +103,817 @@ class LidarPoint:
     distance: float   # Millimeters
     intensity: int    # Signal strength
 
-@dataclass
+@dataclass(eq=False)
 class LidarScan:
+    """
+    One revolution stored column-wise in typed arrays.
+
+    ~7 bytes per point instead of one LidarPoint object per sample; `points`
+    is a lazily built compatibility view for code that iterates LidarPoints.
+    """
     timestamp: float
-    points: List[LidarPoint]
+    angles: np.ndarray       # float32 degrees (0-360)
+    distances: np.ndarray    # uint16 millimeters
+    intensities: np.ndarray  # uint8 signal strength
     scan_frequency: float
+    seq: int = 0             # Increments once per completed scan
+    packet_index: Optional[np.ndarray] = None  # int32 offset of each packet's first point
+    packet_times: Optional[np.ndarray] = None  # float64 time.time() each packet was received
+    _points: Optional[List[LidarPoint]] = field(default=None, init=False, repr=False)
+    _index: Optional['ScanIndex'] = field(default=None, init=False, repr=False)
+    _xy: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    
+    def __len__(self) -> int:
+        return len(self.distances)
+    
+    @property
+    def xy(self) -> np.ndarray:
+        """Cartesian points as polar_to_xy() (computed once, on first access)"""
+        if self._xy is None:
+            self._xy = polar_to_xy(self.angles, self.distances)
+        return self._xy
+    
+    @property
+    def points(self) -> List[LidarPoint]:
+        """Per-point view of the scan (built on first access)"""
+        if self._points is None:
+            self._points = list(map(LidarPoint, self.angles.tolist(),
+                                    self.distances.tolist(), self.intensities.tolist()))
+        return self._points
+    
+    @property
+    def index(self) -> 'ScanIndex':
+        """Angle-sorted index (built once, on first query)"""
+        if self._index is None:
+            self._index = ScanIndex(self)
+        return self._index
+    
+    def point_at(self, index: int) -> LidarPoint:
+        """Single point without building the full `points` view"""
+        return LidarPoint(float(self.angles[index]), int(self.distances[index]),
+                          int(self.intensities[index]))
+    
+    @classmethod
+    def from_points(cls, timestamp: float, points: List[LidarPoint],
+                    scan_frequency: float) -> 'LidarScan':
+        """Build a columnar scan from LidarPoint objects"""
+        return cls(
+            timestamp=timestamp,
+            angles=np.array([p.angle for p in points], dtype=np.float32),
+            distances=np.array([p.distance for p in points], dtype=np.uint16),
+            intensities=np.array([p.intensity for p in points], dtype=np.uint8),
+            scan_frequency=scan_frequency
+        )
+
+
+class ScanIndex:
+    """
+    Angle-sorted view of one scan for sector and range queries.
+
+    Angular ranges resolve to a contiguous slice by binary search; sector
+    averages come from a prefix sum and sector minimums from one reduceat.
+    """
+    
+    def __init__(self, scan: LidarScan):
+        self.order = np.argsort(scan.angles, kind='stable')
+        self.angles = scan.angles[self.order]
+        self.distances = scan.distances[self.order]
+        self.prefix_sum = np.concatenate(([0], np.cumsum(self.distances, dtype=np.int64)))
+        self.closest = int(np.argmin(scan.distances)) if len(scan) else -1
+    
+    def span(self, min_angle: float, max_angle: float) -> Tuple[int, int]:
+        """Slice [lo, hi) of sorted points with min_angle <= angle <= max_angle"""
+        lo = int(np.searchsorted(self.angles, min_angle, side='left'))
+        hi = int(np.searchsorted(self.angles, max_angle, side='right'))
+        return lo, max(lo, hi)
+    
+    def sector_stats(self, num_sectors: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(count, sum, min) per sector, sector i covering [i, i+1) * 360/num_sectors"""
+        edges = np.arange(num_sectors + 1) * (360 / num_sectors)
+        bounds = np.searchsorted(self.angles, edges, side='left')
+        counts = np.diff(bounds)
+        sums = self.prefix_sum[bounds[1:]] - self.prefix_sum[bounds[:-1]]
+        mins = np.full(num_sectors, MAX_RANGE_MM, dtype=np.int64)
+        occupied = counts > 0
+        if occupied.any():
+            mins[occupied] = np.minimum.reduceat(self.distances[:bounds[-1]], bounds[:-1][occupied])
+        return counts, sums, mins
+
+
+class ScanAccumulator:
+    """Preallocated column buffers for the revolution being assembled"""
+    
+    def __init__(self, capacity: int = 2048, packet_capacity: int = 256):
+        self.angles = np.empty(capacity, dtype=np.float32)
+        self.distances = np.empty(capacity, dtype=np.uint16)
+        self.intensities = np.empty(capacity, dtype=np.uint8)
+        self.count = 0
+        self.packet_index = np.empty(packet_capacity, dtype=np.int32)
+        self.packet_times = np.empty(packet_capacity, dtype=np.float64)
+        self.packets = 0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def extend(self, angles, distances, intensities, timestamp: Optional[float] = None):
+        """Append one packet's samples (lists or arrays), received at `timestamp`"""
+        if timestamp is not None:
+            if self.packets == len(self.packet_times):
+                self.packet_index = np.resize(self.packet_index, 2 * self.packets)
+                self.packet_times = np.resize(self.packet_times, 2 * self.packets)
+            self.packet_index[self.packets] = self.count
+            self.packet_times[self.packets] = timestamp
+            self.packets += 1
+        n = len(distances)
+        end = self.count + n
+        if end > len(self.distances):
+            size = max(end, 2 * len(self.distances))
+            self.angles = np.resize(self.angles, size)
+            self.distances = np.resize(self.distances, size)
+            self.intensities = np.resize(self.intensities, size)
+        self.angles[self.count:end] = angles
+        self.distances[self.count:end] = distances
+        self.intensities[self.count:end] = intensities
+        self.count = end
+    
+    def take(self, timestamp: float, scan_frequency: float, seq: int = 0) -> LidarScan:
+        """Copy the accumulated samples out as a LidarScan"""
+        n = self.count
+        return LidarScan(
+            timestamp=timestamp,
+            angles=self.angles[:n].copy(),
+            distances=self.distances[:n].copy(),
+            intensities=self.intensities[:n].copy(),
+            scan_frequency=scan_frequency,
+            seq=seq,
+            packet_index=self.packet_index[:self.packets].copy() if self.packets else None,
+            packet_times=self.packet_times[:self.packets].copy() if self.packets else None
+        )
+    
+    def clear(self):
+        self.count = 0
+        self.packets = 0
+
+@dataclass(eq=False)
+class BinnedScan:
+    """
+    One scan resampled into `num_bins` fixed angular bins, bin i covering
+    [i, i+1) * 360/num_bins degrees. Each bin holds the closest return in
+    it (distance 0 = no return) and that return's intensity.
+    """
+    num_bins: int
+    angles: np.ndarray       # float32 bin centre, degrees (shared, read-only)
+    distances: np.ndarray    # uint16 millimeters
+    intensities: np.ndarray  # uint8 signal strength
+    timestamp: float = 0.0
+    scan_frequency: float = 0.0
+    seq: int = 0
+    unit: Optional[np.ndarray] = field(default=None, repr=False)  # (2, bins) sin/cos of the centres
+    _xy: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    
+    @property
+    def xy(self) -> np.ndarray:
+        """Bin centres at their distances as polar_to_xy() (computed once per scan)"""
+        if self._xy is None:
+            if self.unit is None:
+                self._xy = polar_to_xy(self.angles, self.distances)
+            else:
+                self._xy = self.unit * (self.distances * np.float32(0.001))
+        return self._xy
+
+
+class ScanDownsampler:
+    """
+    Min-range resampling into fixed bins, written into preallocated buffers.
+
+    Output alternates between two BinnedScans, so the result of update()
+    stays valid until the update after next; consumers that keep bins
+    longer than one scan period must copy them.
+    """
+    
+    def __init__(self, num_bins: int):
+        self.num_bins = num_bins
+        self.angles = ((np.arange(num_bins) + 0.5) * (360.0 / num_bins)).astype(np.float32)
+        self.angles.setflags(write=False)
+        # Bin centres never move, so their sin/cos is a table built once per resolution
+        self.unit = polar_to_xy(self.angles, np.full(num_bins, 1000, dtype=np.uint16))
+        self.unit.setflags(write=False)
+        self._keys = np.empty(num_bins, dtype=np.uint32)
+        self._buffers = [
+            BinnedScan(num_bins, self.angles, np.zeros(num_bins, dtype=np.uint16),
+                       np.zeros(num_bins, dtype=np.uint8), unit=self.unit)
+            for _ in range(2)
+        ]
+        self._next = 0
+        self.latest: Optional[BinnedScan] = None
+    
+    def update(self, scan: LidarScan) -> BinnedScan:
+        out = self._buffers[self._next]
+        self._next ^= 1
+        
+        # Key = distance << 8 | intensity, so one minimum pass per bin
+        # yields the closest return together with its intensity
+        keys = self._keys
+        keys.fill(0xFFFFFFFF)
+        if len(scan):
+            idx = (scan.angles * np.float32(self.num_bins / 360.0)).astype(np.intp)
+            idx %= self.num_bins
+            np.minimum.at(keys, idx, (scan.distances.astype(np.uint32) << 8) | scan.intensities)
+        np.copyto(out.distances, keys >> 8, casting='unsafe')
+        np.copyto(out.intensities, keys, casting='unsafe')
+        empty = keys == 0xFFFFFFFF
+        out.distances[empty] = 0
+        out.intensities[empty] = 0
+        
+        out.timestamp = scan.timestamp
+        out.scan_frequency = scan.scan_frequency
+        out.seq = scan.seq
+        out._xy = None
+        self.latest = out
+        return out
+
+
+class ScanDeskewer:
+    """
+    Rotates each packet of a scan into the rover's heading at the end of
+    the scan (scan.timestamp), using packet receive times and a
+    HeadingHistory fed from IMU telemetry. Rotation only; translation
+    during a revolution is not corrected.
+    """
+    
+    def __init__(self, headings: HeadingHistory, max_age: float = 1.0):
+        self.headings = headings
+        self.max_age = max_age  # Skip when the newest heading is older than this
+        self.scans = 0
+        self.skipped = 0
+        self.max_correction = 0.0
+    
+    def apply(self, scan: LidarScan) -> LidarScan:
+        if scan.packet_times is None or not len(scan) or not self.headings.count:
+            self.skipped += 1
+            return scan
+        if scan.timestamp - self.headings.latest_time > self.max_age:
+            self.skipped += 1
+            return scan
+        
+        h = self.headings.at(np.append(scan.packet_times, scan.timestamp))
+        correction = h[:-1] - h[-1]  # Heading when the packet arrived, relative to scan end
+        counts = np.diff(np.append(scan.packet_index, len(scan)))
+        angles = scan.angles + np.repeat(correction, counts).astype(np.float32)
+        angles %= np.float32(360.0)
+        
+        self.scans += 1
+        self.max_correction = max(self.max_correction, float(np.abs(correction).max()))
+        return LidarScan(
+            timestamp=scan.timestamp,
+            angles=angles,
+            distances=scan.distances,
+            intensities=scan.intensities,
+            scan_frequency=scan.scan_frequency,
+            seq=scan.seq,
+            packet_index=scan.packet_index,
+            packet_times=scan.packet_times
+        )
+    
+    def stats(self) -> dict:
+        return {
+            'scans': self.scans,
+            'skipped': self.skipped,
+            'max_correction_deg': round(self.max_correction, 2),
+        }
+
+
+class ScanFilter(ABC):
+    """
+    One stage of a ScanFilterChain: returns a keep-mask over the points it
+    is given. The chain records per-stage timing and rejection counts.
+    """
+    name = 'filter'
+    
+    def __init__(self):
+        self.calls = 0
+        self.points_in = 0
+        self.rejected = 0
+        self.time_total = 0.0
+        self.time_last = 0.0
+    
+    @abstractmethod
+    def keep(self, angles: np.ndarray, distances: np.ndarray,
+             intensities: np.ndarray) -> np.ndarray:
+        """Boolean mask, True for points to keep"""
+    
+    def reset(self):
+        """Forget any history (e.g. after a recovery gap)"""
+    
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'points_in': self.points_in,
+            'rejected': self.rejected,
+            'reject_ratio': round(self.rejected / self.points_in, 4) if self.points_in else 0.0,
+            'last_ms': round(self.time_last * 1000, 3),
+            'avg_ms': round(self.time_total * 1000 / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+class IntensityGate(ScanFilter):
+    """Drop returns weaker than `min_intensity`"""
+    name = 'intensity'
+    
+    def __init__(self, min_intensity: int = 8):
+        super().__init__()
+        self.min_intensity = min_intensity
+    
+    def keep(self, angles, distances, intensities):
+        return intensities >= self.min_intensity
+
+
+class IsolatedPointFilter(ScanFilter):
+    """
+    Drop returns with no angular neighbour at a similar range: a point
+    survives if the previous or next point (by angle, within
+    `max_angle_gap` degrees) is within max(min_gap_mm, rel_gap * range).
+    """
+    name = 'isolated'
+    
+    def __init__(self, min_gap_mm: float = 100.0, rel_gap: float = 0.1,
+                 max_angle_gap: float = 2.0):
+        super().__init__()
+        self.min_gap_mm = min_gap_mm
+        self.rel_gap = rel_gap
+        self.max_angle_gap = max_angle_gap
+    
+    def keep(self, angles, distances, intensities):
+        n = len(distances)
+        if n < 3:
+            return np.ones(n, dtype=bool)
+        order = np.argsort(angles, kind='stable')
+        a = angles[order]
+        d = distances[order].astype(np.float32)
+        tolerance = np.maximum(self.min_gap_mm, self.rel_gap * d)
+        supported = np.zeros(n, dtype=bool)
+        for shift in (1, -1):
+            gap = np.abs(a - np.roll(a, shift))
+            gap = np.minimum(gap, 360.0 - gap)
+            supported |= (gap <= self.max_angle_gap) & (np.abs(d - np.roll(d, shift)) <= tolerance)
+        mask = np.empty(n, dtype=bool)
+        mask[order] = supported
+        return mask
+
+
+class TemporalMedianFilter(ScanFilter):
+    """
+    Per-bin median over the last `depth` scans: a return is kept when the
+    median of its own range and the bin's min range in the previous
+    depth - 1 scans (taken over +-`spread` bins, so rotation between scans
+    is tolerated) is within max(min_gap_mm, rel_gap * range). Bins with no
+    return count as far, so a new return needs confirmation in a majority
+    of scans. History is a fixed (depth, num_bins) ring.
+    """
+    name = 'temporal_median'
+    
+    def __init__(self, num_bins: int = 360, depth: int = 3, spread: int = 1,
+                 min_gap_mm: float = 100.0, rel_gap: float = 0.1):
+        super().__init__()
+        self.num_bins = num_bins
+        self.depth = max(2, depth)
+        self.spread = spread
+        self.min_gap_mm = min_gap_mm
+        self.rel_gap = rel_gap
+        self._history = np.full((self.depth, num_bins), 0xFFFF, dtype=np.uint16)
+        self._dilated = np.empty((self.depth - 1, num_bins), dtype=np.uint16)
+        self._pos = 0
+        self._filled = 0
+    
+    def reset(self):
+        self._history.fill(0xFFFF)
+        self._filled = 0
+    
+    def keep(self, angles, distances, intensities):
+        idx = (angles * np.float32(self.num_bins / 360.0)).astype(np.intp)
+        idx %= self.num_bins
+        
+        # Earlier scans, min range over neighbouring bins
+        previous = np.delete(self._history, self._pos, axis=0)
+        dilated = self._dilated
+        dilated[:] = previous
+        for shift in range(1, self.spread + 1):
+            np.minimum(dilated, np.roll(previous, shift, axis=1), out=dilated)
+            np.minimum(dilated, np.roll(previous, -shift, axis=1), out=dilated)
+        
+        # This scan goes into the ring before filtering, so real new returns get confirmed
+        row = self._history[self._pos]
+        row.fill(0xFFFF)
+        np.minimum.at(row, idx, distances)
+        self._pos = (self._pos + 1) % self.depth
+        self._filled = min(self._filled + 1, self.depth)
+        if self._filled < self.depth:
+            return np.ones(len(distances), dtype=bool)
+        
+        values = np.vstack((dilated[:, idx], distances[None, :])).astype(np.float32)
+        median = np.median(values, axis=0)
+        d = distances.astype(np.float32)
+        return np.abs(median - d) <= np.maximum(self.min_gap_mm, self.rel_gap * d)
+
+
+class ScanFilterChain:
+    """Runs filter stages in order over each complete scan"""
+    
+    def __init__(self, stages: List[ScanFilter]):
+        self.stages = stages
+    
+    @classmethod
+    def default(cls) -> 'ScanFilterChain':
+        return cls([IntensityGate(), IsolatedPointFilter(), TemporalMedianFilter()])
+    
+    def apply(self, scan: LidarScan) -> LidarScan:
+        """Filtered copy of `scan` (same timestamp, frequency and seq)"""
+        angles, distances, intensities = scan.angles, scan.distances, scan.intensities
+        kept_index = np.arange(len(distances)) if scan.packet_index is not None else None
+        for stage in self.stages:
+            start = time.perf_counter()
+            mask = stage.keep(angles, distances, intensities)
+            n = len(distances)
+            kept = int(np.count_nonzero(mask))
+            if kept < n:
+                angles, distances, intensities = angles[mask], distances[mask], intensities[mask]
+                if kept_index is not None:
+                    kept_index = kept_index[mask]
+            stage.time_last = time.perf_counter() - start
+            stage.time_total += stage.time_last
+            stage.calls += 1
+            stage.points_in += n
+            stage.rejected += n - kept
+        return LidarScan(
+            timestamp=scan.timestamp,
+            angles=angles,
+            distances=distances,
+            intensities=intensities,
+            scan_frequency=scan.scan_frequency,
+            seq=scan.seq,
+            packet_index=(np.searchsorted(kept_index, scan.packet_index).astype(np.int32)
+                          if kept_index is not None else None),
+            packet_times=scan.packet_times
+        )
+    
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+    
+    def stats(self) -> dict:
+        stages = {stage.name: stage.stats() for stage in self.stages}
+        return {
+            'stages': stages,
+            'last_ms': round(sum(s['last_ms'] for s in stages.values()), 3),
+        }
+
+
+def _sample_struct(lsn: int) -> struct.Struct:
+    """Struct for `lsn` samples (distance u16, intensity u8), cached per count"""
+    sample_struct = _SAMPLE_STRUCTS.get(lsn)
+    if sample_struct is None:
+        sample_struct = _SAMPLE_STRUCTS[lsn] = struct.Struct('<' + 'HB' * lsn)
+    return sample_struct
+
+
+def decode_packets_per_sample(buffer, start: int = 0, end: Optional[int] = None,
+                              counters=None) -> Tuple[int, List[DecodedPacket]]:
+    """
+    Reference decoder: parse packets one sample at a time with struct.
+
+    Decodes buffer[start:end] in place and returns (pos, packets). Bytes
+    from `pos` on are an incomplete packet and must be kept for the next read.
+    `counters` (e.g. LidarStats) gets checksum_errors, resyncs and
+    discarded_bytes incremented.
+    """
+    pos = start
+    end = len(buffer) if end is None else end
+    packets = []
+    
+    while end - pos >= PACKET_HEADER_LEN:
+        idx = buffer.find(PACKET_SYNC, pos)
+        if idx == -1:
+            _count_resync(counters, end - 1 - pos)
+            pos = end - 1
+            break
+        if idx != pos:
+            _count_resync(counters, idx - pos)
+        pos = idx
+        if end - pos < PACKET_HEADER_LEN:
+            break
+        
+        # One unpack for the header and one for all samples: each
+        # unpack_from of a bytearray (the ring buffer) acquires its buffer
+        ct, lsn, fsa, lsa, cs = PACKET_HEADER.unpack_from(buffer, pos + 2)
+        
+        packet_len = PACKET_HEADER_LEN + lsn * SAMPLE_LEN
+        if end - pos < packet_len:
+            break
+        
+        samples = _sample_struct(lsn).unpack_from(buffer, pos + PACKET_HEADER_LEN)
+        sample_distances = samples[0::2]
+        expected_cs = 0x55AA ^ (ct | (lsn << 8)) ^ fsa ^ lsa
+        for dist in sample_distances:
+            expected_cs ^= dist
+        
+        if cs != expected_cs:
+            if counters is not None:
+                counters.checksum_errors += 1
+            pos += 2
+            continue
+        
+        start_angle = (fsa >> 1) / 64.0
+        end_angle = (lsa >> 1) / 64.0
+        
+        if lsn > 1:
+            if end_angle < start_angle:
+                angle_diff = (360 - start_angle) + end_angle
+            else:
+                angle_diff = end_angle - start_angle
+            angle_step = angle_diff / (lsn - 1)
+        else:
+            angle_step = 0
+        
+        angles = []
+        distances = []
+        intensities = []
+        for i, (dist, intensity) in enumerate(zip(sample_distances, samples[1::2])):
+            angle = start_angle + i * angle_step
+            if angle >= 360:
+                angle -= 360
+            
+            if 0 < dist < MAX_RANGE_MM:
+                angles.append(angle)
+                distances.append(dist)
+                intensities.append(intensity)
+        
+        packets.append((end_angle, angles, distances, intensities))
+        pos += packet_len
+    
+    return pos, packets
+
+
+def decode_packets_vectorized(buffer, start: int = 0, end: Optional[int] = None,
+                              counters=None) -> Tuple[int, List[DecodedPacket]]:
+    """
+    Parse every complete packet in `buffer` with one set of array operations.
+
+    Headers are walked in Python (one step per packet); checksums, angle
+    interpolation and range filtering run over all samples of the run at
+    once. Sample values are bit-identical to decode_packets_per_sample()
+    (returned as arrays instead of lists), including the 2-byte resync after
+    a checksum failure. `counters` as for decode_packets_per_sample().
+    """
+    pos = start
+    end = len(buffer) if end is None else end
+    packets = []
+    while True:
+        pos, run, resync = _decode_run(buffer, pos, end, counters)
+        packets.extend(run)
+        if not resync:
+            return pos, packets
+
+
+def _count_resync(counters, skipped: int):
+    """Record `skipped` bytes dropped while searching for a packet header"""
+    if counters is not None and skipped > 0:
+        counters.resyncs += 1
+        counters.discarded_bytes += skipped
+
+
+def _decode_run(buffer, pos: int, end: int,
+                counters=None) -> Tuple[int, List[DecodedPacket], bool]:
+    """Decode packets from `pos` up to the first checksum failure"""
+    starts = []
+    
+    while end - pos >= PACKET_HEADER_LEN:
+        idx = buffer.find(PACKET_SYNC, pos)
+        if idx == -1:
+            _count_resync(counters, end - 1 - pos)
+            pos = end - 1
+            break
+        if idx != pos:
+            _count_resync(counters, idx - pos)
+        pos = idx
+        if end - pos < PACKET_HEADER_LEN:
+            break
+        packet_len = PACKET_HEADER_LEN + buffer[pos + 3] * SAMPLE_LEN
+        if end - pos < packet_len:
+            break
+        starts.append(pos)
+        pos += packet_len
+    
+    if not starts:
+        return pos, [], False
+    
+    raw = np.frombuffer(buffer, dtype=np.uint8, count=pos)
+    hdr = np.array(starts, dtype=np.intp)
+    ct = raw[hdr + 2].astype(np.uint16)
+    lsn = raw[hdr + 3].astype(np.intp)
+    fsa = raw[hdr + 4].astype(np.uint16) | (raw[hdr + 5].astype(np.uint16) << 8)
+    lsa = raw[hdr + 6].astype(np.uint16) | (raw[hdr + 7].astype(np.uint16) << 8)
+    cs = raw[hdr + 8].astype(np.uint16) | (raw[hdr + 9].astype(np.uint16) << 8)
+    
+    # Flat index of every sample in the run
+    first = np.cumsum(lsn) - lsn
+    sample_idx = np.arange(int(lsn.sum()), dtype=np.intp) - np.repeat(first, lsn)
+    offsets = np.repeat(hdr + PACKET_HEADER_LEN, lsn) + sample_idx * SAMPLE_LEN
+    dist = raw[offsets].astype(np.uint16) | (raw[offsets + 1].astype(np.uint16) << 8)
+    
+    sample_xor = np.zeros(len(hdr), dtype=np.uint16)
+    has_samples = lsn > 0
+    if dist.size:
+        sample_xor[has_samples] = np.bitwise_xor.reduceat(dist, first[has_samples])
+    expected_cs = 0x55AA ^ (ct | (lsn.astype(np.uint16) << 8)) ^ fsa ^ lsa ^ sample_xor
+    
+    resync = False
+    bad = np.flatnonzero(cs != expected_cs)
+    if bad.size:
+        n_good = int(bad[0])
+        pos = starts[n_good] + 2
+        resync = True
+        if counters is not None:
+            counters.checksum_errors += 1
+        if not n_good:
+            return pos, [], resync
+        n_samples = int(first[n_good])
+        lsn, fsa, lsa = lsn[:n_good], fsa[:n_good], lsa[:n_good]
+        sample_idx, dist, offsets = sample_idx[:n_samples], dist[:n_samples], offsets[:n_samples]
+    
+    start_angle = (fsa >> 1) / 64.0
+    end_angle = (lsa >> 1) / 64.0
+    angle_diff = np.where(end_angle < start_angle, (360 - start_angle) + end_angle, end_angle - start_angle)
+    angle_step = np.divide(angle_diff, lsn - 1, out=np.zeros_like(angle_diff), where=lsn > 1)
+    
+    angles = np.repeat(start_angle, lsn) + sample_idx * np.repeat(angle_step, lsn)
+    angles = np.where(angles >= 360, angles - 360, angles)
+    
+    keep = (dist > 0) & (dist < MAX_RANGE_MM)
+    packet_id = np.repeat(np.arange(len(lsn)), lsn)
+    bounds = np.cumsum(np.bincount(packet_id[keep], minlength=len(lsn)))
+    
+    angles = angles[keep]
+    dist = dist[keep]
+    intensities = raw[offsets[keep] + 2]
+    
+    packets = []
+    lo = 0
+    for end_a, hi in zip(end_angle.tolist(), bounds.tolist()):
+        packets.append((end_a, angles[lo:hi], dist[lo:hi], intensities[lo:hi]))
+        lo = hi
+    
+    return pos, packets, resync
+
+
+class LidarStats:
+    """
+    Hot-path counters and timing histograms of one YDLidarDriver, updated
+    from the read thread (see metrics.py). Parse time is per packet,
+    averaged over each decode call; assembly covers take, de-skew,
+    filtering and binning of a completed scan; publish is the hand-off to
+    the subscriber mailboxes (subscriber timing is in Publisher.stats()).
+    """
+    
+    COUNTERS = ('reads', 'bytes_read', 'empty_reads', 'packets', 'points',
+                'checksum_errors', 'resyncs', 'discarded_bytes', 'scans',
+                'read_errors', 'recovery_attempts',
+                'recoveries', 'recovery_failures')
+    
+    def __init__(self):
+        self.started = time.time()
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.parse_time = Histogram()
+        self.assembly_time = Histogram()
+        self.publish_time = Histogram()
+        self.last_recovery: Optional[float] = None
+        self.strategy_attempts = {name: 0 for name in RECOVERY_STRATEGIES}
+        self.strategy_recoveries = {name: 0 for name in RECOVERY_STRATEGIES}
+        self.recovery_time = {name: Histogram(RECOVERY_BUCKETS) for name in RECOVERY_STRATEGIES}
+        self.outage_time = Histogram(RECOVERY_BUCKETS)  # Last scan before to first scan after
+    
+    def reset(self):
+        self.__init__()
+    
+    def counters(self) -> dict:
+        return {name: getattr(self, name) for name in self.COUNTERS}
+    
+    def histograms(self) -> dict:
+        return {
+            'parse_seconds_per_packet': self.parse_time,
+            'scan_assembly_seconds': self.assembly_time,
+            'publish_seconds': self.publish_time,
+            'recovery_seconds': {f'strategy="{name}"': hist
+                                 for name, hist in self.recovery_time.items()},
+            'outage_seconds': self.outage_time,
+        }
+    
+    def strategy_counters(self) -> dict:
+        return {
+            'recovery_strategy_attempts': {f'strategy="{name}"': n
+                                           for name, n in self.strategy_attempts.items()},
+            'recovery_strategy_successes': {f'strategy="{name}"': n
+                                            for name, n in self.strategy_recoveries.items()},
+        }
+    
+    def to_dict(self) -> dict:
+        uptime = max(time.time() - self.started, 1e-9)
+        return {
+            'uptime': round(uptime, 1),
+            'counters': self.counters(),
+            'rates': {
+                'bytes_per_second': round(self.bytes_read / uptime, 1),
+                'packets_per_second': round(self.packets / uptime, 1),
+                'scans_per_second': round(self.scans / uptime, 2),
+            },
+            'last_recovery': int(self.last_recovery * 1000) if self.last_recovery else None,
+            'parse_us_per_packet': self.parse_time.to_dict(scale=1e6, digits=1),
+            'scan_assembly_ms': self.assembly_time.to_dict(scale=1e3),
+            'publish_ms': self.publish_time.to_dict(scale=1e3),
+            'outage_s': self.outage_time.to_dict(digits=2),
+            'recovery': {
+                name: {
+                    'attempts': self.strategy_attempts[name],
+                    'successes': self.strategy_recoveries[name],
+                    'time_to_recover_s': self.recovery_time[name].to_dict(digits=2),
+                }
+                for name in RECOVERY_STRATEGIES
+            },
+        }
+
 
 class YDLidarDriver:
     """Driver for YDLIDAR T-mini Plus 360-degree LIDAR"""
     
-    def __init__(self, port: str = '/dev/ttyUSB1', baudrate: int = 230400):
+    def __init__(self, port: str = '/dev/ttyUSB1', baudrate: int = 230400,
+                 decoder: str = DECODER_VECTORIZED,
+                 filters: Optional[ScanFilterChain] = None,
+                 deskew: Optional[ScanDeskewer] = None, verbose: bool = True,
+                 stale_after: float = STALE_AFTER, cartesian: bool = False):
         self.port = port
         self.baudrate = baudrate
+        self.decoder = decoder
+        self._decode = (decode_packets_vectorized if decoder == DECODER_VECTORIZED
+                        else decode_packets_per_sample)
+        self.read_size = min(READ_SIZE.get(decoder, 256),
+                             max(MIN_READ_SIZE, int(baudrate / 10 * READ_WINDOW)))
+        self._rx = SerialRingBuffer(8192)
+        self._source = None  # Serial-like replacement for the port (e.g. CaptureReplay)
+        self._capture: Optional[CaptureWriter] = None
         self.serial: Optional[serial.Serial] = None
         self.running = False
         self.connected = False
         
-        self.current_scan: List[LidarPoint] = []
+        self.current_scan = ScanAccumulator()
+        self.filters = filters
+        self.deskew = deskew
+        self.verbose = verbose  # Per-scan and every-100-reads progress prints
+        self.cartesian = cartesian  # Fill scan.xy before subscribers see the scan
+        self.stats = LidarStats()
+        self.last_raw_scan: Optional[LidarScan] = None  # Before filtering
         self.last_complete_scan: Optional[LidarScan] = None
-        self.scan_callback: Optional[Callable[[LidarScan], None]] = None
+        self.publisher = Publisher()  # Complete scans, delivered off the read thread
         
         self.scan_start_time = time.time()
         self.scans_per_second = 0
         self.scan_count = 0
+        self.scan_seq = 0
         self.last_scan_count_time = time.time()
         
         self._lock = threading.Lock()
+        self._sector_cache: Tuple[Optional[float], Dict[int, List[dict]]] = (None, {})
+        self._scan_bytes: Optional[Tuple[tuple, bytes]] = None
+        self._downsamplers: 'OrderedDict[int, ScanDownsampler]' = OrderedDict()
+        self._bins_lock = threading.Lock()
         self._read_thread: Optional[threading.Thread] = None
+        self._reactor = None  # serial_reactor.SerialReactor when not using _read_thread
+        self._watched_fd: Optional[int] = None
+        self._read_paused = False
+        self._last_end_angle = 0
         self._last_valid_scan_time = time.time()
         self._consecutive_empty_reads = 0
         self._max_recovery_attempts = 6
         
-    def connect(self) -> bool:
-        """Connect to LIDAR sensor"""
+        # Recovery state machine (see _recovery_tick)
+        self.stale_after = stale_after
+        self.recovery_state = STATE_STREAMING
+        self._recovery_step = None       # Generator of the running strategy
+        self._recovery_strategy: Optional[str] = None
+        self._recovery_attempt = 0
+        self._recovery_started = 0.0
+        self._recovery_wake = 0.0
+        self._recovery_deadline = 0.0
+        self._outage_started = 0.0
+        
+    def connect(self, reactor=None) -> bool:
+        """
+        Connect to LIDAR sensor. With a serial_reactor.SerialReactor the port
+        is read when the reactor reports bytes instead of by a read thread.
+        """
         try:
-            self.serial = serial.Serial(
-                self.port, 
-                self.baudrate, 
-                timeout=1
-            )
+            self.serial = self._open_serial()
             
-            # Enable DTR for data transmission (required for T-mini Plus)
-            self.serial.dtr = True
-            self.serial.rts = False
+            self._set_control_lines()
             time.sleep(0.2)
             
             # Flush any stale data
@@ -91,8 +936,11 @@ class YDLidarDriver:
             self.connected = True
             self.running = True
             
-            self._read_thread = threading.Thread(target=self._read_loop, daemon=True)
-            self._read_thread.start()
+            if reactor is not None:
+                self._attach_reactor(reactor)
+            else:
+                self._read_thread = threading.Thread(target=self._read_loop, daemon=True)
+                self._read_thread.start()
             
             print(f"[LIDAR] Connected to YDLIDAR on {self.port}")
             return True
@@ -102,9 +950,61 @@ class YDLidarDriver:
             self.connected = False
             return False
     
+    def connect_source(self, source) -> bool:
+        """
+        Read from a serial-like source such as lidar_capture.CaptureReplay
+        instead of the port. The start-up handshake is skipped so replay
+        begins with the first recorded byte.
+        """
+        self._source = source
+        self.serial = source
+        self.port = getattr(source, 'port', self.port)
+        self._last_valid_scan_time = time.time()
+        self.connected = True
+        self.running = True
+        
+        self._read_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._read_thread.start()
+        
+        print(f"[LIDAR] Reading from {self.port}")
+        return True
+    
+    def _open_serial(self):
+        """
+        Open the configured port, or reopen the replacement source. Under a
+        reactor (recovery steps run on its thread) reads never block.
+        """
+        if self._source is not None:
+            self._source.open()
+            return self._source
+        return serial.Serial(self.port, self.baudrate, timeout=0 if self._reactor is not None else 1)
+    
+    def _set_control_lines(self):
+        """Enable DTR for data transmission (required for T-mini Plus)"""
+        try:
+            self.serial.dtr = True
+            self.serial.rts = False
+        except OSError:
+            pass  # No modem lines, e.g. the pty of lidar_simulator.VirtualLidar
+    
+    def start_capture(self, path: str):
+        """Record every raw serial read to `path` (see lidar_capture.py)"""
+        self.stop_capture()
+        self._capture = CaptureWriter(path, self.baudrate)
+        print(f"[LIDAR] Capturing raw serial data to {path}")
+    
+    def stop_capture(self):
+        capture = self._capture
+        self._capture = None
+        if capture:
+            capture.close()
+            print(f"[LIDAR] Capture stopped: {capture.bytes_written} bytes in {capture.records} reads")
+    
     def disconnect(self):
         """Disconnect from LIDAR"""
         self.running = False
+        if self._reactor is not None:
+            self._reactor.call_soon_threadsafe(self._unwatch)
         if self.serial and self.serial.is_open:
             try:
                 self.serial.write(b'\xA5\x65')
@@ -134,8 +1034,11 @@ class YDLidarDriver:
             print(f"[LIDAR] Could not find USB device path: {e}")
             return None
     
-    def _usb_reset(self) -> bool:
-        """Perform a USB device reset - simulates physical unplug/replug"""
+    def _usb_reset(self):
+        """
+        Recovery step: USB device reset - simulates physical unplug/replug.
+        Yields seconds to wait; returns True if a reset was issued.
+        """
         try:
             usb_path = self._find_usb_device_path()
             if usb_path:
@@ -148,10 +1051,10 @@ class YDLidarDriver:
                         pass
                 with open(authorize_file, 'w') as f:
                     f.write('0')
-                time.sleep(2.0)
+                yield 2.0
                 with open(authorize_file, 'w') as f:
                     f.write('1')
-                time.sleep(3.0)
+                yield 3.0
                 return True
             
             try:
@@ -180,7 +1083,7 @@ class YDLidarDriver:
                             fd = os.open(dev_path, os.O_WRONLY)
                             fcntl.ioctl(fd, USBDEVFS_RESET, 0)
                             os.close(fd)
-                            time.sleep(3.0)
+                            yield 3.0
                             return True
                     usb_dev = os.path.dirname(usb_dev)
                     if usb_dev == '/sys' or usb_dev == '/':
@@ -193,319 +1096,407 @@ class YDLidarDriver:
             print(f"[LIDAR] USB reset failed: {e}")
             return False
     
-    def _verify_scan_data(self, timeout: float = 5.0) -> int:
-        """Read from serial and count valid scan points"""
-        valid_points = 0
-        check_start = time.time()
-        temp_buffer = b''
-        while time.time() - check_start < timeout:
-            try:
-                chunk = self.serial.read(512)
-            except:
-                break
-            if not chunk:
-                continue
-            temp_buffer += chunk
-            while len(temp_buffer) >= 10:
-                idx = temp_buffer.find(b'\xaa\x55')
-                if idx == -1:
-                    temp_buffer = temp_buffer[-1:]
-                    break
-                if idx > 0:
-                    temp_buffer = temp_buffer[idx:]
-                if len(temp_buffer) < 10:
-                    break
-                lsn = temp_buffer[3]
-                packet_len = 10 + lsn * 3
-                if len(temp_buffer) < packet_len:
-                    break
-                for i in range(lsn):
-                    offset = 10 + i * 3
-                    if offset + 2 <= len(temp_buffer):
-                        dist = struct.unpack('<H', temp_buffer[offset:offset+2])[0]
-                        if 10 < dist < 12000:
-                            valid_points += 1
-                temp_buffer = temp_buffer[packet_len:]
-            if valid_points > 10:
-                break
-        return valid_points
-
-    def _check_device_health(self) -> bool:
-        """Send health status command (A5 92) to check if LIDAR is responsive"""
+    def _check_device_health(self):
+        """
+        Recovery step: send health status command (A5 92) to check if LIDAR
+        is responsive. Yields seconds to wait; returns True on a response.
+        """
         try:
             if not self.serial or not self.serial.is_open:
                 return False
             self.serial.reset_input_buffer()
             self.serial.write(b'\xA5\x92')
-            time.sleep(0.5)
-            response = self.serial.read(self.serial.in_waiting or 64)
-            if response and b'\xA5\x5A' in response:
-                print(f"[LIDAR] Health check OK - device responsive ({len(response)} bytes)")
-                return True
+            # Only what is buffered: a silent device must not hold the
+            # thread (the reactor's, in reactor mode) in a read timeout
+            response = b''
+            for _ in range(int(HEALTH_TIMEOUT / RECOVERY_TICK)):
+                yield RECOVERY_TICK
+                waiting = self.serial.in_waiting
+                if waiting:
+                    response += self.serial.read(waiting)
+                    if b'\xA5\x5A' in response:
+                        print(f"[LIDAR] Health check OK - device responsive ({len(response)} bytes)")
+                        return True
             print(f"[LIDAR] Health check - no valid response ({len(response)} bytes)")
             return False
         except Exception as e:
             print(f"[LIDAR] Health check failed: {e}")
             return False
     
-    def _restart_scanning(self, attempt: int) -> bool:
-        """Restart LIDAR scanning - escalating recovery using YDLIDAR SDK commands"""
-        try:
-            if attempt <= 2:
-                print(f"[LIDAR] Strategy 1: Stop (A5 65) → wait → Start (A5 60)...")
-                if not self.serial or not self.serial.is_open:
-                    return False
+    # Escalating recovery strategies, as generators that yield the seconds to
+    # wait before their next step. The read loop drives them (see
+    # _recovery_tick); a strategy returns False when it cannot be carried out.
+    # When one finishes, normal parsing resumes and the first complete scan
+    # within RECOVERY_VERIFY_TIMEOUT confirms the recovery.
+    
+    def _recover_stop_start(self):
+        print(f"[LIDAR] Strategy 1: Stop (A5 65) → wait → Start (A5 60)...")
+        if not self.serial or not self.serial.is_open:
+            return False
+        self.serial.write(b'\xA5\x65')
+        yield 2.0
+        self.serial.reset_input_buffer()
+        self.serial.reset_output_buffer()
+        yield from self._check_device_health()
+        self.serial.reset_input_buffer()
+        self.serial.write(b'\xA5\x60')
+        yield 3.0
+    
+    def _recover_soft_reboot(self):
+        print(f"[LIDAR] Strategy 2: Soft reboot (A5 40) → reconnect...")
+        if self.serial and self.serial.is_open:
+            try:
                 self.serial.write(b'\xA5\x65')
-                time.sleep(2.0)
-                self.serial.reset_input_buffer()
-                self.serial.reset_output_buffer()
-                self._check_device_health()
-                self.serial.reset_input_buffer()
-                self.serial.write(b'\xA5\x60')
-                time.sleep(3.0)
-            elif attempt <= 4:
-                print(f"[LIDAR] Strategy 2: Soft reboot (A5 40) → reconnect...")
-                if self.serial and self.serial.is_open:
-                    try:
-                        self.serial.write(b'\xA5\x65')
-                        time.sleep(0.5)
-                        self.serial.write(b'\xA5\x40')
-                        time.sleep(0.5)
-                        self.serial.close()
-                    except:
-                        pass
-                time.sleep(4.0)
-                
-                port = self.port
-                baudrate = self.baudrate
-                self.serial = serial.Serial(port, baudrate, timeout=1)
-                self.serial.dtr = True
-                self.serial.rts = False
-                time.sleep(1.0)
-                self.serial.reset_input_buffer()
-                
-                if self._check_device_health():
-                    print(f"[LIDAR] Device responded after reboot")
-                else:
-                    print(f"[LIDAR] Device not responding after reboot, sending start anyway...")
-                
-                self.serial.reset_input_buffer()
-                self.serial.write(b'\xA5\x60')
-                time.sleep(3.0)
-            else:
-                print(f"[LIDAR] Strategy 3: USB device reset (simulated unplug/replug)...")
-                port = self.port
-                baudrate = self.baudrate
-                if self.serial and self.serial.is_open:
-                    try:
-                        self.serial.write(b'\xA5\x65')
-                        time.sleep(0.3)
-                        self.serial.close()
-                    except:
-                        pass
-                
-                if self._usb_reset():
-                    if not os.path.exists(port):
-                        print(f"[LIDAR] Waiting for {port} to reappear...")
-                        for _ in range(10):
-                            time.sleep(1.0)
-                            if os.path.exists(port):
-                                break
-                    if not os.path.exists(port):
-                        tty_ports = glob_module.glob('/dev/ttyUSB*')
-                        print(f"[LIDAR] Available ports after reset: {tty_ports}")
-                        if tty_ports:
-                            port = tty_ports[0]
-                            self.port = port
-                            print(f"[LIDAR] Using port: {port}")
-                        else:
-                            print(f"[LIDAR] No serial ports found after USB reset")
-                            return False
+                yield 0.5
+                self.serial.write(b'\xA5\x40')
+                yield 0.5
+                self.serial.close()
+            except Exception:
+                pass
+        yield 4.0
+        
+        self.serial = self._open_serial()
+        self._set_control_lines()
+        yield 1.0
+        self.serial.reset_input_buffer()
+        
+        if (yield from self._check_device_health()):
+            print(f"[LIDAR] Device responded after reboot")
+        else:
+            print(f"[LIDAR] Device not responding after reboot, sending start anyway...")
+        
+        self.serial.reset_input_buffer()
+        self.serial.write(b'\xA5\x60')
+        yield 3.0
+    
+    def _recover_usb_reset(self):
+        print(f"[LIDAR] Strategy 3: USB device reset (simulated unplug/replug)...")
+        port = self.port
+        if self.serial and self.serial.is_open:
+            try:
+                self.serial.write(b'\xA5\x65')
+                yield 0.3
+                self.serial.close()
+            except Exception:
+                pass
+        
+        if (yield from self._usb_reset()):
+            if not os.path.exists(port):
+                print(f"[LIDAR] Waiting for {port} to reappear...")
+                for _ in range(10):
+                    yield 1.0
+                    if os.path.exists(port):
+                        break
+            if not os.path.exists(port):
+                tty_ports = glob_module.glob('/dev/ttyUSB*')
+                print(f"[LIDAR] Available ports after reset: {tty_ports}")
+                if tty_ports:
+                    port = tty_ports[0]
+                    self.port = port
+                    print(f"[LIDAR] Using port: {port}")
                 else:
-                    print(f"[LIDAR] USB reset not available, doing full serial reopen...")
-                    time.sleep(3.0)
-                
-                self.serial = serial.Serial(port, baudrate, timeout=1)
-                self.serial.dtr = True
-                self.serial.rts = False
-                time.sleep(1.0)
-                self.serial.reset_input_buffer()
-                self.serial.reset_output_buffer()
-                self.serial.write(b'\xA5\x60')
-                time.sleep(3.0)
-            
-            valid_points = self._verify_scan_data(5.0)
-            print(f"[LIDAR] Recovery check: {valid_points} valid points detected")
-            
-            if valid_points > 10:
-                self.serial.reset_input_buffer()
+                    print(f"[LIDAR] No serial ports found after USB reset")
+                    return False
+        else:
+            print(f"[LIDAR] USB reset not available, doing full serial reopen...")
+            yield 3.0
+        
+        self.serial = self._open_serial()
+        self._set_control_lines()
+        yield 1.0
+        self.serial.reset_input_buffer()
+        self.serial.reset_output_buffer()
+        self.serial.write(b'\xA5\x60')
+        yield 3.0
+    
+    def _start_recovery_attempt(self, now: float):
+        self._recovery_attempt += 1
+        strategy = RECOVERY_STRATEGIES[min((self._recovery_attempt - 1) // 2,
+                                           len(RECOVERY_STRATEGIES) - 1)]
+        age = now - self._last_valid_scan_time
+        print(f"[LIDAR] No valid scans for {age:.0f}s - recovery attempt "
+              f"{self._recovery_attempt}/{self._max_recovery_attempts} ({strategy})")
+        self.stats.recovery_attempts += 1
+        self.stats.strategy_attempts[strategy] += 1
+        self._recovery_strategy = strategy
+        self._recovery_started = now
+        self._recovery_step = getattr(self, f'_recover_{strategy}')()
+        self._recovery_wake = now
+        self.recovery_state = STATE_RECOVERING
+        with self._lock:
+            self.current_scan.clear()
+            if self.filters:
+                self.filters.reset()  # History predates the outage
+    
+    def _recovery_failed(self, now: float):
+        self.stats.recovery_failures += 1
+        print(f"[LIDAR] Recovery attempt {self._recovery_attempt} failed - no valid scan points")
+        if self._recovery_attempt >= self._max_recovery_attempts:
+            print(f"[LIDAR] All {self._max_recovery_attempts} recovery attempts failed. "
+                  f"Waiting {RECOVERY_COOLDOWN:.0f}s before retrying...")
+            self.recovery_state = STATE_COOLDOWN
+            self._recovery_deadline = now + RECOVERY_COOLDOWN
+        else:
+            self.recovery_state = STATE_BACKOFF
+            self._recovery_deadline = now + RECOVERY_RETRY_DELAY
+    
+    def _recovery_succeeded(self, now: float):
+        stats = self.stats
+        strategy = self._recovery_strategy
+        stats.recoveries += 1
+        stats.last_recovery = now
+        stats.strategy_recoveries[strategy] += 1
+        stats.recovery_time[strategy].observe(now - self._recovery_started)
+        stats.outage_time.observe(now - self._outage_started)
+        print(f"[LIDAR] Recovery successful ({strategy}) - valid scan data confirmed, "
+              f"outage {now - self._outage_started:.1f}s")
+        self.recovery_state = STATE_STREAMING
+        self._recovery_attempt = 0
+        self._recovery_step = None
+    
+    def _recovery_tick(self, now: float) -> bool:
+        """
+        Advance the recovery state machine. Returns True while a recovery
+        step owns the port, so the read loop must not read or parse.
+        """
+        state = self.recovery_state
+        if state == STATE_STREAMING:
+            if now - self._last_valid_scan_time <= STALL_TIMEOUT:
+                return False
+            last = self.last_complete_scan
+            self._outage_started = last.timestamp if last else now
+            self._recovery_attempt = 0
+            self._start_recovery_attempt(now)
+            return True
+        
+        if state == STATE_RECOVERING:
+            if now < self._recovery_wake:
+                return True
+            try:
+                delay = next(self._recovery_step)
+            except StopIteration as done:
+                self._recovery_step = None
+                if done.value is False:
+                    self._recovery_failed(now)
+                    return False
+                self.recovery_state = STATE_VERIFYING
+                self._recovery_deadline = now + RECOVERY_VERIFY_TIMEOUT
                 self._consecutive_empty_reads = 0
-                self._last_valid_scan_time = time.time()
+                return False
+            except Exception as e:
+                print(f"[LIDAR] Recovery failed: {e}")
+                self._recovery_step = None
+                self._recovery_failed(now)
+                return False
+            self._recovery_wake = now + delay
+            return True
+        
+        # Verifying, backing off or cooling down: the port is read as usual and
+        # any complete scan since the attempt started ends the outage
+        if self._last_valid_scan_time > self._recovery_started:
+            self._recovery_succeeded(now)
+        elif now >= self._recovery_deadline:
+            if state == STATE_VERIFYING:
+                self._recovery_failed(now)
+            else:
+                if state == STATE_COOLDOWN:
+                    self._recovery_attempt = 0
+                self._start_recovery_attempt(now)
                 return True
-            
-            return False
-            
-        except Exception as e:
-            print(f"[LIDAR] Recovery failed: {e}")
-            return False
+        return False
+    
+    def _reset_read_state(self):
+        self._rx.clear()
+        self._last_end_angle = 0
     
     def _read_loop(self):
         """Background thread to read and parse LIDAR data"""
-        buffer = b''
-        last_end_angle = 0
-        read_count = 0
-        recovery_attempts = 0
+        rx = self._rx
+        stats = self.stats
+        self._reset_read_state()
+        self.recovery_state = STATE_STREAMING
         
         while self.running:
             try:
-                if not self.running:
-                    break
+                if self._recovery_tick(time.time()):
+                    self._reset_read_state()
+                    time.sleep(RECOVERY_TICK)
+                    continue
                 if not self.serial or not self.serial.is_open:
                     time.sleep(0.1)
                     continue
                 
-                time_since_last_scan = time.time() - self._last_valid_scan_time
-                if time_since_last_scan > 5.0 and recovery_attempts < self._max_recovery_attempts:
-                    recovery_attempts += 1
-                    print(f"[LIDAR] No valid scans for {time_since_last_scan:.0f}s - recovery attempt {recovery_attempts}/{self._max_recovery_attempts}")
-                    if self._restart_scanning(recovery_attempts):
-                        buffer = b''
-                        last_end_angle = 0
-                        recovery_attempts = 0
-                        print(f"[LIDAR] Recovery successful - valid scan data confirmed")
-                    else:
-                        print(f"[LIDAR] Recovery attempt {recovery_attempts} failed - no valid scan points")
-                        time.sleep(2.0)
-                    continue
-                elif time_since_last_scan > 5.0 and recovery_attempts >= self._max_recovery_attempts:
-                    print(f"[LIDAR] All {self._max_recovery_attempts} recovery attempts failed. Waiting 30s before retrying...")
-                    time.sleep(30.0)
-                    recovery_attempts = 0
-                    continue
-                
                 try:
-                    chunk = self.serial.read(256)
+                    n = rx.fill_from(self.serial, max(self.read_size, self.serial.in_waiting))
                 except (OSError, TypeError):
                     break
-                if not chunk:
+                if not n:
+                    stats.empty_reads += 1
                     self._consecutive_empty_reads += 1
                     if self._consecutive_empty_reads > 50:
                         self._last_valid_scan_time = 0
                         self._consecutive_empty_reads = 0
                     continue
+                self._ingest(n)
                 
-                self._consecutive_empty_reads = 0
-                
-                read_count += 1
-                if read_count % 100 == 1:
-                    print(f"[LIDAR] Read {len(chunk)} bytes, buffer size: {len(buffer)}, total points: {len(self.current_scan)}")
-                    
-                buffer += chunk
-                
-                while len(buffer) >= 10:
-                    idx = buffer.find(b'\xaa\x55')
-                    if idx == -1:
-                        buffer = buffer[-1:] if buffer else b''
-                        break
-                    if idx > 0:
-                        buffer = buffer[idx:]
-                    if len(buffer) < 10:
-                        break
-                    
-                    ct = buffer[2]
-                    lsn = buffer[3]
-                    fsa = struct.unpack('<H', buffer[4:6])[0]
-                    lsa = struct.unpack('<H', buffer[6:8])[0]
-                    cs = struct.unpack('<H', buffer[8:10])[0]
-                    
-                    packet_len = 10 + lsn * 3
-                    if len(buffer) < packet_len:
-                        break
-                    
-                    expected_cs = 0x55AA ^ (ct | (lsn << 8)) ^ fsa ^ lsa
-                    for i in range(lsn):
-                        offset = 10 + i * 3
-                        if offset + 2 <= len(buffer):
-                            sample = struct.unpack('<H', buffer[offset:offset+2])[0]
-                            expected_cs ^= sample
-                    
-                    if cs != expected_cs:
-                        buffer = buffer[2:]
-                        continue
-                    
-                    start_angle = (fsa >> 1) / 64.0
-                    end_angle = (lsa >> 1) / 64.0
-                    
-                    if lsn > 1:
-                        if end_angle < start_angle:
-                            angle_diff = (360 - start_angle) + end_angle
-                        else:
-                            angle_diff = end_angle - start_angle
-                        angle_step = angle_diff / (lsn - 1) if lsn > 1 else 0
-                    else:
-                        angle_step = 0
-                    
-                    points = []
-                    for i in range(lsn):
-                        offset = 10 + i * 3
-                        if offset + 2 <= len(buffer):
-                            dist = struct.unpack('<H', buffer[offset:offset+2])[0]
-                            intensity = buffer[offset+2] if offset + 2 < len(buffer) else 0
-                            
-                            angle = start_angle + i * angle_step
-                            if angle >= 360:
-                                angle -= 360
-                            
-                            if dist > 0 and dist < 12000:
-                                points.append(LidarPoint(
-                                    angle=angle,
-                                    distance=dist,
-                                    intensity=intensity
-                                ))
-                    
-                    with self._lock:
-                        self.current_scan.extend(points)
-                        
-                        # Complete scan on angle wrap-around OR time-based (every ~0.2s)
-                        should_complete = False
-                        if end_angle < last_end_angle and end_angle < 90 and last_end_angle > 270:
-                            should_complete = True
-                        elif len(self.current_scan) >= 50 and (time.time() - self.scan_start_time) > 0.2:
-                            should_complete = True
-                    
-                    if should_complete:
-                        self._complete_scan()
-                    
-                    last_end_angle = end_angle
-                    buffer = buffer[packet_len:]
-                    
             except Exception as e:
+                stats.read_errors += 1
                 print(f"[LIDAR] Read error: {e}")
                 time.sleep(0.1)
     
-    def _complete_scan(self):
-        """Called when a full 360-degree scan is complete"""
+    def _ingest(self, n: int):
+        """Parse the `n` bytes just read into the ring buffer and assemble scans"""
+        rx = self._rx
+        stats = self.stats
+        self._consecutive_empty_reads = 0
+        t_read = time.time()
+        stats.reads += 1
+        stats.bytes_read += n
+        
+        capture = self._capture
+        if capture:
+            capture.write(rx.peek(n, len(rx) - n))
+        
+        if self.verbose and stats.reads % 100 == 1:
+            print(f"[LIDAR] Read {n} bytes, buffer size: {len(rx)}, total points: {len(self.current_scan)}")
+        
+        t_parse = time.perf_counter()
+        pos, packets = self._decode(rx.raw, rx.head, rx.tail, stats)
+        if packets:
+            stats.parse_time.observe((time.perf_counter() - t_parse) / len(packets))
+            stats.packets += len(packets)
+        consumed = pos - rx.head
+        rx.consume(consumed)
+        
+        # Packets in one read arrived back to back; spread their receive
+        # times over the wire time of the bytes they took up
+        spacing = consumed * 10.0 / self.baudrate / max(len(packets), 1)
+        last_end_angle = self._last_end_angle
+        for k, (end_angle, angles, distances, intensities) in enumerate(packets):
+            packet_time = t_read - (len(packets) - 1 - k) * spacing
+            with self._lock:
+                self.current_scan.extend(angles, distances, intensities, packet_time)
+                
+                # Complete scan on angle wrap-around, or when its packets
+                # span SCAN_TIMEOUT. Packet times, not the time this batch
+                # is parsed: a late batch must not cut a revolution short
+                should_complete = False
+                if end_angle < last_end_angle and end_angle < 90 and last_end_angle > 270:
+                    should_complete = True
+                elif (len(self.current_scan) >= 50
+                      and packet_time - self.current_scan.packet_times[0] > SCAN_TIMEOUT):
+                    should_complete = True
+            
+            if should_complete:
+                self._complete_scan(packet_time)
+            
+            last_end_angle = end_angle
+        self._last_end_angle = last_end_angle
+    
+    # ----- Reactor mode (serial_reactor.SerialReactor owns the port) -----
+    
+    def _attach_reactor(self, reactor):
+        self._reactor = reactor
+        self._reset_read_state()
+        self.recovery_state = STATE_STREAMING
+        reactor.call_later(0, self._reactor_tick)
+    
+    def _watch(self):
+        """Register the current port with the reactor (again after a reopen)"""
+        fd = self.serial.fileno() if self.serial and self.serial.is_open else None
+        if fd == self._watched_fd:
+            return
+        self._unwatch()
+        if fd is not None:
+            self.serial.timeout = 0  # Reads return what is buffered, never block
+            self._reactor.add_reader(fd, self._on_readable, 'lidar')
+            self._watched_fd = fd
+            self._read_paused = False
+    
+    def _unwatch(self):
+        if self._watched_fd is not None:
+            self._reactor.remove_reader(self._watched_fd)
+            self._watched_fd = None
+        self._read_paused = False
+    
+    def _on_readable(self):
+        rx = self._rx
+        try:
+            n = rx.fill_from(self.serial, rx.free_space())
+        except (OSError, TypeError, serial.SerialException) as e:
+            self.stats.read_errors += 1
+            print(f"[LIDAR] Read error: {e}")
+            self._unwatch()  # Stall detection in _reactor_tick takes it from here
+            return
+        if n:
+            try:
+                self._ingest(n)
+            except Exception as e:
+                self.stats.read_errors += 1
+                print(f"[LIDAR] Read error: {e}")
+        # The tty reports readable for every USB transfer (about one packet).
+        # Stop watching for the wire time of read_size bytes so reads batch
+        # as many packets as the blocking read thread gets per call
+        if self._watched_fd is not None and not self._read_paused:
+            self._read_paused = True
+            self._reactor.remove_reader(self._watched_fd)
+            self._reactor.call_later(self.read_size * 10.0 / self.baudrate, self._resume_reading)
+    
+    def _resume_reading(self):
+        if self._read_paused and self._watched_fd is not None and self.running:
+            self._read_paused = False
+            self._reactor.add_reader(self._watched_fd, self._on_readable, 'lidar')
+    
+    def _reactor_tick(self) -> Optional[float]:
+        """Stall detection and recovery steps; returns seconds to the next tick"""
+        if not self.running:
+            self._unwatch()
+            return None
+        if self._recovery_tick(time.time()):
+            self._unwatch()
+            self._reset_read_state()
+            return RECOVERY_TICK
+        self._watch()
+        return REACTOR_IDLE_TICK if self.recovery_state == STATE_STREAMING else RECOVERY_TICK
+    
+    def _complete_scan(self, end_time: float):
+        """
+        Called when a full 360-degree scan is complete; `end_time` is the
+        receive time of its last packet. Subscribers get the scan through
+        their mailboxes after the lock is released, so their handlers never
+        run on the read thread.
+        """
+        scan = None
         with self._lock:
             if len(self.current_scan) > 10:
+                t_start = time.perf_counter()
                 now = time.time()
-                scan_time = now - self.scan_start_time
+                scan_time = end_time - self.scan_start_time
                 
-                scan = LidarScan(
+                self.scan_seq += 1
+                scan = self.current_scan.take(
                     timestamp=now,
-                    points=self.current_scan.copy(),
-                    scan_frequency=1.0 / scan_time if scan_time > 0 else 0
+                    scan_frequency=1.0 / scan_time if scan_time > 0 else 0,
+                    seq=self.scan_seq
                 )
+                self.last_raw_scan = scan
+                if self.deskew:
+                    scan = self.deskew.apply(scan)
+                if self.filters:
+                    scan = self.filters.apply(scan)
+                if self.cartesian:
+                    scan.xy  # Computed here once instead of by the first consumer
                 
                 self.last_complete_scan = scan
                 self._last_valid_scan_time = now
+                self._publish_bins(scan)
                 self._consecutive_empty_reads = 0
-                print(f"[LIDAR] Complete scan: {len(scan.points)} points, {scan.scan_frequency:.1f} Hz")
-                
-                if self.scan_callback:
-                    try:
-                        self.scan_callback(scan)
-                    except Exception as e:
-                        print(f"[LIDAR] Callback error: {e}")
+                stats = self.stats
+                stats.scans += 1
+                stats.points += len(self.last_raw_scan)
+                stats.assembly_time.observe(time.perf_counter() - t_start)
+                if self.verbose:
+                    print(f"[LIDAR] Complete scan: {len(scan)} points, {scan.scan_frequency:.1f} Hz")
                 
                 self.scan_count += 1
                 if now - self.last_scan_count_time >= 1.0:
@@ -513,16 +1504,44 @@ class YDLidarDriver:
                     self.scan_count = 0
                     self.last_scan_count_time = now
             
-            self.current_scan = []
-            self.scan_start_time = time.time()
+            self.current_scan.clear()
+            self.scan_start_time = end_time
+        
+        if scan is not None:
+            t_publish = time.perf_counter()
+            self.publisher.publish(scan)
+            self.stats.publish_time.observe(time.perf_counter() - t_publish)
+    
+    @property
+    def scan_age(self) -> float:
+        """Seconds since the latest complete scan (inf before the first)"""
+        scan = self.last_complete_scan
+        return time.time() - scan.timestamp if scan else math.inf
+    
+    @property
+    def stale(self) -> bool:
+        """True when the latest scan is too old to steer by"""
+        return self.scan_age > self.stale_after
+    
+    def freshness(self) -> dict:
+        """Scan age and recovery state, for API responses"""
+        age = self.scan_age
+        return {
+            'age_ms': None if math.isinf(age) else int(age * 1000),
+            'stale': age > self.stale_after,
+            'recovery_state': self.recovery_state,
+        }
     
     def get_latest_scan(self) -> Optional[LidarScan]:
         """Get the most recent complete scan"""
         with self._lock:
             return self.last_complete_scan
     
-    def get_scan_dict(self) -> dict:
-        """Get scan data as dictionary for JSON serialization"""
+    def get_scan_dict(self, cartesian: bool = False) -> dict:
+        """
+        Get scan data as dictionary for JSON serialization; `cartesian`
+        adds x (right) and y (forward) in metres to each point
+        """
         scan = self.get_latest_scan()
         if not scan:
             return {
@@ -530,25 +1549,89 @@ class YDLidarDriver:
                 'points': [],
                 'count': 0,
                 'frequency': 0,
-                'timestamp': 0
+                'timestamp': 0,
+                **self.freshness()
             }
         
         points = [
-            {
-                'angle': round(p.angle, 1),
-                'distance': p.distance,
-                'intensity': p.intensity
-            }
-            for p in scan.points
+            {'angle': a, 'distance': d, 'intensity': i}
+            for a, d, i in zip(np.round(scan.angles.astype(np.float64), 1).tolist(),
+                               scan.distances.tolist(), scan.intensities.tolist())
         ]
+        if cartesian:
+            xs, ys = np.round(scan.xy.astype(np.float64), 3).tolist()
+            for point, x, y in zip(points, xs, ys):
+                point['x'] = x
+                point['y'] = y
         
         return {
             'connected': self.connected,
             'points': points,
             'count': len(points),
             'frequency': round(scan.scan_frequency, 1),
-            'timestamp': int(scan.timestamp * 1000)
+            'timestamp': int(scan.timestamp * 1000),
+            **self.freshness()
+        }
+    
+    def get_scan_bytes(self) -> Optional[bytes]:
+        """Latest scan in the binary wire format (encoded once per scan)"""
+        scan = self.get_latest_scan()
+        if not scan:
+            return None
+        key = (scan.seq, self.connected)
+        cached = self._scan_bytes
+        if cached is None or cached[0] != key:
+            cached = (key, encode_scan(scan, seq=scan.seq, connected=self.connected))
+            self._scan_bytes = cached
+        return cached[1]
+    
+    def _publish_bins(self, scan: LidarScan):
+        """Resample a new scan at every resolution that consumers use"""
+        with self._bins_lock:
+            for downsampler in self._downsamplers.values():
+                downsampler.update(scan)
+    
+    def get_binned_scan(self, num_bins: int = 360) -> Optional[BinnedScan]:
+        """
+        Latest scan as `num_bins` min-range bins. The first request for a
+        resolution subscribes it, so later scans are resampled as they
+        complete; the result is valid for one scan period (see ScanDownsampler).
+        """
+        with self._bins_lock:
+            downsampler = self._downsamplers.get(num_bins)
+            if downsampler is None:
+                downsampler = ScanDownsampler(num_bins)
+                self._downsamplers[num_bins] = downsampler
+                if len(self._downsamplers) > MAX_BIN_RESOLUTIONS:
+                    self._downsamplers.popitem(last=False)
+                scan = self.last_complete_scan
+                if scan is not None:
+                    downsampler.update(scan)
+            else:
+                self._downsamplers.move_to_end(num_bins)
+            return downsampler.latest
+    
+    def get_binned_dict(self, num_bins: int = 360, cartesian: bool = False) -> dict:
+        """
+        Binned scan for JSON; bin i is centred on (i + 0.5) * 360 / bins
+        degrees. `cartesian` adds per-bin x and y lists in metres.
+        """
+        binned = self.get_binned_scan(num_bins)
+        if binned is None:
+            return {'connected': self.connected, 'bins': num_bins, 'distances': [],
+                    'frequency': 0, 'timestamp': 0, **self.freshness()}
+        result = {
+            'connected': self.connected,
+            'bins': num_bins,
+            'distances': binned.distances.tolist(),
+            'frequency': round(binned.scan_frequency, 1),
+            'timestamp': int(binned.timestamp * 1000),
+            'seq': binned.seq,
+            **self.freshness()
         }
+        if cartesian:
+            result['x'], result['y'] = np.round(binned.xy.astype(np.float64), 3).tolist()
+        return result
     
     def get_obstacles_in_range(self, min_angle: float = 0, max_angle: float = 360, 
                                max_distance: float = 2000) -> List[LidarPoint]:
@@ -557,65 +1640,105 @@ class YDLidarDriver:
         if not scan:
             return []
         
-        obstacles = []
-        for point in scan.points:
-            if min_angle <= point.angle <= max_angle and point.distance <= max_distance:
-                obstacles.append(point)
-        
-        return obstacles
+        index = scan.index
+        lo, hi = index.span(min_angle, max_angle)
+        hits = np.sort(index.order[lo:hi][index.distances[lo:hi] <= max_distance])
+        return list(map(LidarPoint, scan.angles[hits].tolist(),
+                        scan.distances[hits].tolist(), scan.intensities[hits].tolist()))
     
     def get_closest_obstacle(self) -> Optional[LidarPoint]:
         """Get the closest detected obstacle"""
         scan = self.get_latest_scan()
-        if not scan or not scan.points:
+        if not scan or not len(scan):
             return None
         
-        return min(scan.points, key=lambda p: p.distance)
+        return scan.point_at(scan.index.closest)
     
     def get_sector_distances(self, num_sectors: int = 8) -> List[dict]:
-        """Get minimum distance for each angular sector"""
+        """
+        Get minimum distance for each angular sector.
+
+        Results are cached per (scan timestamp, num_sectors); treat the
+        returned list as read-only.
+        """
         scan = self.get_latest_scan()
         if not scan:
             return []
         
+        # (timestamp, {num_sectors: sectors}), replaced whole and never
+        # mutated after publication: callers on several threads read it
+        cached_ts, by_count = self._sector_cache
+        if cached_ts != scan.timestamp:
+            by_count = {}
+        cached = by_count.get(num_sectors)
+        if cached is not None:
+            return cached
+        
         sector_size = 360 / num_sectors
-        sectors = []
+        counts, sums, mins = scan.index.sector_stats(num_sectors)
         
-        for i in range(num_sectors):
-            start_angle = i * sector_size
-            end_angle = (i + 1) * sector_size
-            
-            sector_points = [
-                p for p in scan.points 
-                if start_angle <= p.angle < end_angle
-            ]
-            
-            if sector_points:
-                min_point = min(sector_points, key=lambda p: p.distance)
-                avg_dist = sum(p.distance for p in sector_points) / len(sector_points)
-                sectors.append({
-                    'sector': i,
-                    'start_angle': start_angle,
-                    'end_angle': end_angle,
-                    'min_distance': min_point.distance,
-                    'avg_distance': avg_dist,
-                    'point_count': len(sector_points)
-                })
-            else:
-                sectors.append({
-                    'sector': i,
-                    'start_angle': start_angle,
-                    'end_angle': end_angle,
-                    'min_distance': 12000,
-                    'avg_distance': 12000,
-                    'point_count': 0
-                })
+        sectors = []
+        for i, (count, total, min_dist) in enumerate(zip(counts.tolist(), sums.tolist(), mins.tolist())):
+            sectors.append({
+                'sector': i,
+                'start_angle': i * sector_size,
+                'end_angle': (i + 1) * sector_size,
+                'min_distance': min_dist,
+                'avg_distance': total / count if count else 12000,
+                'point_count': count
+            })
         
+        self._sector_cache = (scan.timestamp, {**by_count, num_sectors: sectors})
         return sectors
     
+    def get_filter_stats(self) -> dict:
+        """Per-stage timing and rejection counts of the filter chain"""
+        stats = {'enabled': False, 'stages': {}}
+        if self.filters:
+            stats = {'enabled': True, **self.filters.stats()}
+        if self.deskew:
+            stats['deskew'] = self.deskew.stats()
+        return stats
+    
+    def get_stats(self) -> dict:
+        """Parser, assembly, callback and recovery metrics (see LidarStats)"""
+        return {
+            'connected': self.connected,
+            'decoder': self.decoder,
+            'baudrate': self.baudrate,
+            'scans_per_second': self.scans_per_second,
+            'buffered_bytes': len(self._rx),
+            **self.freshness(),
+            **self.stats.to_dict(),
+            'subscribers': self.publisher.stats(),
+        }
+    
+    def get_prometheus_metrics(self) -> str:
+        """LidarStats in the Prometheus text exposition format"""
+        stats = self.stats
+        age = self.scan_age
+        return format_prometheus(
+            'rover_lidar', {**stats.counters(), **stats.strategy_counters()},
+            {'connected': int(self.connected), 'scans_per_second': self.scans_per_second,
+             'buffered_bytes': len(self._rx), 'stale': int(age > self.stale_after),
+             'scan_age_seconds': round(age, 3) if not math.isinf(age) else '+Inf'},
+            stats.histograms())
+    
+    def subscribe(self, name: str, callback: Callable[[LidarScan], Any], maxlen: int = 1,
+                  policy: str = DROP_OLDEST, loop=None) -> Subscription:
+        """
+        Deliver complete scans to `callback` on its own worker thread (or as
+        a task on asyncio `loop` for a coroutine). The default mailbox keeps
+        only the latest scan; see pubsub.py for the drop policies.
+        """
+        return self.publisher.subscribe(name, callback, maxlen, policy, loop)
+    
+    def unsubscribe(self, name: str):
+        self.publisher.unsubscribe(name)
+    
     def set_scan_callback(self, callback: Callable[[LidarScan], None]):
-        """Set callback function called on each complete scan"""
-        self.scan_callback = callback
+        """Set callback function called on each complete scan (latest-wins, own thread)"""
+        self.subscribe('callback', callback)
 
 
 def find_lidar_port() -> Optional[str]:
@@ -650,9 +1773,9 @@ if __name__ == '__main__':
     lidar = YDLidarDriver(port)
     
     def on_scan(scan: LidarScan):
-        closest = min(scan.points, key=lambda p: p.distance) if scan.points else None
-        if closest:
-            print(f"Scan: {len(scan.points)} points, closest: {closest.distance}mm @ {closest.angle:.1f}°")
+        if len(scan):
+            closest = scan.point_at(int(np.argmin(scan.distances)))
+            print(f"Scan: {len(scan)} points, closest: {closest.distance}mm @ {closest.angle:.1f}°")
     
     lidar.set_scan_callback(on_scan)
     